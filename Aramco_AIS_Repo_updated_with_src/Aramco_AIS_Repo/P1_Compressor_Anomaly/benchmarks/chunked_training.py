@@ -0,0 +1,106 @@
+"""
+Peak memory and throughput of out-of-core training as the history grows.
+
+For each size a synthetic history file is written in chunks, then training runs in a fresh
+subprocess so its peak RSS is measured in isolation.  The in-memory path (read the whole file,
+``make_features``, fit) is run alongside for sizes up to ``--max-in-memory``.
+
+Run from the project directory:
+  python benchmarks/chunked_training.py --sizes 1e4 1e5 1e6 1e7 1e8
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import yaml
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC)
+# shared synthetic data generators live at the portfolio root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from train import make_features, train_from_history  # noqa: E402
+from common.synthetic import iter_chunks  # noqa: E402
+
+
+def write_history(path: str, n_rows: int, chunk_rows: int = 200_000, seed: int = 0):
+    """Write ``n_rows`` of simulated history to CSV or Parquet without holding it all in memory."""
+    parquet = path.endswith(".parquet")
+    writer = None
+    for part, df in enumerate(iter_chunks("compressor", n_samples=n_rows, chunk_size=chunk_rows, seed=seed)):
+        df = df.drop(columns=["asset_id", "t"])
+        if parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+        else:
+            df.to_csv(path, mode="w" if part == 0 else "a", header=part == 0, index=False)
+    if writer is not None:
+        writer.close()
+
+
+def run_worker(mode: str, path: str, config: str):
+    """Train once and print rows/s and peak RSS as JSON (runs in a subprocess)."""
+    import pandas as pd
+    from sklearn.ensemble import IsolationForest
+
+    with open(config) as f:
+        cfg = yaml.safe_load(f)
+    start = time.perf_counter()
+    if mode == "streaming":
+        _, metrics = train_from_history(cfg, path)
+        n_rows = metrics["rows_seen"]
+    else:
+        df = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
+        labels = df.pop("label").to_numpy()
+        X = make_features(df, cfg["data"]["window_size"])
+        y = labels[cfg["data"]["window_size"] - 1:]
+        X_normal = X[y == 0]
+        clf = IsolationForest(n_estimators=cfg["model"]["params"]["n_estimators"],
+                              random_state=cfg["data"]["seed"]).fit(X_normal)
+        -clf.score_samples(X_normal)  # threshold calibration, as in train.py
+        n_rows = len(X)
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # kB on Linux
+    print(json.dumps({"rows": n_rows, "seconds": elapsed, "peak_rss_mb": peak_mb}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark out-of-core training memory and throughput.")
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1e4, 1e5, 1e6])
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--max-in-memory", type=float, default=1e6, help="Largest size to run the in-memory path for.")
+    parser.add_argument("--config", type=str, default="configs/config.yaml")
+    parser.add_argument("--worker", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker[0], args.worker[1], args.config)
+        return
+
+    print(f"{'rows':>12} {'mode':>10} {'rows/s':>12} {'peak RSS (MB)':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            n = int(size)
+            path = os.path.join(tmp, f"history_{n}.{args.format}")
+            write_history(path, n)
+            modes = ["streaming"] + (["in-memory"] if n <= args.max_in_memory else [])
+            for mode in modes:
+                out = subprocess.run(
+                    [sys.executable, __file__, "--config", args.config, "--worker", mode, path],
+                    check=True, capture_output=True, text=True,
+                )
+                result = json.loads(out.stdout.strip().splitlines()[-1])
+                print(f"{n:>12,} {mode:>10} {result['rows'] / result['seconds']:>12,.0f} {result['peak_rss_mb']:>14.0f}")
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Numerical-equivalence check and latency benchmark for the flattened IsolationForest scorer.
+
+Compares ``FlatForest.score_samples`` with the joblib model on real features and random inputs,
+then times both at several batch sizes along with model load time.
+
+Run from the project directory after training:
+  python src/train.py && python benchmarks/flat_forest.py
+"""
+import argparse
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+from flat_forest import FlatForest  # noqa: E402
+from train import make_features, simulate_compressor_data  # noqa: E402
+
+JOBLIB_PATH = os.path.join("models", "isolation_forest.joblib")
+FLAT_PATH = os.path.join("models", "isolation_forest_flat.joblib")
+
+
+def best_time(fn, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flat IsolationForest equivalence and latency.")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--atol", type=float, default=1e-12)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    flat = FlatForest.load(FLAT_PATH)
+    t_load_flat = time.perf_counter() - start
+    start = time.perf_counter()
+    clf = joblib.load(JOBLIB_PATH)
+    t_load_joblib = time.perf_counter() - start
+    print(f"load: flat {t_load_flat * 1e3:.1f} ms, joblib {t_load_joblib * 1e3:.1f} ms (includes scikit-learn import)")
+
+    # Equivalence on in-distribution features and on wide random inputs
+    df, _ = simulate_compressor_data(n_samples=5000, seed=1)
+    X_real = make_features(df, 30).to_numpy()
+    X_rand = np.random.default_rng(0).normal(size=(2000, flat.n_features_in_)) * X_real.std(axis=0) * 5 + X_real.mean(axis=0)
+    for label, X in (("features", X_real), ("random", X_rand)):
+        expected = clf.score_samples(pd.DataFrame(X, columns=getattr(clf, "feature_names_in_", None)))
+        err = float(np.abs(flat.score_samples(X) - expected).max())
+        assert err <= args.atol, f"{label}: max abs error {err:.3e} exceeds {args.atol:.1e}"
+        print(f"equivalence ({label}, {len(X)} rows): OK, max abs error {err:.2e}")
+
+    X_pool = np.asarray(X_real)
+    X_named = pd.DataFrame(X_pool, columns=getattr(clf, "feature_names_in_", None))
+    print(f"{'batch':>6} {'joblib (ms)':>12} {'flat (ms)':>10} {'speedup':>8}")
+    for n in args.batch_sizes:
+        t_sk = best_time(lambda: clf.score_samples(X_named.iloc[:n]), args.repeats)
+        t_flat = best_time(lambda: flat.score_samples(X_pool[:n]), args.repeats)
+        print(f"{n:>6} {t_sk * 1e3:>12.2f} {t_flat * 1e3:>10.2f} {t_sk / t_flat:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
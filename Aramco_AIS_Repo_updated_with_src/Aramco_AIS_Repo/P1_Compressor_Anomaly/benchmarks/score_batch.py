@@ -0,0 +1,66 @@
+"""
+Throughput benchmark: one /score_batch call versus N single-sample calls.
+
+Run from the project directory after training:
+  python src/train.py && python benchmarks/score_batch.py --batch-sizes 1 10 100 1000
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+import serve  # noqa: E402
+
+
+def timed(fn, repeats: int) -> float:
+    """Return the best wall time (seconds) over several repeats."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched versus single-sample scoring.")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    n_features = serve.load_model().model.n_features_in_
+    rng = np.random.default_rng(args.seed)
+    client = TestClient(serve.app)
+
+    print(f"{'N':>6} {'single (s)':>12} {'batch json (s)':>15} {'batch npy (s)':>14} {'speedup':>8} {'samples/s':>12}")
+    for n in args.batch_sizes:
+        X = rng.normal(size=(n, n_features))
+        buf = io.BytesIO()
+        np.save(buf, X.astype(np.float32))
+        npy = buf.getvalue()
+
+        def single_calls():
+            for row in X:
+                client.post("/score_batch", json={"values": [row.tolist()]})
+
+        def batch_json():
+            client.post("/score_batch", json={"values": X.tolist()})
+
+        def batch_npy():
+            client.post("/score_batch", content=npy, headers={"content-type": "application/octet-stream"})
+
+        t_single = timed(single_calls, args.repeats)
+        t_json = timed(batch_json, args.repeats)
+        t_npy = timed(batch_npy, args.repeats)
+        t_best = min(t_json, t_npy)
+        print(f"{n:>6} {t_single:>12.4f} {t_json:>15.4f} {t_npy:>14.4f} {t_single / t_best:>7.1f}x {n / t_best:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
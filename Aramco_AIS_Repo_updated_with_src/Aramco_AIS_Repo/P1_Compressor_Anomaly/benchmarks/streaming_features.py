@@ -0,0 +1,60 @@
+"""
+Parity check and throughput benchmark for the streaming feature engine.
+
+Verifies that ``StreamingFeatures`` reproduces ``make_features`` sample for sample, then compares
+per-tick update cost with re-running pandas rolling over the recent history on every tick.
+
+Run from the project directory:
+  python benchmarks/streaming_features.py --samples 20000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+from features import StreamingFeatures  # noqa: E402
+from train import make_features, simulate_compressor_data  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming feature parity and throughput.")
+    parser.add_argument("--samples", type=int, default=20000)
+    parser.add_argument("--window", type=int, default=30)
+    parser.add_argument("--pandas-ticks", type=int, default=500, help="Ticks to time for the pandas baseline.")
+    parser.add_argument("--atol", type=float, default=1e-8)
+    args = parser.parse_args()
+
+    df, _ = simulate_compressor_data(n_samples=args.samples)
+    raw = df.to_numpy()
+
+    # Parity: every emitted vector must match the batch features row for row
+    expected = make_features(df, args.window)
+    engine = StreamingFeatures(df.columns, args.window)
+    start = time.perf_counter()
+    rows = [engine.update(x) for x in raw]
+    t_stream = time.perf_counter() - start
+    streamed = np.array([r for r in rows if r is not None])
+    assert list(expected.columns) == engine.names, "feature order differs from make_features"
+    assert streamed.shape == expected.shape, f"shape {streamed.shape} != {expected.shape}"
+    max_err = float(np.abs(streamed - expected.to_numpy()).max())
+    assert max_err <= args.atol, f"max abs error {max_err:.3e} exceeds {args.atol:.1e}"
+    print(f"parity: OK ({streamed.shape[0]} rows x {streamed.shape[1]} features, max abs error {max_err:.2e})")
+
+    # Baseline: recompute rolling features over the last window + 1 samples on every tick
+    ticks = min(args.pandas_ticks, len(df) - args.window - 1)
+    start = time.perf_counter()
+    for i in range(args.window + 1, args.window + 1 + ticks):
+        make_features(df.iloc[i - args.window - 1:i], args.window).iloc[-1]
+    t_pandas = (time.perf_counter() - start) / ticks
+
+    per_tick = t_stream / len(raw)
+    print(f"streaming engine: {per_tick * 1e6:9.1f} us/tick  ({1 / per_tick:,.0f} updates/s)")
+    print(f"pandas per tick:  {t_pandas * 1e6:9.1f} us/tick  ({1 / t_pandas:,.0f} updates/s)")
+    print(f"speedup: {t_pandas / per_tick:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
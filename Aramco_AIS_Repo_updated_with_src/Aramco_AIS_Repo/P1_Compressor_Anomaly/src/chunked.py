@@ -0,0 +1,189 @@
+"""
+Out-of-core training helpers for long compressor histories.
+
+History is read in chunks from CSV or Parquet, rolling-window features are computed per chunk in
+float32 straight into a preallocated matrix (carrying the last ``window`` rows across chunk
+boundaries), and a fixed-size uniform subsample is kept for fitting, so peak memory depends on
+the chunk and subsample sizes rather than on the length of the history.
+"""
+from typing import Iterable, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.ndimage import maximum_filter1d, minimum_filter1d
+
+try:
+    from .features import STATS, feature_names
+except ImportError:  # run as a script from src/
+    from features import STATS, feature_names
+
+LABEL_COLUMN = "label"
+
+
+def iter_history(path: str, columns: Sequence[str], chunk_size: int = 100_000) -> Iterator[pd.DataFrame]:
+    """
+    Yield the signal columns (and ``label`` if present) of a CSV or Parquet history file in
+    chunks of roughly ``chunk_size`` rows, as float32.
+    """
+    columns = list(columns)
+    if path.endswith((".parquet", ".pq")):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise RuntimeError("Reading Parquet history requires pyarrow (pip install pyarrow).") from exc
+        pf = pq.ParquetFile(path)
+        wanted = columns + ([LABEL_COLUMN] if LABEL_COLUMN in pf.schema_arrow.names else [])
+        for batch in pf.iter_batches(batch_size=chunk_size, columns=wanted):
+            yield batch.to_pandas().astype({col: np.float32 for col in columns})
+    else:
+        header = pd.read_csv(path, nrows=0).columns
+        wanted = columns + ([LABEL_COLUMN] if LABEL_COLUMN in header else [])
+        yield from pd.read_csv(
+            path, usecols=wanted, chunksize=chunk_size, dtype={col: np.float32 for col in columns}
+        )
+
+
+def rolling_features(values: np.ndarray, window: int, start: int, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Features for rows ``start:`` of ``values`` (shape ``(n, n_signals)``), in ``make_features``
+    column order, written into a float32 ``out`` matrix.  Rows before ``start`` only provide
+    window context; ``start`` must be at least ``window - 1``.
+
+    Window sums use a float64 cumulative sum of values centred on the first row of the chunk,
+    which keeps cancellation error far below float32 resolution, and min/max use O(n) van Herk
+    filters, so the cost per row does not grow with the window.
+    """
+    n, n_signals = values.shape
+    n_out = n - start
+    if out is None:
+        out = np.empty((n_out, n_signals * len(STATS)), dtype=np.float32)
+    if n_out <= 0:
+        return out[:0]
+    origin = (window - 1) // 2  # trailing window ending at each row
+    for c in range(n_signals):
+        x = values[:, c]
+        base = c * len(STATS)
+        centred = x.astype(np.float64) - float(x[0])
+        s1 = np.concatenate(([0.0], np.cumsum(centred)))
+        s2 = np.concatenate(([0.0], np.cumsum(centred * centred)))
+        hi = np.arange(start + 1, n + 1)
+        sum1 = s1[hi] - s1[hi - window]
+        sum2 = s2[hi] - s2[hi - window]
+        mean = sum1 / window
+        out[:, base + 0] = mean + float(x[0])
+        out[:, base + 1] = np.sqrt(np.maximum(sum2 - sum1 * mean, 0.0) / (window - 1))
+        out[:, base + 2] = minimum_filter1d(x, window, origin=origin)[start:]
+        out[:, base + 3] = maximum_filter1d(x, window, origin=origin)[start:]
+        out[:, base + 4] = x[start:]
+        np.subtract(x[start:], x[start - 1:n - 1], out=out[:, base + 5])
+    return out
+
+
+def iter_feature_chunks(
+    chunks: Iterable[pd.DataFrame], columns: Sequence[str], window: int
+) -> Iterator[Tuple[np.ndarray, Optional[np.ndarray]]]:
+    """
+    Turn raw history chunks into (features, labels) chunks, carrying the last ``window`` rows
+    of each chunk into the next so rolling windows span chunk boundaries.  Rows are emitted
+    exactly as ``make_features`` would for the concatenated history.
+    """
+    columns = list(columns)
+    tail = np.empty((0, len(columns)), dtype=np.float32)
+    for chunk in chunks:
+        values = np.concatenate([tail, chunk[columns].to_numpy(dtype=np.float32)])
+        start = max(window - 1, len(tail))
+        labels = None
+        if LABEL_COLUMN in chunk:
+            lab = chunk[LABEL_COLUMN].to_numpy()
+            labels = lab[len(lab) - (len(values) - start):] if len(values) > start else lab[:0]
+        if len(values) > start:
+            yield rolling_features(values, window, start), labels
+        tail = values[-window:]
+
+
+class Reservoir:
+    """
+    Uniform random subsample of at most ``size`` rows from a stream of row blocks.
+
+    Each row gets a random key and the ``size`` smallest keys are kept (bottom-k sampling),
+    which is equivalent to reservoir sampling but vectorises over whole blocks.
+    """
+
+    def __init__(self, size: int, n_columns: int, seed: int = 0):
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.rows = np.empty((0, n_columns), dtype=np.float32)
+        self.keys = np.empty(0)
+        self.seen = 0
+
+    def add(self, block: np.ndarray):
+        self.seen += len(block)
+        keys = self.rng.random(len(block))
+        if len(self.keys) == self.size:
+            # only rows that beat the current worst key can enter
+            keep = keys < self.keys.max()
+            block, keys = block[keep], keys[keep]
+        rows = np.concatenate([self.rows, block])
+        keys = np.concatenate([self.keys, keys])
+        if len(keys) > self.size:
+            top = np.argpartition(keys, self.size - 1)[:self.size]
+            rows, keys = rows[top], keys[top]
+        self.rows, self.keys = rows, keys
+
+
+def sample_history(
+    path: str,
+    columns: Sequence[str],
+    window: int,
+    chunk_size: int,
+    max_rows: int,
+    seed: int = 0,
+    test_ratio: float = 0.0,
+    max_test_rows: int = 0,
+) -> Tuple[pd.DataFrame, int, pd.DataFrame, Optional[np.ndarray]]:
+    """
+    Stream a history file and return a uniform subsample of normal-operation feature rows
+    (rows labelled 1 are skipped when a ``label`` column is present), the number of feature
+    rows seen, and a chronological hold-out with its labels (None when the file has none).
+
+    The hold-out is the last ``test_ratio`` of the rows, capped at ``max_test_rows``, as in the
+    in-memory train/test split.  Only the capped tail is buffered: rows leaving it go to the
+    fitting subsample, so memory stays bounded however long the history is.
+    """
+    names = feature_names(columns)
+    reservoir = Reservoir(max_rows, len(names), seed=seed)
+    cap = max_test_rows if test_ratio > 0 else 0
+    tail_X, tail_y = [], []  # most recent rows, at most ``cap`` of them
+    n_tail = 0
+    labelled = True
+    n_rows = 0
+
+    def fit_rows(X, labels):
+        reservoir.add(X if labels is None else X[labels == 0])
+
+    for X, labels in iter_feature_chunks(iter_history(path, columns, chunk_size), columns, window):
+        n_rows += len(X)
+        labelled = labelled and labels is not None
+        tail_X.append(X)
+        tail_y.append(labels)
+        n_tail += len(X)
+        while n_tail > cap:
+            # the oldest buffered rows move into the fitting subsample
+            excess = n_tail - cap
+            X0, y0 = tail_X[0], tail_y[0]
+            k = min(excess, len(X0))
+            fit_rows(X0[:k], None if y0 is None else y0[:k])
+            if k == len(X0):
+                tail_X.pop(0)
+                tail_y.pop(0)
+            else:
+                tail_X[0], tail_y[0] = X0[k:], None if y0 is None else y0[k:]
+            n_tail -= k
+    X_tail = np.concatenate(tail_X) if tail_X else np.empty((0, len(names)), dtype=np.float32)
+    y_tail = np.concatenate(tail_y) if tail_y and labelled else None
+    # without labels a hold-out cannot be scored, so every row is used for fitting
+    n_test = min(n_tail, int(test_ratio * n_rows)) if y_tail is not None else 0
+    fit_rows(X_tail[:n_tail - n_test], None if y_tail is None else y_tail[:n_tail - n_test])
+    X_test = pd.DataFrame(X_tail[n_tail - n_test:], columns=names)
+    y_test = None if y_tail is None else y_tail[n_tail - n_test:]
+    return pd.DataFrame(reservoir.rows, columns=names), n_rows, X_test, y_test
@@ -0,0 +1,165 @@
+"""
+Streaming rolling-window features for online scoring.
+
+``StreamingFeatures`` keeps O(1)-update state per asset and emits, one sample at a time,
+the same vector that ``train.make_features`` computes over a whole DataFrame.
+"""
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+STATS = ["mean", "std", "min", "max", "last", "diff"]
+
+
+def feature_names(columns: Sequence[str]) -> List[str]:
+    """
+    Column names in the order produced by ``make_features``.
+    """
+    return [f"{col}_{stat}" for col in columns for stat in STATS]
+
+
+class _MonotonicDeque:
+    """
+    Sliding-window extremum over a stream of sample indices, stored in a fixed-size ring.
+
+    ``sign=1`` tracks the minimum and ``sign=-1`` the maximum.  Each index is pushed and popped
+    at most once, so updates are amortised O(1).
+    """
+
+    def __init__(self, window: int, sign: int):
+        self.window = window
+        self.sign = sign
+        self.idx = np.zeros(window, dtype=np.int64)
+        self.val = np.zeros(window, dtype=np.float64)
+        self.head = 0
+        self.size = 0
+
+    def push(self, i: int, x: float) -> float:
+        w = self.window
+        key = self.sign * x
+        # drop values that can no longer be the extremum
+        while self.size and self.sign * self.val[(self.head + self.size - 1) % w] >= key:
+            self.size -= 1
+        # drop the front once it slides out of the window
+        if self.size and self.idx[self.head] <= i - w:
+            self.head = (self.head + 1) % w
+            self.size -= 1
+        tail = (self.head + self.size) % w
+        self.idx[tail] = i
+        self.val[tail] = x
+        self.size += 1
+        return float(self.val[self.head])
+
+
+class StreamingFeatures:
+    """
+    Rolling mean/std/min/max/last/diff for one asset, updated one sample at a time.
+
+    Running mean and sum of squared deviations are updated with the add/remove form of
+    Welford's algorithm and re-anchored from the ring buffer every time it wraps, so
+    floating-point drift stays bounded on long streams.
+    """
+
+    def __init__(self, columns: Sequence[str], window: int):
+        if window < 2:
+            raise ValueError("window must be at least 2 to compute std and diff")
+        self.columns = list(columns)
+        self.window = window
+        self.n_signals = len(self.columns)
+        self.names = feature_names(self.columns)
+        self.buffer = np.zeros((window, self.n_signals), dtype=np.float64)
+        self.count = 0
+        self.mean = np.zeros(self.n_signals)
+        self.m2 = np.zeros(self.n_signals)
+        self.mins = [_MonotonicDeque(window, 1) for _ in self.columns]
+        self.maxs = [_MonotonicDeque(window, -1) for _ in self.columns]
+        self._out = np.empty((self.n_signals, len(STATS)))
+
+    @property
+    def ready(self) -> bool:
+        return self.count >= self.window
+
+    def update(self, values: Sequence[float]) -> Optional[np.ndarray]:
+        """
+        Push one raw sample and return its feature vector, or None while the window fills.
+        """
+        x = np.asarray(values, dtype=np.float64)
+        if x.shape != (self.n_signals,):
+            raise ValueError(f"Expected {self.n_signals} values but received {x.size}")
+        w = self.window
+        i = self.count
+        slot = i % w
+        prev = self.buffer[(i - 1) % w].copy() if i else np.full(self.n_signals, np.nan)
+
+        if i < w:
+            n = i + 1
+            delta = x - self.mean
+            self.mean += delta / n
+            self.m2 += delta * (x - self.mean)
+        else:
+            old = self.buffer[slot]
+            new_mean = self.mean + (x - old) / w
+            self.m2 += (x - old) * (x - new_mean + old - self.mean)
+            self.mean = new_mean
+        self.buffer[slot] = x
+        self.count = i + 1
+        if slot == w - 1:
+            # exact re-anchor once per wrap: amortised O(1) per sample
+            self.mean = self.buffer.mean(axis=0)
+            self.m2 = ((self.buffer - self.mean) ** 2).sum(axis=0)
+
+        out = self._out
+        for c in range(self.n_signals):
+            out[c, 2] = self.mins[c].push(i, x[c])
+            out[c, 3] = self.maxs[c].push(i, x[c])
+        if not self.ready:
+            return None
+        out[:, 0] = self.mean
+        out[:, 1] = np.sqrt(np.maximum(self.m2, 0.0) / (w - 1))
+        out[:, 4] = x
+        out[:, 5] = x - prev
+        return out.ravel().copy()
+
+
+class FeatureStore:
+    """
+    One ``StreamingFeatures`` state per asset, created on first use.
+
+    ``/score`` runs on the server's threadpool, so updates for one asset are serialised by a
+    per-asset lock (the rolling sums and deques are not safe to interleave); different assets
+    update concurrently.
+    """
+
+    def __init__(self, columns: Sequence[str], window: int):
+        self.columns = list(columns)
+        self.window = window
+        self.engines: Dict[str, StreamingFeatures] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()  # guards the two dicts
+
+    def _engine(self, asset_id: str):
+        with self._lock:
+            engine = self.engines.get(asset_id)
+            if engine is None:
+                engine = self.engines[asset_id] = StreamingFeatures(self.columns, self.window)
+                self._locks[asset_id] = threading.Lock()
+            return engine, self._locks[asset_id]
+
+    def update(self, asset_id: str, values: Sequence[float]) -> Optional[np.ndarray]:
+        engine, lock = self._engine(asset_id)
+        with lock:
+            return engine.update(values)
+
+    def samples_until_ready(self, asset_id: str) -> int:
+        with self._lock:
+            engine, lock = self.engines.get(asset_id), self._locks.get(asset_id)
+        if engine is None:
+            return self.window
+        with lock:
+            return max(engine.window - engine.count, 0)
+
+    def reset(self, asset_id: str):
+        with self._lock:
+            self.engines.pop(asset_id, None)
+            self._locks.pop(asset_id, None)
@@ -0,0 +1,152 @@
+"""
+Array-based IsolationForest scorer.
+
+``export_isolation_forest`` flattens a fitted ``sklearn.ensemble.IsolationForest`` into contiguous
+NumPy node arrays and ``FlatForest`` scores batches against them with vectorised traversal of all
+trees at once.  Only NumPy and joblib are needed at serving time, so the scoring service can start
+without importing scikit-learn.
+"""
+from typing import Optional, Sequence
+
+import joblib
+import numpy as np
+
+
+def average_path_length(n: np.ndarray) -> np.ndarray:
+    """
+    Expected path length of an unsuccessful BST search over ``n`` samples (``c(n)`` in the
+    Isolation Forest paper), used to correct the depth of leaves that hold more than one sample.
+    """
+    n = np.asarray(n, dtype=np.float64)
+    out = np.zeros_like(n)
+    out[n == 2] = 1.0
+    big = n > 2
+    out[big] = 2.0 * (np.log(n[big] - 1.0) + np.euler_gamma) - 2.0 * (n[big] - 1.0) / n[big]
+    return out
+
+
+def export_isolation_forest(clf) -> dict:
+    """
+    Flatten a fitted IsolationForest into a dict of contiguous arrays.
+
+    Nodes of all trees are concatenated; ``roots`` holds the offset of each tree's root and
+    ``children`` interleaves (left, right) so one gather picks the branch.  Leaves point to
+    themselves, so traversal can run a fixed number of steps without branching, and
+    ``path_length`` holds each leaf's depth plus the ``c(n_node_samples)`` correction.  Index
+    arrays are pointer-sized so they can be used straight from a memory map without copies.
+    """
+    n_features = clf.n_features_in_
+    subsample = getattr(clf, "_max_features", n_features) != n_features
+    features, thresholds, lefts, rights, path_lengths, roots = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for est, est_features in zip(clf.estimators_, clf.estimators_features_):
+        tree = est.tree_
+        n_nodes = tree.node_count
+        left = tree.children_left.astype(np.int64)
+        right = tree.children_right.astype(np.int64)
+        is_leaf = left == -1
+
+        depth = np.zeros(n_nodes, dtype=np.int64)
+        for node in range(n_nodes):  # children always have larger ids than their parent
+            if not is_leaf[node]:
+                depth[left[node]] = depth[right[node]] = depth[node] + 1
+        max_depth = max(max_depth, int(depth.max()))
+
+        own = np.arange(n_nodes)
+        feature = np.where(is_leaf, 0, tree.feature)
+        if subsample:
+            feature = np.asarray(est_features)[feature]
+        features.append(feature)
+        thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+        lefts.append(np.where(is_leaf, own, left) + offset)
+        rights.append(np.where(is_leaf, own, right) + offset)
+        path_lengths.append(np.where(is_leaf, depth + average_path_length(tree.n_node_samples), 0.0))
+        roots.append(offset)
+        offset += n_nodes
+
+    names = getattr(clf, "feature_names_in_", None)
+    children = np.empty(2 * offset, dtype=np.intp)
+    children[0::2] = np.concatenate(lefts)
+    children[1::2] = np.concatenate(rights)
+    return {
+        "feature": np.concatenate(features).astype(np.intp),
+        "threshold": np.concatenate(thresholds).astype(np.float64),
+        "children": children,
+        "path_length": np.concatenate(path_lengths).astype(np.float64),
+        "roots": np.asarray(roots, dtype=np.intp),
+        "max_depth": np.int64(max_depth),
+        "normaliser": np.float64(average_path_length([clf._max_samples])[0]),
+        "n_features": np.int64(n_features),
+        "feature_names": np.asarray([] if names is None else list(names), dtype=str),
+    }
+
+
+class FlatForest:
+    """
+    IsolationForest scorer over flat node arrays.  ``score_samples`` follows scikit-learn's
+    convention (lower is more anomalous) so it is a drop-in replacement for the joblib model.
+    """
+
+    def __init__(self, arrays: dict):
+        self.arrays = arrays
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.children = arrays["children"]
+        self.path_length = arrays["path_length"]
+        self.roots = arrays["roots"]
+        self.max_depth = int(arrays["max_depth"])
+        self.normaliser = float(arrays["normaliser"])
+        self.n_features_in_ = int(arrays["n_features"])
+        names = arrays.get("feature_names")
+        self.feature_names: Optional[Sequence[str]] = list(names) if names is not None and len(names) else None
+
+    @classmethod
+    def from_isolation_forest(cls, clf) -> "FlatForest":
+        return cls(export_isolation_forest(clf))
+
+    def save(self, path: str):
+        joblib.dump(self.arrays, path)
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: Optional[str] = None) -> "FlatForest":
+        """
+        Load node arrays saved by ``save``.  With ``mmap_mode="r"`` the arrays stay backed by the
+        file, so worker processes serving the same model share its pages.
+        """
+        return cls(joblib.load(path, mmap_mode=mmap_mode))
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(a, "nbytes", 0) for a in self.arrays.values())
+
+    @property
+    def n_estimators(self) -> int:
+        return len(self.roots)
+
+    def path_lengths(self, X: np.ndarray, chunk_size: int = 256) -> np.ndarray:
+        """
+        Sum over trees of the corrected path length for each row of ``X``.
+
+        Rows are processed in chunks so the (rows x trees) node-index array stays cache-resident.
+        """
+        # scikit-learn's trees compare float32 inputs against float64 thresholds
+        X = np.ascontiguousarray(X, dtype=np.float32).astype(np.float64)
+        out = np.empty(X.shape[0])
+        for start in range(0, X.shape[0], chunk_size):
+            block = X[start:start + chunk_size]
+            flat_x = block.ravel()
+            row_offset = (np.arange(block.shape[0], dtype=np.intp) * block.shape[1])[:, np.newaxis]
+            node = np.repeat(self.roots[np.newaxis, :], block.shape[0], axis=0)
+            for _ in range(self.max_depth):
+                value = flat_x.take(row_offset + self.feature.take(node))
+                node = self.children.take(2 * node + (value > self.threshold.take(node)))
+            out[start:start + chunk_size] = self.path_length.take(node).sum(axis=1)
+        return out
+
+    def score_samples(self, X: np.ndarray) -> np.ndarray:
+        depth = self.path_lengths(X)
+        denominator = self.n_estimators * self.normaliser
+        if denominator == 0:
+            return -np.ones(depth.shape[0])
+        return -(2.0 ** (-depth / denominator))
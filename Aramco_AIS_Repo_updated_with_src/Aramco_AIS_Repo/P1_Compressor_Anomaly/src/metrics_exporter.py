@@ -1,52 +1,86 @@
-from prometheus_client import Gauge, start_http_server
+from prometheus_client import Counter, Gauge, start_http_server
+import asyncio
 import json
-import time
+import logging
 import os
 
 METRICS_FILE = os.environ.get("METRICS_FILE", "artifacts/metrics.json")
+# How often the file's modification time is checked; the file is only re-read when it changes
+POLL_SECONDS = float(os.environ.get("METRICS_POLL_SECONDS", 1.0))
+
+logger = logging.getLogger("metrics_exporter")
 
 # Define Prometheus gauges
 ANOMALY_AUROC = Gauge("anomaly_auroc", "AUROC of the anomaly detector")
 ANOMALY_AP = Gauge("anomaly_average_precision", "Average precision of the anomaly detector")
 FALSE_ALARMS_PER_HOUR = Gauge("false_alarms_per_hour", "False alarms per hour")
 ANOMALY_THRESHOLD = Gauge("anomaly_threshold", "Quantile threshold used for raising alarms")
+LAST_RELOAD = Gauge("metrics_file_last_reload_timestamp_seconds", "Unix time the metrics file was last loaded")
+RELOAD_ERRORS = Counter("metrics_file_reload_errors_total", "Failed attempts to read the metrics file")
+
+_GAUGES = {
+    "auroc": ANOMALY_AUROC,
+    "average_precision": ANOMALY_AP,
+    "false_alarms_per_hour": FALSE_ALARMS_PER_HOUR,
+    "threshold": ANOMALY_THRESHOLD,
+}
 
 
-def update_metrics():
+def update_metrics(path: str = METRICS_FILE) -> bool:
     """
     Read metrics from the artifacts file and update Prometheus gauges.
+    Returns True if the file was loaded.  Malformed files are logged and counted, not raised.
     """
-    if not os.path.exists(METRICS_FILE):
-        return
     try:
-        with open(METRICS_FILE) as f:
+        with open(path) as f:
             data = json.load(f)
-        auroc = data.get("auroc")
-        ap = data.get("average_precision")
-        fa = data.get("false_alarms_per_hour")
-        thr = data.get("threshold")
-        if auroc is not None:
-            ANOMALY_AUROC.set(auroc)
-        if ap is not None:
-            ANOMALY_AP.set(ap)
-        if fa is not None:
-            FALSE_ALARMS_PER_HOUR.set(fa)
-        if thr is not None:
-            ANOMALY_THRESHOLD.set(thr)
-    except Exception:
-        pass
+    except FileNotFoundError:
+        return False
+    except (OSError, json.JSONDecodeError) as exc:
+        RELOAD_ERRORS.inc()
+        logger.warning("Could not read %s: %s", path, exc)
+        return False
+    for key, gauge in _GAUGES.items():
+        value = data.get(key)
+        if value is not None:
+            gauge.set(value)
+    LAST_RELOAD.set_to_current_time()
+    return True
+
+
+def _signature(path: str):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+async def watch_metrics(path: str = METRICS_FILE, poll_seconds: float = POLL_SECONDS):
+    """
+    Reload the gauges whenever the metrics file changes.  ``train.py`` rewrites the file after
+    each run, so an (mtime, size) watch picks up every retrain without re-reading an unchanged
+    file.  A malformed file is reported once and retried when it next changes.
+    """
+    seen = None
+    while True:
+        sig = _signature(path)
+        if sig is not None and sig != seen:
+            seen = sig
+            if update_metrics(path):
+                logger.info("Loaded metrics from %s", path)
+        await asyncio.sleep(poll_seconds)
 
 
 def main():
     """
-    Start the Prometheus metrics server and periodically update gauges.
+    Start the Prometheus metrics server and reload gauges when the metrics file changes.
     """
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
     port = int(os.environ.get("METRICS_PORT", 9108))
     start_http_server(port)
-    while True:
-        update_metrics()
-        time.sleep(30)
+    asyncio.run(watch_metrics())
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,152 @@
+"""
+Multi-asset model registry for the compressor anomaly service.
+
+One process serves a model per compressor train.  Models are loaded lazily with
+``joblib.load(mmap_mode="r")`` so worker processes share pages, kept in an LRU cache bounded by
+count and bytes, and swapped atomically when a newer artifact lands on disk.
+"""
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+import joblib
+
+try:
+    from .flat_forest import FlatForest
+except ImportError:  # run as a script from src/
+    from flat_forest import FlatForest
+
+DEFAULT_ASSET = "default"
+FLAT_MODEL_FILE = "isolation_forest_flat.joblib"
+JOBLIB_MODEL_FILE = "isolation_forest.joblib"
+METRICS_FILE = "metrics.json"
+_ASSET_ID = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]*$")
+
+
+def asset_dirs(asset_id: str, models_dir: str = "models", artifacts_dir: str = "artifacts"):
+    """
+    Model and artifact directories for an asset.  The default asset uses the top-level
+    directories written by a plain ``train.py`` run; other assets use a sub-directory each.
+    """
+    if asset_id == DEFAULT_ASSET:
+        return models_dir, artifacts_dir
+    if not _ASSET_ID.match(asset_id) or ".." in asset_id:
+        raise ValueError(f"Invalid asset id {asset_id!r}")
+    return os.path.join(models_dir, asset_id), os.path.join(artifacts_dir, asset_id)
+
+
+@dataclass
+class ModelEntry:
+    model: object
+    threshold: Optional[float]
+    path: str
+    mtime_ns: int
+    nbytes: int
+
+
+class ModelRegistry:
+    """
+    LRU cache of per-asset models with count and memory bounds.
+
+    ``get`` returns the cached entry while its artifact is unchanged; when the file's mtime moves
+    on, the new model is loaded outside the lock and swapped in as one reference assignment, so
+    concurrent requests see either the old or the new model, never a half-loaded one.
+    """
+
+    def __init__(
+        self,
+        models_dir: str = "models",
+        artifacts_dir: str = "artifacts",
+        max_models: int = 32,
+        max_bytes: int = 512 * 1024 * 1024,
+        mmap_mode: Optional[str] = "r",
+    ):
+        self.models_dir = models_dir
+        self.artifacts_dir = artifacts_dir
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+        self.mmap_mode = mmap_mode
+        self._entries: "OrderedDict[str, ModelEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.reloads = 0
+
+    def _artifact(self, asset_id: str):
+        model_dir, _ = asset_dirs(asset_id, self.models_dir, self.artifacts_dir)
+        for name in (FLAT_MODEL_FILE, JOBLIB_MODEL_FILE):
+            path = os.path.join(model_dir, name)
+            if os.path.exists(path):
+                return path
+        raise FileNotFoundError(f"No model found for asset {asset_id!r} in {model_dir}. Please run train.py first.")
+
+    def _load(self, asset_id: str, path: str) -> ModelEntry:
+        mtime_ns = os.stat(path).st_mtime_ns
+        if path.endswith(FLAT_MODEL_FILE):
+            model = FlatForest.load(path, mmap_mode=self.mmap_mode)
+        else:
+            model = joblib.load(path, mmap_mode=self.mmap_mode)
+        _, artifact_dir = asset_dirs(asset_id, self.models_dir, self.artifacts_dir)
+        threshold = None
+        metrics_path = os.path.join(artifact_dir, METRICS_FILE)
+        if os.path.exists(metrics_path):
+            with open(metrics_path) as f:
+                thr = json.load(f).get("threshold")
+            threshold = float(thr) if thr is not None else None
+        return ModelEntry(model, threshold, path, mtime_ns, os.path.getsize(path))
+
+    def get(self, asset_id: str = DEFAULT_ASSET) -> ModelEntry:
+        """
+        Return the model entry for an asset, loading or reloading it if needed.
+        Raises FileNotFoundError if the asset has no trained model.
+        """
+        path = self._artifact(asset_id)
+        mtime_ns = os.stat(path).st_mtime_ns
+        with self._lock:
+            entry = self._entries.get(asset_id)
+            if entry is not None and entry.path == path and entry.mtime_ns == mtime_ns:
+                self._entries.move_to_end(asset_id)
+                self.hits += 1
+                return entry
+            self.misses += 1
+        fresh = self._load(asset_id, path)
+        with self._lock:
+            if asset_id in self._entries:
+                self.reloads += 1
+            self._entries[asset_id] = fresh
+            self._entries.move_to_end(asset_id)
+            self._evict()
+        return fresh
+
+    def _evict(self):
+        # keep the most recently used entry even if it alone exceeds the byte budget
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_models or self.total_bytes > self.max_bytes
+        ):
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(entry.nbytes for entry in self._entries.values())
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "models": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_models": self.max_models,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "reloads": self.reloads,
+                "hit_rate": self.hits / lookups if lookups else None,
+                "assets": list(self._entries),
+            }
@@ -1,31 +1,122 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
+from prometheus_client import make_asgi_app
 from pydantic import BaseModel
+import numpy as np
 import pandas as pd
-import joblib
+import io
 import os
+import time
+import yaml
+
+try:
+    from .features import FeatureStore
+    from .registry import DEFAULT_ASSET, ModelEntry, ModelRegistry
+    from . import telemetry
+except ImportError:  # run as a script from src/
+    from features import FeatureStore
+    from registry import DEFAULT_ASSET, ModelEntry, ModelRegistry
+    import telemetry
 
 app = FastAPI(title="Compressor Anomaly Service")
-_model = None
+# Prometheus scrapes serving histograms and counters from /metrics (see prometheus.yml)
+app.mount("/metrics", make_asgi_app())
+_config = None
+_registry = None
 _feature_columns = ["flow", "Ps", "Pd", "vib", "current", "temp"]
+_feature_store = None
+
+
+def load_config() -> dict:
+    global _config
+    if _config is None:
+        with open(os.environ.get("CONFIG_PATH", os.path.join("configs", "config.yaml"))) as f:
+            _config = yaml.safe_load(f)
+    return _config
+
+
+def load_feature_store():
+    """
+    Create the per-asset streaming feature state using the training window size.
+    """
+    global _feature_store
+    if _feature_store is None:
+        _feature_store = FeatureStore(_feature_columns, load_config()["data"]["window_size"])
+    return _feature_store
+
+
+def load_registry() -> ModelRegistry:
+    """
+    Create the per-asset model registry with the cache bounds from ``serving.registry``.
+    """
+    global _registry
+    if _registry is None:
+        reg_cfg = load_config().get("serving", {}).get("registry", {})
+        _registry = ModelRegistry(
+            max_models=reg_cfg.get("max_models", 32),
+            max_bytes=int(reg_cfg.get("max_memory_mb", 512) * 1024 * 1024),
+        )
+    return _registry
 
 
-def load_model():
-    global _model
-    if _model is None:
-        # Load the trained IsolationForest model from disk
-        path = os.path.join("models", "isolation_forest.joblib")
-        if not os.path.exists(path):
-            raise RuntimeError(f"Model file not found at {path}. Please run train.py first.")
-        _model = joblib.load(path)
+def load_model(asset_id: str = DEFAULT_ASSET) -> ModelEntry:
+    """
+    Return the model entry (model, threshold) for an asset from the registry.
+    """
+    return load_registry().get(asset_id)
+
+
+def score_matrix(model, X: np.ndarray) -> np.ndarray:
+    """
+    Score a 2-D batch of feature vectors with one vectorised ``score_samples`` call.
+    Returns anomaly scores where higher means more anomalous.
+    """
+    names = getattr(model, "feature_names_in_", None)
+    if names is not None:
+        # the model was fitted on a DataFrame; build one frame for the whole batch
+        X = pd.DataFrame(X, columns=names)
+    return -model.score_samples(X)
+
+
+def validate_batch(model, X: np.ndarray):
+    """
+    Check a whole batch in one pass.  Returns an error message or None if the batch is valid.
+    """
+    n_features = getattr(model, "n_features_in_", len(_feature_columns))
+    if X.ndim != 2:
+        return f"Expected a 2-D array of samples but received {X.ndim} dimension(s)"
+    if X.shape[0] == 0:
+        return "Received an empty batch"
+    if X.shape[1] != n_features:
+        return f"Expected {n_features} values per sample but received {X.shape[1]}"
+    if not np.isfinite(X).all():
+        bad = np.flatnonzero(~np.isfinite(X).all(axis=1))
+        return f"Non-finite values in samples {bad[:10].tolist()}"
+    return None
 
 
 class Sample(BaseModel):
     values: list  # expects a list of 6 numeric values matching the feature order
+    asset_id: str = "default"  # rolling-window state is kept separately for each asset
+
+
+class Batch(BaseModel):
+    values: list  # expects a list of samples, each a list of numeric feature values
 
 
 @app.on_event("startup")
 def startup_event():
-    load_model()
+    load_registry()
+    load_feature_store()
+
+
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    if route is not None and request.url.path != "/health":
+        telemetry.REQUEST_LATENCY.labels(endpoint=route.path).observe(time.perf_counter() - start)
+    return response
 
 
 @app.get("/health")
@@ -33,17 +124,95 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/registry/stats")
+def registry_stats():
+    """
+    Cache size and hit/miss/eviction/reload counters for sizing the model cache.
+    """
+    return load_registry().stats()
+
+
 @app.post("/score")
 def score(sample: Sample):
     """
-    Score a single sample.  The client must send a JSON body like:
-      {"values": [flow, Ps, Pd, vib, current, temp]}
-    Returns an anomaly score where higher means more anomalous.
+    Score one raw sample from a streaming asset.  The client must send a JSON body like:
+      {"asset_id": "K-101", "values": [flow, Ps, Pd, vib, current, temp]}
+    The sample updates that asset's rolling-window state, so the model sees the same features
+    that ``make_features`` produced in training, and is scored by that asset's model.  Returns an
+    anomaly score where higher means more anomalous, or a null score while the first window is
+    still filling.  Non-finite values are rejected with a 422 before they reach the window state.
     """
-    load_model()
+    try:
+        entry = load_model(sample.asset_id)
+    except (FileNotFoundError, ValueError) as exc:
+        telemetry.ERRORS.labels(endpoint="/score").inc()
+        return {"error": str(exc)}
     if len(sample.values) != len(_feature_columns):
+        telemetry.ERRORS.labels(endpoint="/score").inc()
         return {"error": f"Expected {len(_feature_columns)} values but received {len(sample.values)}"}
-    x = pd.DataFrame([sample.values], columns=_feature_columns)
-    # IsolationForest outputs negative scores; invert sign so that higher = more anomalous
-    score_value = float(-_model.score_samples(x)[0])
-    return {"anomaly_score": score_value}
\ No newline at end of file
+    try:
+        values = np.asarray(sample.values, dtype=np.float64)
+    except (TypeError, ValueError):
+        values = None
+    if values is None or not np.isfinite(values).all():
+        # one bad sample would corrupt the asset's rolling sums for the whole window
+        telemetry.ERRORS.labels(endpoint="/score").inc()
+        raise HTTPException(status_code=422, detail="Sample values must all be finite numbers")
+    telemetry.BATCH_SIZE.labels(endpoint="/score").observe(1)
+    store = load_feature_store()
+    with telemetry.timed(telemetry.FEATURE_BUILD_TIME):
+        features = store.update(sample.asset_id, values)
+    if features is None:
+        return {"anomaly_score": None, "samples_until_ready": store.samples_until_ready(sample.asset_id)}
+    # IsolationForest outputs negative scores; score_matrix inverts sign so that higher = more anomalous
+    with telemetry.timed(telemetry.INFERENCE_TIME, endpoint="/score"):
+        score_value = float(score_matrix(entry.model, features[np.newaxis, :])[0])
+    response = {"anomaly_score": score_value}
+    if entry.threshold is not None:
+        response["alarm"] = score_value > entry.threshold
+        if response["alarm"]:
+            telemetry.ALARMS.labels(endpoint="/score").inc()
+    return response
+
+
+@app.post("/score_batch")
+async def score_batch(request: Request, asset_id: str = DEFAULT_ASSET):
+    """
+    Score N feature vectors for one asset in one call (``/score_batch?asset_id=K-101``).
+    Two payloads are accepted:
+      - JSON (``application/json``): {"values": [[...], [...], ...]}
+      - NumPy (``application/octet-stream``): a 2-D float array serialised with ``np.save``
+    Returns per-sample anomaly scores and alarm flags against the asset's training threshold.
+    """
+    try:
+        entry = load_model(asset_id)
+    except (FileNotFoundError, ValueError) as exc:
+        telemetry.ERRORS.labels(endpoint="/score_batch").inc()
+        return {"error": str(exc)}
+    body = await request.body()
+    content_type = request.headers.get("content-type", "")
+    try:
+        if content_type.startswith("application/octet-stream"):
+            X = np.load(io.BytesIO(body), allow_pickle=False)
+        else:
+            batch = Batch.model_validate_json(body)
+            X = np.asarray(batch.values, dtype=np.float64)
+        X = np.asarray(X, dtype=np.float64)
+    except Exception as exc:
+        telemetry.ERRORS.labels(endpoint="/score_batch").inc()
+        return {"error": f"Could not parse batch payload: {exc}"}
+
+    error = validate_batch(entry.model, X)
+    if error is not None:
+        telemetry.ERRORS.labels(endpoint="/score_batch").inc()
+        return {"error": error}
+
+    telemetry.BATCH_SIZE.labels(endpoint="/score_batch").observe(len(X))
+    with telemetry.timed(telemetry.INFERENCE_TIME, endpoint="/score_batch"):
+        scores = score_matrix(entry.model, X)
+    response = {"anomaly_scores": scores.tolist(), "threshold": entry.threshold}
+    if entry.threshold is not None:
+        alarms = scores > entry.threshold
+        telemetry.ALARMS.labels(endpoint="/score_batch").inc(int(alarms.sum()))
+        response["alarms"] = alarms.tolist()
+    return response
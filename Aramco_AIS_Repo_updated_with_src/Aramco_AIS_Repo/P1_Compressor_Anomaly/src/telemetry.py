@@ -0,0 +1,39 @@
+"""
+In-process Prometheus instrumentation for the scoring service's hot path.
+
+``serve.py`` mounts ``prometheus_client``'s ASGI app at ``/metrics`` so Prometheus scrapes these
+directly from each service process; the model-quality gauges stay in ``metrics_exporter.py``.
+"""
+import time
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Histogram
+
+# Latency buckets from 100 us to 2.5 s: single-sample scoring sits at the bottom, large batches at the top
+_LATENCY_BUCKETS = (1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+REQUEST_LATENCY = Histogram(
+    "scoring_request_latency_seconds", "End-to-end request latency", ["endpoint"], buckets=_LATENCY_BUCKETS
+)
+BATCH_SIZE = Histogram(
+    "scoring_batch_size", "Samples per scoring request", ["endpoint"],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000),
+)
+FEATURE_BUILD_TIME = Histogram(
+    "scoring_feature_build_seconds", "Time spent updating streaming features", buckets=_LATENCY_BUCKETS
+)
+INFERENCE_TIME = Histogram(
+    "scoring_inference_seconds", "Time spent in model scoring", ["endpoint"], buckets=_LATENCY_BUCKETS
+)
+ALARMS = Counter("scoring_alarms_total", "Samples scored above the alarm threshold", ["endpoint"])
+ERRORS = Counter("scoring_errors_total", "Requests rejected with an error response", ["endpoint"])
+
+
+@contextmanager
+def timed(histogram, **labels):
+    """Observe the wall time of the enclosed block on ``histogram``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        (histogram.labels(**labels) if labels else histogram).observe(time.perf_counter() - start)
@@ -1,6 +1,7 @@
 import argparse
 import json
 import os
+import sys
 
 import numpy as np
 import pandas as pd
@@ -9,41 +10,22 @@ import yaml
 from sklearn.ensemble import IsolationForest
 from sklearn.metrics import roc_auc_score, average_precision_score
 
+# shared synthetic data generators live at the portfolio root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from common.synthetic import compressor_series  # noqa: E402
+
+from chunked import sample_history
+from flat_forest import FlatForest
+from sweep import run_sweep
+from registry import DEFAULT_ASSET, FLAT_MODEL_FILE, JOBLIB_MODEL_FILE, METRICS_FILE, asset_dirs
+
 
 def simulate_compressor_data(n_samples: int = 1440, n_anomalies: int = 30, seed: int = 42):
     """
     Create a simple synthetic compressor dataset with correlated signals and injected anomalies.
+    Generation is vectorised in ``common.synthetic``; use ``iter_chunks`` there for fleet-scale data.
     """
-    rng = np.random.default_rng(seed)
-    t = np.arange(n_samples)
-
-    # base signals with mild seasonality
-    flow = 100 + 10 * np.sin(2 * np.pi * t / 1440) + rng.normal(0, 1, n_samples)
-    ps = 2.5 - 0.002 * (flow - 100) + rng.normal(0, 0.05, n_samples)
-    pd = 6.0 + 0.010 * (flow - 100) + rng.normal(0, 0.08, n_samples)
-    vib = 1.5 + 0.005 * (flow - 100) + rng.normal(0, 0.05, n_samples)
-    current = 200 + 0.8 * (flow - 100) + rng.normal(0, 1, n_samples)
-    temp = 45 + 0.03 * (current - 200)
-
-    df = pd.DataFrame({
-        "flow": flow,
-        "Ps": ps,
-        "Pd": pd,
-        "vib": vib,
-        "current": current,
-        "temp": temp
-    })
-
-    labels = np.zeros(n_samples, dtype=int)
-
-    # inject simple anomalies (vibration spikes)
-    for _ in range(n_anomalies):
-        idx = rng.integers(60, n_samples - 60)
-        width = rng.integers(10, 30)
-        df.loc[idx:idx + width, "vib"] += rng.normal(0.5, 0.1, width + 1)
-        labels[idx:idx + width] = 1
-
-    return df, labels
+    return compressor_series(n_samples, n_anomalies=n_anomalies, seed=seed)
 
 
 def make_features(df: pd.DataFrame, window: int) -> pd.DataFrame:
@@ -63,15 +45,122 @@ def make_features(df: pd.DataFrame, window: int) -> pd.DataFrame:
     return X
 
 
+def atomic_dump(obj, path: str, dump=joblib.dump):
+    """
+    Write an artifact to a temporary file and rename it into place, so a serving process
+    watching ``path`` never loads a partially written model.
+    """
+    tmp_path = f"{path}.tmp"
+    dump(obj, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def save_artifacts(clf: IsolationForest, metrics: dict, asset_id: str = DEFAULT_ASSET):
+    """
+    Persist metrics, the joblib model and the flat node arrays for an asset.  Metrics go first:
+    the serving registry reloads an asset (model and threshold together) when the model file
+    changes.
+    """
+    model_dir, artifact_dir = asset_dirs(asset_id)
+    os.makedirs(artifact_dir, exist_ok=True)
+    with open(os.path.join(artifact_dir, METRICS_FILE), "w") as f:
+        json.dump(metrics, f, indent=2)
+
+    os.makedirs(model_dir, exist_ok=True)
+    atomic_dump(clf, os.path.join(model_dir, JOBLIB_MODEL_FILE))
+    # Flat node arrays for the NumPy-only scorer used by serve.py
+    atomic_dump(FlatForest.from_isolation_forest(clf), os.path.join(model_dir, FLAT_MODEL_FILE),
+                dump=lambda model, path: model.save(path))
+
+
+def evaluate_scores(test_scores: np.ndarray, y_test: np.ndarray, threshold: float) -> dict:
+    """
+    AUROC, average precision and false alarms per hour of ``test_scores`` against labels,
+    alarming above ``threshold``.  AUROC/AP are None when the test slice has no anomalies.
+    """
+    metrics = {}
+    if y_test.sum() > 0 and (y_test == 0).any():
+        metrics["auroc"] = roc_auc_score(y_test, test_scores)
+        metrics["average_precision"] = average_precision_score(y_test, test_scores)
+    else:
+        metrics["auroc"] = None
+        metrics["average_precision"] = None
+
+    # False alarms per hour
+    neg_mask = (y_test == 0)
+    false_positives = int(((test_scores > threshold) & neg_mask).sum())
+    neg_minutes = max(int(neg_mask.sum()), 1)
+    metrics["false_alarms_per_hour"] = false_positives / (neg_minutes / 60.0)
+    return metrics
+
+
+def train_from_history(cfg: dict, history_path: str) -> tuple:
+    """
+    Out-of-core training: stream a CSV/Parquet history in chunks, compute float32 features per
+    chunk and fit on a uniform subsample of at most ``train.max_rows`` normal rows.  The alarm
+    threshold is the ``alarm_quantile`` of the subsample's scores.  When the history has a
+    ``label`` column, the last ``test_split_ratio`` of it (at most ``train.max_test_rows`` rows)
+    is held out and scored as in the in-memory path.
+    """
+    columns = ["flow", "Ps", "Pd", "vib", "current", "temp"]
+    X_fit, n_rows, X_test, y_test = sample_history(
+        history_path,
+        columns,
+        window=cfg["data"]["window_size"],
+        chunk_size=cfg["data"].get("chunk_size", 100_000),
+        max_rows=cfg["train"].get("max_rows", 200_000),
+        seed=cfg["data"]["seed"],
+        test_ratio=cfg["train"]["test_split_ratio"],
+        max_test_rows=cfg["train"].get("max_test_rows", 200_000),
+    )
+    clf = IsolationForest(
+        n_estimators=cfg["model"]["params"]["n_estimators"],
+        contamination=cfg["model"]["params"]["contamination"],
+        random_state=cfg["data"]["seed"]
+    )
+    clf.fit(X_fit)
+    threshold = float(np.quantile(-clf.score_samples(X_fit), cfg["train"]["alarm_quantile"]))
+    if y_test is not None and len(y_test):
+        metrics = evaluate_scores(-clf.score_samples(X_test), y_test, threshold)
+    else:
+        metrics = {"auroc": None, "average_precision": None, "false_alarms_per_hour": None}
+    metrics.update({
+        "threshold": threshold,
+        "rows_seen": n_rows,
+        "rows_fitted": len(X_fit),
+        "rows_tested": len(X_test) if y_test is not None else 0,
+    })
+    return clf, metrics
+
+
 def main():
     parser = argparse.ArgumentParser(description="Train an IsolationForest on compressor data.")
     parser.add_argument("--config", type=str, default="configs/config.yaml", help="Path to configuration YAML.")
+    parser.add_argument(
+        "--asset-id", type=str, default=DEFAULT_ASSET,
+        help="Compressor train to write the model for; non-default assets go to models/<asset-id>/.",
+    )
+    parser.add_argument(
+        "--history", type=str, default=None,
+        help="CSV or Parquet history to train on out-of-core instead of simulated data.",
+    )
+    parser.add_argument(
+        "--sweep", action="store_true",
+        help="Evaluate the sweep grid from the config in parallel and write a ranked leaderboard.",
+    )
     args = parser.parse_args()
 
     # Load configuration
     with open(args.config, "r") as f:
         cfg = yaml.safe_load(f)
 
+    if args.history:
+        clf, metrics = train_from_history(cfg, args.history)
+        save_artifacts(clf, metrics, args.asset_id)
+        print("Training complete. Metrics:")
+        print(json.dumps(metrics, indent=2))
+        return
+
     # Generate or load data
     df, labels = simulate_compressor_data(seed=cfg["data"]["seed"])
     window = cfg["data"]["window_size"]
@@ -83,6 +172,23 @@ def main():
     X_train, X_test = X.iloc[:split], X.iloc[split:]
     y_train, y_test = y[:split], y[split:]
 
+    if args.sweep:
+        sweep_cfg = cfg["sweep"]
+        board = run_sweep(
+            X.to_numpy(), y, split,
+            grid=sweep_cfg["grid"],
+            quantiles=sweep_cfg.get("alarm_quantiles", [cfg["train"]["alarm_quantile"]]),
+            seed=cfg["data"]["seed"],
+            processes=sweep_cfg.get("processes"),
+            max_false_alarms_per_hour=sweep_cfg.get("max_false_alarms_per_hour"),
+        )
+        _, artifact_dir = asset_dirs(args.asset_id)
+        os.makedirs(artifact_dir, exist_ok=True)
+        board.to_csv(os.path.join(artifact_dir, "sweep_leaderboard.csv"), index=False)
+        print(f"Sweep complete: {len(board)} candidates. Top 5:")
+        print(board.head(5).to_string(index=False))
+        return
+
     # Fit IsolationForest on normal operating periods
     clf = IsolationForest(
         n_estimators=cfg["model"]["params"]["n_estimators"],
@@ -97,28 +203,10 @@ def main():
     threshold = float(np.quantile(train_scores, cfg["train"]["alarm_quantile"]))
 
     # Evaluate metrics
-    metrics = {}
-    if y_test.sum() > 0:
-        metrics["auroc"] = roc_auc_score(y_test, test_scores)
-        metrics["average_precision"] = average_precision_score(y_test, test_scores)
-    else:
-        metrics["auroc"] = None
-        metrics["average_precision"] = None
-
-    # False alarms per hour
-    neg_mask = (y_test == 0)
-    false_positives = int(((test_scores > threshold) & neg_mask).sum())
-    neg_minutes = max(int(neg_mask.sum()), 1)
-    metrics["false_alarms_per_hour"] = false_positives / (neg_minutes / 60.0)
+    metrics = evaluate_scores(test_scores, y_test, threshold)
     metrics["threshold"] = threshold
 
-    # Persist artifacts
-    os.makedirs("artifacts", exist_ok=True)
-    with open("artifacts/metrics.json", "w") as f:
-        json.dump(metrics, f, indent=2)
-
-    os.makedirs("models", exist_ok=True)
-    joblib.dump(clf, "models/isolation_forest.joblib")
+    save_artifacts(clf, metrics, args.asset_id)
 
     print("Training complete. Metrics:")
     print(json.dumps(metrics, indent=2))
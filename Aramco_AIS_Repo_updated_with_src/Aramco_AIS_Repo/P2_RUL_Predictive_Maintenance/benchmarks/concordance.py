@@ -0,0 +1,94 @@
+"""
+Equivalence check and benchmark of the merge-count C-index against lifelines.
+
+Checks ``evaluation.concordance_index`` against ``lifelines.utils.concordance_index`` on
+censored data with tied times and tied scores, then times both at several sizes, and times a
+bootstrap CI computed with vectorised replicates against a lifelines loop.
+
+Run from the project directory:
+  python benchmarks/concordance.py
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from lifelines.utils import concordance_index as lifelines_cindex
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+from evaluation import bootstrap_concordance, concordance_index  # noqa: E402
+
+
+def survival_sample(n: int, rng: np.random.Generator, ties: bool):
+    risk = rng.normal(size=n)
+    durations = rng.exponential(np.exp(-risk))
+    scores = -risk + rng.normal(scale=0.5, size=n)
+    if ties:
+        durations, scores = np.round(durations, 1), np.round(scores, 1)
+    events = rng.random(n) < 0.7
+    return durations, scores, events
+
+
+def timed(fn, repeats: int):
+    best, value = float("inf"), None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        value = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="C-index equivalence and speed versus lifelines.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--n-boot", type=int, default=200)
+    parser.add_argument("--boot-size", type=int, default=2_000)
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    for ties in (False, True):
+        for n in (2, 10, 100, 1000):
+            for _ in range(20):
+                d, s, e = survival_sample(n, rng, ties)
+                if e.sum() == 0:
+                    continue
+                try:
+                    expected = lifelines_cindex(d, s, e)
+                except ZeroDivisionError:
+                    continue
+                got = concordance_index(d, s, e)
+                assert abs(got - expected) < 1e-12, f"n={n} ties={ties}: {got} != {expected}"
+    print("equivalence with lifelines: OK")
+
+    print(f"{'n':>8} {'lifelines (ms)':>15} {'merge (ms)':>11} {'speedup':>8}")
+    for n in args.sizes:
+        d, s, e = survival_sample(n, rng, ties=True)
+        t_ll, c_ll = timed(lambda: lifelines_cindex(d, s, e), args.repeats)
+        t_mc, c_mc = timed(lambda: concordance_index(d, s, e), args.repeats)
+        assert abs(c_ll - c_mc) < 1e-12
+        print(f"{n:>8} {t_ll * 1e3:>15.1f} {t_mc * 1e3:>11.1f} {t_ll / t_mc:>7.1f}x")
+
+    d, s, e = survival_sample(args.boot_size, rng, ties=True)
+    boot_rng = np.random.default_rng(1)
+
+    def lifelines_bootstrap():
+        values = []
+        for _ in range(args.n_boot):
+            idx = boot_rng.integers(0, len(d), len(d))
+            values.append(lifelines_cindex(d[idx], s[idx], e[idx]))
+        return np.quantile(values, [0.025, 0.975])
+
+    t_ll, band_ll = timed(lifelines_bootstrap, 1)
+    t_mc, stats = timed(lambda: bootstrap_concordance(d, s, e, n_boot=args.n_boot, processes=args.processes), 1)
+    print(
+        f"bootstrap {args.n_boot} x n={args.boot_size}: lifelines {t_ll:.2f} s "
+        f"[{band_ll[0]:.3f}, {band_ll[1]:.3f}], vectorised {t_mc:.2f} s "
+        f"[{stats['ci_low']:.3f}, {stats['ci_high']:.3f}], {t_ll / t_mc:.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
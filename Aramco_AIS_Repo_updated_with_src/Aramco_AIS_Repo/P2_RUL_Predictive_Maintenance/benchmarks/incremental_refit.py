@@ -0,0 +1,59 @@
+"""
+Warm-start versus cold refit of the Cox model as a day's records are added to a large history.
+
+For each history size a model is fitted on the history, a batch of new records is appended, and
+the model is refitted both from scratch on the unsorted data and warm-started from the previous
+coefficients on the merged sorted snapshot.  Reports both times, the speedup, how far the
+coefficients moved with the new data, and how closely the two refits agree.
+
+Run from the project directory:
+  python benchmarks/incremental_refit.py --sizes 100000 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from lifelines import CoxPHFitter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+from incremental import coefficient_drift, merge_sorted, sort_records, warm_refit  # noqa: E402
+from train import COVARIATES, simulate_rul_dataset  # noqa: E402
+
+
+def timed(fn):
+    start = time.perf_counter()
+    value = fn()
+    return time.perf_counter() - start, value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm-start versus cold Cox refit.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--new-fraction", type=float, default=0.01, help="Size of the appended batch relative to the history.")
+    args = parser.parse_args()
+    columns = COVARIATES + ["duration", "event"]
+
+    print(f"{'rows':>9} {'cold (s)':>9} {'merge (s)':>10} {'warm (s)':>9} {'speedup':>8} {'max drift':>10} {'warm-cold':>10}")
+    for n in args.sizes:
+        history = simulate_rul_dataset(n_samples=n, seed=1)[columns]
+        new = simulate_rul_dataset(n_samples=max(1, int(n * args.new_fraction)), seed=2)[columns]
+        previous = CoxPHFitter().fit(history, duration_col="duration", event_col="event")
+        snapshot = sort_records(history)
+
+        t_cold, cold = timed(lambda: CoxPHFitter().fit(
+            pd.concat([history, new], ignore_index=True), duration_col="duration", event_col="event"))
+        t_merge, merged = timed(lambda: merge_sorted(snapshot, new))
+        t_warm, warm = timed(lambda: warm_refit(merged, COVARIATES, previous))
+        t_total = t_merge + t_warm
+
+        drift = max(abs(v) for v in coefficient_drift(previous, warm).values())
+        agreement = float(np.abs(warm.params_ - cold.params_).max())
+        print(f"{n:>9} {t_cold:>9.2f} {t_merge:>10.3f} {t_warm:>9.2f} {t_cold / t_total:>7.1f}x "
+              f"{drift:>10.2e} {agreement:>10.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Equivalence check and latency benchmark for the lookup-table RUL scorer and /predict.
+
+Compares ``SurvivalTable`` with the pickled CoxPHFitter (partial hazard, survival curves and
+median RUL, also conditional on age), then times lifelines, the table and the FastAPI endpoint for a single unit and for
+a 10k-unit batch.
+
+Run from the project directory after training:
+  python src/train.py && python benchmarks/rul_service.py
+"""
+import argparse
+import os
+import pickle
+import sys
+import time
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+import serve  # noqa: E402
+from train import simulate_rul_dataset  # noqa: E402
+
+MODEL_PATH = os.path.join("models", "coxph_model.pkl")
+
+
+def best_time(fn, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lookup-table RUL scorer equivalence and latency.")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10_000])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--rtol", type=float, default=1e-9)
+    args = parser.parse_args()
+
+    with open(MODEL_PATH, "rb") as f:
+        cph = pickle.load(f)
+    table = serve.load_table()
+    names = list(table.feature_names)
+
+    df = simulate_rul_dataset(n_samples=max(args.batch_sizes), seed=7)[names]
+    X = df.to_numpy()
+    sample = df.iloc[:500]
+    np.testing.assert_allclose(table.partial_hazard(sample.to_numpy()), cph.predict_partial_hazard(sample), rtol=args.rtol)
+    expected_sf = cph.predict_survival_function(sample, times=table.grid).to_numpy().T
+    np.testing.assert_allclose(table.survival_function(sample.to_numpy()), expected_sf, rtol=args.rtol, atol=1e-12)
+    np.testing.assert_allclose(table.percentile(sample.to_numpy(), 0.5), np.atleast_1d(cph.predict_median(sample)), rtol=args.rtol)
+    ages = np.linspace(0.0, 0.5 * table.timeline[-1], len(sample))
+    np.testing.assert_allclose(table.percentile(sample.to_numpy(), 0.5, conditional_after=ages),
+                               np.atleast_1d(cph.predict_percentile(sample, 0.5, conditional_after=ages)), rtol=args.rtol)
+    print(f"equivalence with lifelines ({len(sample)} units): OK")
+
+    client = TestClient(serve.app)
+    print(f"{'units':>6} {'lifelines (ms)':>15} {'table (ms)':>11} {'/predict (ms)':>14} {'speedup':>8}")
+    for n in args.batch_sizes:
+        rows, frame = X[:n], df.iloc[:n]
+        payload = {"values": rows.tolist(), "percentiles": [0.5, 0.1], "survival_curve": True}
+
+        def lifelines_predict():
+            cph.predict_partial_hazard(frame)
+            cph.predict_survival_function(frame, times=table.grid)
+            cph.predict_percentile(frame, 0.5)
+            cph.predict_percentile(frame, 0.1)
+
+        def table_predict():
+            table.partial_hazard(rows)
+            table.survival_function(rows)
+            table.percentile(rows, 0.5)
+            table.percentile(rows, 0.1)
+
+        t_ll = best_time(lifelines_predict, args.repeats)
+        t_table = best_time(table_predict, args.repeats)
+        t_api = best_time(lambda: client.post("/predict", json=payload), args.repeats)
+        print(f"{n:>6} {t_ll * 1e3:>15.2f} {t_table * 1e3:>11.3f} {t_api * 1e3:>14.2f} {t_ll / t_table:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Fast concordance evaluation for censored survival data.
+
+Harrell's C-index is computed with the same pair rules as ``lifelines.utils.concordance_index``,
+but as a vectorised merge-sort dominance count: each level of the merge compares the right half
+of every block with the sorted left half through one ``searchsorted`` call, giving
+O(n log^2 n) work with no Python loop over subjects.  Bootstrap replicates are stacked as extra
+rows and evaluated together, in batches that can be spread over a process pool.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Item types in the merged sequence at one exit time: events are queried before they enter the
+# pool (tied event times are not comparable), censored subjects are queried after (a unit
+# censored at t outlives one that failed at t).
+_EVENT_QUERY, _POOL_INSERT, _CENSORED_QUERY, _UNUSED = 0, 1, 2, 3
+
+
+def _dense_rank(x: np.ndarray) -> Tuple[np.ndarray, int]:
+    uniq, inverse = np.unique(x, return_inverse=True)
+    return inverse.astype(np.int64), len(uniq)
+
+
+def _concordance_counts(
+    time_rank: np.ndarray, score_rank: np.ndarray, n_scores: int, events: np.ndarray, idx: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (correct, tied, pairs) for each row of the resample index matrix ``idx`` (shape (B, n)).
+
+    Every subject gets two slots in a time-ordered sequence: a query slot and, for observed
+    events, a pool slot.  A query's admissible pairs are the pool entries before it; correct
+    pairs are those with a lower predicted score.
+    """
+    n_rep, n = idx.shape
+    t = time_rank[idx]
+    s = score_rank[idx]
+    e = events[idx]
+
+    kind = np.concatenate([np.where(e, _EVENT_QUERY, _CENSORED_QUERY), np.where(e, _POOL_INSERT, _UNUSED)], axis=1)
+    order = np.argsort(np.concatenate([t, t], axis=1) * 4 + kind, axis=1, kind="stable")
+    kind = np.take_along_axis(kind, order, axis=1)
+    value = np.take_along_axis(np.concatenate([s, s], axis=1), order, axis=1)
+    is_pool = kind == _POOL_INSERT
+    is_query = (kind == _EVENT_QUERY) | (kind == _CENSORED_QUERY)
+
+    pool_before = np.cumsum(is_pool, axis=1) - is_pool
+    pairs = (pool_before * is_query).sum(axis=1)
+
+    # Compact pool and query items into flat arrays of (replicate, position, score rank)
+    pool_rep, pool_pos = np.nonzero(is_pool)
+    query_rep, query_pos = np.nonzero(is_query)
+    pool_val, query_val = value[is_pool], value[is_query]
+
+    correct = np.zeros(n_rep, dtype=np.int64)
+    tied = np.zeros(n_rep, dtype=np.int64)
+    stride = n_scores + 1
+    level_bits = int(2 * n - 1).bit_length()
+    for level in range(level_bits):
+        # pool items in the left half of each 2**(level+1) block against queries in the right half
+        left = ((pool_pos >> level) & 1) == 0
+        right = ((query_pos >> level) & 1) == 1
+        n_blocks = ((2 * n - 1) >> (level + 1)) + 1
+        pool_block = pool_rep[left] * n_blocks + (pool_pos[left] >> (level + 1))
+        pool_keys = np.sort(pool_block * stride + pool_val[left])
+        counts = np.bincount(pool_block, minlength=n_rep * n_blocks)
+        start = np.cumsum(counts) - counts  # offset of each block's run in pool_keys
+        q_block = query_rep[right] * n_blocks + (query_pos[right] >> (level + 1))
+        q_keys = q_block * stride + query_val[right]
+        # sorted needles make searchsorted walk pool_keys mostly forward
+        order = np.argsort(q_keys)
+        sorted_keys = q_keys[order]
+        below = np.searchsorted(pool_keys, sorted_keys, side="left")
+        at_or_below = np.searchsorted(pool_keys, sorted_keys, side="right")
+        q_rep = query_rep[right][order]
+        correct += np.bincount(q_rep, weights=below - start[q_block[order]], minlength=n_rep).astype(np.int64)
+        tied += np.bincount(q_rep, weights=at_or_below - below, minlength=n_rep).astype(np.int64)
+    return correct, tied, pairs
+
+
+def _prepare(durations, scores, events):
+    durations = np.asarray(durations, dtype=float).ravel()
+    scores = np.asarray(scores, dtype=float).ravel()
+    events = np.ones(len(durations), dtype=bool) if events is None else np.asarray(events).ravel().astype(bool)
+    if not (len(durations) == len(scores) == len(events)):
+        raise ValueError("durations, scores and events must have the same length")
+    time_rank, _ = _dense_rank(durations)
+    score_rank, n_scores = _dense_rank(scores)
+    return time_rank, score_rank, n_scores, events
+
+
+def _ratio(correct, tied, pairs):
+    pairs = np.asarray(pairs, dtype=float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(pairs > 0, (correct + 0.5 * tied) / pairs, np.nan)
+
+
+def concordance_index(durations, scores, events=None) -> float:
+    """
+    Harrell's C-index.  ``scores`` follow lifelines' convention: higher means longer predicted
+    survival (pass ``-partial_hazard`` for a Cox model).
+    """
+    time_rank, score_rank, n_scores, events = _prepare(durations, scores, events)
+    if not events.any():
+        raise ZeroDivisionError("No admissable pairs in the dataset.")
+    idx = np.arange(len(time_rank))[np.newaxis, :]
+    correct, tied, pairs = _concordance_counts(time_rank, score_rank, n_scores, events, idx)
+    if pairs[0] == 0:
+        raise ZeroDivisionError("No admissable pairs in the dataset.")
+    return float(_ratio(correct, tied, pairs)[0])
+
+
+def _bootstrap_batch(args) -> np.ndarray:
+    time_rank, score_rank, n_scores, events, seed, n_rep = args
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(time_rank), size=(n_rep, len(time_rank)))
+    return _ratio(*_concordance_counts(time_rank, score_rank, n_scores, events, idx))
+
+
+def bootstrap_concordance(
+    durations,
+    scores,
+    events=None,
+    n_boot: int = 1000,
+    alpha: float = 0.05,
+    seed: int = 0,
+    batch_rows: int = 2_000_000,
+    processes: Optional[int] = None,
+) -> dict:
+    """
+    Point estimate and percentile bootstrap confidence interval of the C-index.
+
+    Replicates are evaluated ``batch_rows // n`` at a time as rows of one vectorised call; with
+    ``processes`` > 1 batches run in a process pool.
+    """
+    time_rank, score_rank, n_scores, events = _prepare(durations, scores, events)
+    n = len(time_rank)
+    per_batch = max(1, min(n_boot, batch_rows // max(n, 1)))
+    sizes = [per_batch] * (n_boot // per_batch) + ([n_boot % per_batch] if n_boot % per_batch else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(time_rank, score_rank, n_scores, events, s, size) for s, size in zip(seeds, sizes)]
+    if processes and processes > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            replicates = np.concatenate(list(pool.map(_bootstrap_batch, jobs)))
+    else:
+        replicates = np.concatenate([_bootstrap_batch(job) for job in jobs])
+    replicates = replicates[~np.isnan(replicates)]
+    point = _ratio(*_concordance_counts(time_rank, score_rank, n_scores, events, np.arange(n)[np.newaxis, :]))[0]
+    low, high = np.quantile(replicates, [alpha / 2, 1 - alpha / 2]) if len(replicates) else (np.nan, np.nan)
+    return {
+        "concordance_index": float(point),
+        "ci_low": float(low),
+        "ci_high": float(high),
+        "std": float(replicates.std(ddof=1)) if len(replicates) > 1 else float("nan"),
+        "n_boot": int(len(replicates)),
+        "n": int(n),
+    }
+
+
+def concordance_by_group(
+    durations, scores, events, groups: Sequence, n_boot: int = 1000, alpha: float = 0.05, seed: int = 0,
+    processes: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    C-index with bootstrap CI for every segment (e.g. equipment class), plus an ``all`` row.
+    Pairs are only formed within a segment.
+    """
+    durations, scores = np.asarray(durations, dtype=float), np.asarray(scores, dtype=float)
+    events, groups = np.asarray(events).astype(bool), np.asarray(groups)
+    rows = [{"group": "all", **bootstrap_concordance(durations, scores, events, n_boot, alpha, seed, processes=processes)}]
+    for k, g in enumerate(pd.unique(groups)):
+        mask = groups == g
+        if not events[mask].any():
+            continue
+        stats = bootstrap_concordance(durations[mask], scores[mask], events[mask], n_boot, alpha, seed + k + 1,
+                                      processes=processes)
+        rows.append({"group": g, **stats})
+    return pd.DataFrame(rows)
@@ -0,0 +1,108 @@
+from fastapi import FastAPI
+from pydantic import BaseModel
+from typing import List, Optional
+import numpy as np
+import os
+import yaml
+
+try:
+    from .survival_table import SurvivalTable
+except ImportError:  # run as a script from src/
+    from survival_table import SurvivalTable
+
+app = FastAPI(title="RUL Prediction Service")
+_config = None
+_table = None
+TABLE_PATH = os.path.join("models", "coxph_table.joblib")
+
+
+def load_config() -> dict:
+    global _config
+    if _config is None:
+        with open(os.environ.get("CONFIG_PATH", os.path.join("configs", "config.yaml"))) as f:
+            _config = yaml.safe_load(f)
+    return _config
+
+
+def load_table() -> SurvivalTable:
+    """
+    Load the precomputed baseline tables written by ``train.py``.  lifelines is not imported:
+    every prediction is a dot product, an exp and a lookup into these arrays.
+    """
+    global _table
+    if _table is None:
+        if not os.path.exists(TABLE_PATH):
+            raise FileNotFoundError(f"No survival table at {TABLE_PATH}. Please run train.py first.")
+        _table = SurvivalTable.load(TABLE_PATH, mmap_mode="r")
+    return _table
+
+
+def _finite_or_none(values: np.ndarray) -> list:
+    # units whose survival never reaches the percentile get inf, which JSON cannot carry
+    return [float(v) if np.isfinite(v) else None for v in values]
+
+
+class Units(BaseModel):
+    values: list  # one row per unit, columns in the order returned by /health
+    ages: Optional[list] = None  # current age of each unit; RUL is then conditioned on survival to it
+    percentiles: List[float] = [0.5]  # survival levels to report remaining life for (0.5 = median)
+    survival_curve: bool = False  # include survival probabilities on the fixed time grid
+
+
+@app.on_event("startup")
+def startup_event():
+    try:
+        load_table()
+    except FileNotFoundError:
+        pass  # reported per request until train.py has run
+
+
+@app.get("/health")
+def health():
+    try:
+        table = load_table()
+    except FileNotFoundError as exc:
+        return {"status": "no model", "error": str(exc)}
+    return {"status": "ok", "features": list(table.feature_names), "grid_points": len(table.grid)}
+
+
+@app.post("/predict")
+def predict(units: Units):
+    """
+    Predict for a batch of units.  The client must send a JSON body like:
+      {"values": [[vibration, temperature], ...], "ages": [120, ...], "percentiles": [0.5, 0.1]}
+    Returns the partial hazard of each unit, remaining life at each requested survival level
+    (null where survival never drops that low within the training horizon) and, if asked, the
+    survival curve on the fixed grid.
+    """
+    try:
+        table = load_table()
+    except FileNotFoundError as exc:
+        return {"error": str(exc)}
+    X = np.asarray(units.values, dtype=np.float64)
+    if X.ndim != 2 or X.shape[0] == 0 or X.shape[1] != table.n_features_in_:
+        return {"error": f"Expected a non-empty list of rows with {table.n_features_in_} values each"}
+    if not np.isfinite(X).all():
+        return {"error": "Non-finite feature values"}
+    ages = None
+    if units.ages is not None:
+        ages = np.asarray(units.ages, dtype=np.float64)
+        if ages.shape != (X.shape[0],):
+            return {"error": f"Expected {X.shape[0]} ages but received {ages.size}"}
+    if any(not 0.0 < p < 1.0 for p in units.percentiles):
+        return {"error": "Percentiles must be strictly between 0 and 1"}
+
+    response = {
+        "partial_hazard": table.partial_hazard(X).tolist(),
+        "rul": {str(p): _finite_or_none(table.percentile(X, p, conditional_after=ages)) for p in units.percentiles},
+    }
+    if units.survival_curve:
+        response["times"] = table.grid.tolist()
+        response["survival"] = table.survival_function(X).tolist()
+    return response
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host="0.0.0.0", port=8000)
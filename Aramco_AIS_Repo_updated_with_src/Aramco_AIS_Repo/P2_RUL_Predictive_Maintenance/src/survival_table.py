@@ -0,0 +1,132 @@
+"""
+Lookup-table Cox model for serving.
+
+``export_coxph`` reduces a fitted ``lifelines.CoxPHFitter`` to its coefficients, centring means and
+baseline cumulative hazard, and ``SurvivalTable`` answers batched queries from those arrays with
+NumPy alone: the partial hazard is ``exp((X - mean) @ coef)`` and the survival curve is
+``exp(-H0(t) * partial_hazard)``.  ``H0`` between training durations is linearly interpolated and
+held at its end values outside them, as ``lifelines.utils.interpolate_at_times`` does, so curves
+match ``predict_survival_function``.  Percentile RUL needs no curve at all: ``S(t) <= p`` exactly
+when ``H0(t) >= -log(p) / partial_hazard``, so it is one ``searchsorted`` on the monotone baseline.
+"""
+from typing import Optional, Sequence
+
+import joblib
+import numpy as np
+
+
+def export_coxph(cph, grid_size: int = 200) -> dict:
+    """
+    Flatten a fitted CoxPHFitter into a dict of arrays.
+
+    ``timeline``/``cumulative_hazard`` hold the baseline at each unique training duration and are
+    used for percentiles and arbitrary times; ``grid``/``grid_hazard`` interpolate it on
+    ``grid_size`` evenly spaced times for the survival curves returned to clients.
+    """
+    if getattr(cph, "strata", None):
+        raise ValueError("Stratified Cox models are not supported by the lookup-table scorer")
+    names = list(cph.params_.index)
+    baseline = cph.baseline_cumulative_hazard_
+    timeline = baseline.index.to_numpy(dtype=np.float64)
+    cumulative_hazard = baseline.iloc[:, 0].to_numpy(dtype=np.float64)
+    grid = np.linspace(0.0, timeline[-1], grid_size)
+    return {
+        "coef": cph.params_.to_numpy(dtype=np.float64),
+        "mean": cph._norm_mean[names].to_numpy(dtype=np.float64),
+        "feature_names": np.asarray(names, dtype=str),
+        "timeline": timeline,
+        "cumulative_hazard": cumulative_hazard,
+        "grid": grid,
+        "grid_hazard": np.interp(grid, timeline, cumulative_hazard),
+    }
+
+
+def _first_reached(timeline: np.ndarray, values: np.ndarray, level: np.ndarray) -> np.ndarray:
+    """
+    Earliest time at which the linear interpolation of the non-decreasing (timeline, values)
+    reaches ``level``: -inf where ``values[0]`` already does (held constant before the first
+    point), inf where it never does.
+    """
+    k = np.searchsorted(values, level, side="left")
+    lo, hi = np.maximum(k - 1, 0), np.minimum(k, len(values) - 1)
+    rise = values[hi] - values[lo]
+    frac = np.divide(level - values[lo], rise, out=np.zeros_like(rise), where=rise > 0)
+    out = timeline[lo] + frac * (timeline[hi] - timeline[lo])
+    return np.where(k == 0, -np.inf, np.where(k == len(values), np.inf, out))
+
+
+class SurvivalTable:
+    """
+    Cox model scorer over precomputed baseline tables.  Methods take a 2-D array with one row
+    per unit and columns in ``feature_names`` order.
+    """
+
+    def __init__(self, arrays: dict):
+        self.arrays = arrays
+        self.coef = arrays["coef"]
+        self.mean = arrays["mean"]
+        self.timeline = arrays["timeline"]
+        self.cumulative_hazard = arrays["cumulative_hazard"]
+        self.grid = arrays["grid"]
+        self.grid_hazard = arrays["grid_hazard"]
+        self.feature_names: Sequence[str] = [str(n) for n in arrays["feature_names"]]
+        self.n_features_in_ = len(self.coef)
+        # center once so scoring is a single matrix-vector product
+        self._offset = float(self.mean @ self.coef)
+
+    @classmethod
+    def from_coxph(cls, cph, grid_size: int = 200) -> "SurvivalTable":
+        return cls(export_coxph(cph, grid_size))
+
+    def save(self, path: str):
+        joblib.dump(self.arrays, path)
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: Optional[str] = None) -> "SurvivalTable":
+        """
+        Load tables saved by ``save``.  With ``mmap_mode="r"`` worker processes share the pages.
+        """
+        return cls(joblib.load(path, mmap_mode=mmap_mode))
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(a, "nbytes", 0) for a in self.arrays.values())
+
+    def log_partial_hazard(self, X: np.ndarray) -> np.ndarray:
+        return np.asarray(X, dtype=np.float64) @ self.coef - self._offset
+
+    def partial_hazard(self, X: np.ndarray) -> np.ndarray:
+        return np.exp(self.log_partial_hazard(X))
+
+    def survival_function(self, X: np.ndarray, times: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Survival probabilities, shape (units, times).  ``times`` defaults to the fixed grid, which
+        needs no lookup; other times are interpolated on the baseline.
+        """
+        if times is None:
+            hazard = self.grid_hazard
+        else:
+            hazard = np.interp(np.asarray(times, dtype=np.float64), self.timeline, self.cumulative_hazard)
+        return np.exp(-np.outer(self.partial_hazard(X), hazard))
+
+    def percentile(self, X: np.ndarray, p: float = 0.5, conditional_after: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Remaining life until survival first drops to ``p`` (``p=0.5`` is the median), matching
+        ``CoxPHFitter.predict_percentile``.  ``conditional_after`` gives each unit's current age:
+        the curve is then conditioned on survival to that age and, as in lifelines, read at the
+        training durations measured from it.  Units whose survival never reaches ``p`` within the
+        training timeline get ``inf``.
+        """
+        if not 0.0 < p < 1.0:
+            raise ValueError("p must be strictly between 0 and 1")
+        ph = self.partial_hazard(X)
+        target = -np.log(p) / ph
+        if conditional_after is None:
+            idx = np.searchsorted(self.cumulative_hazard, target, side="left")
+        else:
+            # first training duration t with H0(age + t) - H0(age) >= target, H0 interpolated
+            age = np.broadcast_to(np.asarray(conditional_after, dtype=np.float64), ph.shape)
+            level = target + np.interp(age, self.timeline, self.cumulative_hazard)
+            idx = np.searchsorted(self.timeline, _first_reached(self.timeline, self.cumulative_hazard, level) - age)
+        reached = idx < len(self.timeline)
+        return np.where(reached, self.timeline[np.minimum(idx, len(self.timeline) - 1)], np.inf)
@@ -1,12 +1,25 @@
 import argparse
 import json
 import os
+import pickle
+import time
+from typing import Optional
 
 import numpy as np
 import pandas as pd
 import yaml
 from lifelines import CoxPHFitter
-from lifelines.utils import concordance_index
+
+from evaluation import concordance_by_group, concordance_index
+from incremental import RecordStore, coefficient_drift, warm_refit
+from survival_table import SurvivalTable
+
+COVARIATES = ["vibration", "temperature"]
+MODEL_PATH = os.path.join("models", "coxph_model.pkl")
+TABLE_PATH = os.path.join("models", "coxph_table.joblib")
+EQUIPMENT_CLASSES = ["pump", "compressor", "turbine"]
+# Relative hazard of each equipment class, not given to the model
+CLASS_HAZARD = {"pump": 1.0, "compressor": 0.7, "turbine": 1.4}
 
 
 def simulate_rul_dataset(n_samples: int = 300, seed: int = 42):
@@ -18,7 +31,11 @@ def simulate_rul_dataset(n_samples: int = 300, seed: int = 42):
     rng = np.random.default_rng(seed)
     vibration = rng.normal(0.5, 0.1, n_samples)
     temperature = rng.normal(50, 5, n_samples)
-    baseline_hazard = 0.01 + 0.05 * vibration + 0.03 * (temperature - 50)
+    equipment_class = rng.choice(EQUIPMENT_CLASSES, n_samples)
+    # Log-linear hazard keeps the rate positive for every sample (a linear one goes negative
+    # for cool units) and matches the proportional-hazards form of the model
+    class_hazard = pd.Series(equipment_class).map(CLASS_HAZARD).to_numpy()
+    baseline_hazard = 0.01 * class_hazard * np.exp(5 * (vibration - 0.5) + 0.06 * (temperature - 50))
     # Exponential survival times
     time_to_event = rng.exponential(1 / baseline_hazard)
     # Random censoring: 30 % censored
@@ -29,19 +46,90 @@ def simulate_rul_dataset(n_samples: int = 300, seed: int = 42):
     df = pd.DataFrame({
         "vibration": vibration,
         "temperature": temperature,
+        "equipment_class": equipment_class,
         "duration": observed_time,
         "event": event_observed
     })
     return df
 
 
+def save_model(cph: CoxPHFitter, cfg: dict):
+    """
+    Persist the fitted model and the baseline hazard tables for the lifelines-free scorer used
+    by serve.py.
+    """
+    os.makedirs("models", exist_ok=True)
+    # lifelines fitters have no save(); pickling is the documented way to persist them
+    with open(MODEL_PATH, "wb") as f:
+        pickle.dump(cph, f)
+    SurvivalTable.from_coxph(cph, cfg.get("serving", {}).get("grid_size", 200)).save(TABLE_PATH)
+
+
+def read_records(path: str) -> pd.DataFrame:
+    if path.endswith((".parquet", ".pq")):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def train_incremental(cfg: dict, records_path: Optional[str] = None) -> tuple:
+    """
+    Append new duration/event records to the persisted store and refit on everything stored,
+    warm-starting from the saved model.  An empty store is seeded with the simulated dataset.
+    """
+    store = RecordStore(cfg["data"].get("store_dir", os.path.join("data", "rul_store")))
+    if records_path:
+        new = read_records(records_path)
+    elif not os.path.exists(store.snapshot_path):
+        new = simulate_rul_dataset()
+    else:
+        new = None
+    records = store.append(new) if new is not None else store.load()
+
+    previous = None
+    if os.path.exists(MODEL_PATH):
+        with open(MODEL_PATH, "rb") as f:
+            previous = pickle.load(f)
+    start = time.perf_counter()
+    cph = warm_refit(records, COVARIATES, previous)
+    fit_seconds = time.perf_counter() - start
+
+    metrics = {
+        "rows": len(records),
+        "rows_appended": 0 if new is None else len(new),
+        "warm_start": previous is not None,
+        "fit_seconds": fit_seconds,
+        "coefficients": {name: float(value) for name, value in cph.params_.items()},
+        "coefficient_drift": coefficient_drift(previous, cph) if previous is not None else None,
+        "train_concordance_index": concordance_index(
+            records["duration"], -cph.predict_partial_hazard(records), records["event"]
+        ),
+    }
+    return cph, metrics
+
+
 def main():
     parser = argparse.ArgumentParser(description="Train a Cox proportional hazards model on synthetic RUL data.")
     parser.add_argument("--config", type=str, default="configs/config.yaml", help="Path to configuration YAML.")
+    parser.add_argument(
+        "--incremental", nargs="?", const="", default=None, metavar="RECORDS",
+        help="Append a CSV/Parquet file of new records (if given) to the record store and warm-start "
+             "a refit on the whole store from models/coxph_model.pkl.",
+    )
     args = parser.parse_args()
 
     with open(args.config, "r") as f:
         cfg = yaml.safe_load(f)
+    eval_cfg = cfg.get("evaluation", {})
+
+    if args.incremental is not None:
+        cph, metrics = train_incremental(cfg, args.incremental or None)
+        os.makedirs("artifacts", exist_ok=True)
+        with open("artifacts/refit_metrics.json", "w") as f:
+            json.dump(metrics, f, indent=2)
+        save_model(cph, cfg)
+        print("Incremental refit complete. Metrics:")
+        print(json.dumps(metrics, indent=2))
+        return
 
     df = simulate_rul_dataset()
 
@@ -52,23 +140,40 @@ def main():
 
     # Fit Cox proportional hazards model
     cph = CoxPHFitter()
-    cph.fit(train_df, duration_col="duration", event_col="event", show_progress=False)
-
-    # Evaluate concordance on test set
-    ci = concordance_index(test_df["duration"], -cph.predict_partial_hazard(test_df), test_df["event"])
-
-    metrics = {"concordance_index": ci}
+    cph.fit(train_df[COVARIATES + ["duration", "event"]], duration_col="duration", event_col="event", show_progress=False)
+
+    # Evaluate concordance on test set, overall and per equipment class, with bootstrap CIs
+    report = concordance_by_group(
+        test_df["duration"],
+        -cph.predict_partial_hazard(test_df),
+        test_df["event"],
+        test_df["equipment_class"],
+        n_boot=eval_cfg.get("n_boot", 1000),
+        alpha=eval_cfg.get("alpha", 0.05),
+        seed=eval_cfg.get("seed", 0),
+    )
+    overall = report.iloc[0]
+
+    metrics = {
+        "concordance_index": float(overall["concordance_index"]),
+        "concordance_ci_low": float(overall["ci_low"]),
+        "concordance_ci_high": float(overall["ci_high"]),
+        "concordance_by_class": {
+            row["group"]: {k: row[k] for k in ("concordance_index", "ci_low", "ci_high", "n")}
+            for _, row in report.iloc[1:].iterrows()
+        },
+    }
 
     os.makedirs("artifacts", exist_ok=True)
     with open("artifacts/metrics.json", "w") as f:
-        json.dump(metrics, f, indent=2)
+        json.dump(metrics, f, indent=2, default=float)
+    report.to_csv("artifacts/concordance_report.csv", index=False)
 
-    os.makedirs("models", exist_ok=True)
-    cph.save("models/coxph_model.pkl")
+    save_model(cph, cfg)
 
     print("Training complete. Metrics:")
-    print(json.dumps(metrics, indent=2))
+    print(json.dumps(metrics, indent=2, default=float))
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,103 @@
+"""
+Closed-loop load test of /ask at several concurrency levels.
+
+Each of ``c`` simulated clients sends a question, waits for the answer and sends the next one,
+for ``--requests`` questions in total per level.  Questions are drawn (seeded) from the index
+vocabulary and are unique by default, so the answer cache does not hide scoring cost; pass
+``--repeat-fraction`` to mix in repeated handover questions.  Reports QPS and p50/p95/p99 latency.
+
+With no ``--url`` the service is started in-process on a free port, using the current index:
+  python src/build_index.py && python benchmarks/ask_load.py --concurrency 1 8 32 64
+Compare batching on and off by toggling ``batching.enabled`` in the config.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import threading
+import time
+
+import httpx
+import numpy as np
+import uvicorn
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+import app as service  # noqa: E402
+from index import RetrievalIndex  # noqa: E402
+
+
+def start_server() -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(service.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(200):
+        try:
+            if httpx.get(f"{url}/health").status_code == 200:
+                return url
+        except httpx.TransportError:
+            time.sleep(0.05)
+    raise RuntimeError("Service did not start")
+
+
+def make_questions(n: int, repeat_fraction: float, seed: int) -> list:
+    terms = RetrievalIndex.load(service.index_dir()).terms
+    rng = np.random.default_rng(seed)
+    questions = [
+        "what is the procedure for " + " ".join(rng.choice(terms, size=rng.integers(2, 6)))
+        for _ in range(n)
+    ]
+    n_repeat = int(n * repeat_fraction)
+    if n_repeat:
+        handover = questions[:10]
+        for i in rng.choice(n, size=n_repeat, replace=False):
+            questions[i] = handover[i % len(handover)]
+    return questions
+
+
+async def run_level(url: str, questions: list, concurrency: int, top_k: int) -> tuple:
+    latencies = []
+    cursor = iter(questions)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60.0) as client:
+
+        async def worker():
+            for question in cursor:
+                start = time.perf_counter()
+                response = await client.post("/ask", json={"question": question, "top_k": top_k})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return np.asarray(latencies), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test /ask at several concurrency levels.")
+    parser.add_argument("--url", type=str, default=None, help="Running service to test; default starts one in-process.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--requests", type=int, default=2000, help="Questions per concurrency level.")
+    parser.add_argument("--repeat-fraction", type=float, default=0.0)
+    parser.add_argument("--top-k", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    url = args.url or start_server()
+    print(f"{'clients':>7} {'QPS':>8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9}")
+    for level, concurrency in enumerate(args.concurrency):
+        # fresh questions per level so earlier levels do not warm the cache for later ones
+        questions = make_questions(args.requests, args.repeat_fraction, args.seed + level)
+        latencies, elapsed = asyncio.run(run_level(url, questions, concurrency, args.top_k))
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1e3
+        print(f"{concurrency:>7} {len(latencies) / elapsed:>8.1f} {p50:>9.2f} {p95:>9.2f} {p99:>9.2f}")
+    if args.url is None:
+        print(httpx.get(f"{url}/batching/stats").json())
+
+
+if __name__ == "__main__":
+    main()
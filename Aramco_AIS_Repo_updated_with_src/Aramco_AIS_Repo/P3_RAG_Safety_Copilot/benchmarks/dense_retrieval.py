@@ -0,0 +1,87 @@
+"""
+Recall and latency of the IVF dense index against exact search.
+
+Passage embeddings are synthetic unit vectors drawn around seeded topic centres (so they cluster
+the way LSA embeddings of a procedure corpus do); queries are perturbed copies of held-out
+passages.  For each corpus size the IVF lists are built once with ``build_ivf`` and the int8
+index is probed at several ``nprobe`` values.  The reference is exact float32 search over every
+passage, so recall@k also counts the error from int8 quantisation.
+
+  python benchmarks/dense_retrieval.py --passages 100000 1000000 --nprobe 1 4 8 16 32
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+from dense import DenseIndex, build_ivf, normalize_rows, quantize  # noqa: E402
+from index import top_k_pairs  # noqa: E402
+
+
+def make_vectors(n: int, dim: int, topics: int, noise: float, rng) -> np.ndarray:
+    centres = normalize_rows(rng.standard_normal((topics, dim)))
+    vectors = centres[rng.integers(topics, size=n)] + noise * rng.standard_normal((n, dim)) / np.sqrt(dim)
+    return normalize_rows(vectors).astype(np.float32)
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int) -> list:
+    ids = np.arange(len(vectors))
+    return [{i for i, _ in top_k_pairs(ids, vectors @ q, k)} for q in queries]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark IVF dense retrieval against exact search.")
+    parser.add_argument("--passages", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--topics", type=int, default=2000)
+    parser.add_argument("--noise", type=float, default=1.0, help="Spread of passages around their topic.")
+    parser.add_argument("--nlist", type=int, default=None, help="IVF lists; default sqrt(passages).")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'passages':>9} {'nlist':>6} {'nprobe':>6} {'recall@' + str(args.k):>10} {'scored':>9} "
+          f"{'p50 (ms)':>9} {'p99 (ms)':>9}")
+    for n in args.passages:
+        vectors = make_vectors(n, args.dim, args.topics, args.noise, rng)
+        held_out = vectors[rng.choice(n, size=args.queries, replace=False)]
+        queries = normalize_rows(held_out + 0.3 * rng.standard_normal(held_out.shape) / np.sqrt(args.dim))
+        truth = exact_top_k(vectors, queries, args.k)
+
+        start = time.perf_counter()
+        centroids, indptr, ids = build_ivf(vectors, args.nlist or int(np.sqrt(n)), args.seed)
+        build_seconds = time.perf_counter() - start
+        codes, scale = quantize(vectors)
+        dense = DenseIndex({
+            "dense_components": np.eye(args.dim, dtype=np.float32),  # queries are already embedded
+            "dense_codes": codes, "dense_scale": scale,
+            "ivf_centroids": centroids, "ivf_indptr": indptr, "ivf_ids": ids,
+        })
+
+        rows = [(dense.nlist, "exact", dense.search_exact)]
+        rows += [(dense.nlist, nprobe, lambda q, p=nprobe: dense.search(q, p)) for nprobe in args.nprobe]
+        for nlist, nprobe, search in rows:
+            latencies, hits, scored = [], 0, 0
+            for q, expected in zip(queries, truth):
+                t0 = time.perf_counter()
+                found, sims = search(q)
+                top = top_k_pairs(found, sims, args.k)
+                latencies.append(time.perf_counter() - t0)
+                hits += len(expected & {i for i, _ in top})
+                scored += len(found)
+            p50, p99 = np.percentile(latencies, [50, 99]) * 1e3
+            recall = hits / (args.k * len(queries))
+            print(f"{n:>9} {nlist:>6} {nprobe:>6} {recall:>10.3f} {scored // len(queries):>9} "
+                  f"{p50:>9.2f} {p99:>9.2f}")
+        print(f"{'':>9} IVF build {build_seconds:.1f} s, int8 codes {codes.nbytes / 2**20:.0f} MiB "
+              f"(float32 {vectors.nbytes / 2**20:.0f} MiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Ingestion throughput in files/sec on a synthetic multi-format corpus.
+
+Writes ``--documents`` seeded procedure-like documents (a mix of .txt, .html and .docx) to a
+temporary corpus and streams them through ``ingest.iter_documents`` three times per worker
+count: a cold run (everything extracted), a warm run (nothing changed, served from the manifest)
+and a run after ``--touch-fraction`` of the files were rewritten (only those are re-extracted).
+
+  python benchmarks/ingest.py --documents 5000 --workers 1 4 8 [--redact]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from xml.sax.saxutils import escape
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+from ingest import iter_documents  # noqa: E402
+from redact import Redactor  # noqa: E402
+
+WORDS = (
+    "isolate compressor valve pressure discharge suction seal gas purge lockout permit operator "
+    "verify trip interlock vibration bearing lube oil temperature alarm shutdown restart procedure "
+    "flare header drain vent blind spade torque inspection hazard"
+).split()
+
+
+def paragraph(rng: random.Random, sentences: int) -> str:
+    return " ".join(
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize() + "."
+        for _ in range(sentences)
+    )
+
+
+def write_docx(path: str, paragraphs: list):
+    body = "".join(f"<w:p><w:r><w:t>{escape(p)}</w:t></w:r></w:p>" for p in paragraphs)
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f"<w:body>{body}</w:body></w:document>"
+    )
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("word/document.xml", document)
+
+
+def write_document(corpus_dir: str, i: int, rng: random.Random):
+    paragraphs = [paragraph(rng, rng.randint(3, 8)) for _ in range(rng.randint(5, 40))]
+    kind = i % 3
+    if kind == 0:
+        with open(os.path.join(corpus_dir, f"doc{i:06d}.txt"), "w", encoding="utf-8") as f:
+            f.write("\n\n".join(paragraphs))
+    elif kind == 1:
+        body = "".join(f"<p>{escape(p)}</p>" for p in paragraphs)
+        with open(os.path.join(corpus_dir, f"doc{i:06d}.html"), "w", encoding="utf-8") as f:
+            f.write(f"<html><head><style>p {{}}</style></head><body><h1>SOP {i}</h1>{body}</body></html>")
+    else:
+        write_docx(os.path.join(corpus_dir, f"doc{i:06d}.docx"), paragraphs)
+
+
+def run(corpus_dir: str, index_dir: str, workers: int, redactor=None) -> tuple:
+    stats: dict = {}
+    start = time.perf_counter()
+    n, chars = 0, 0
+    for _, _, text, _ in iter_documents(corpus_dir, index_dir, workers, stats, redactor):
+        n += 1
+        chars += len(text)
+    return n, chars, time.perf_counter() - start, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark corpus ingestion throughput.")
+    parser.add_argument("--documents", type=int, default=5000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--touch-fraction", type=float, default=0.05)
+    parser.add_argument("--redact", action="store_true", help="Apply the PII patterns during extraction.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    redactor = Redactor() if args.redact else None
+
+    root = tempfile.mkdtemp(prefix="ingest-bench-")
+    try:
+        corpus_dir = os.path.join(root, "corpus")
+        os.makedirs(corpus_dir)
+        rng = random.Random(args.seed)
+        for i in range(args.documents):
+            write_document(corpus_dir, i, rng)
+        size = sum(entry.stat().st_size for entry in os.scandir(corpus_dir))
+        print(f"{args.documents} documents, {size / 2**20:.1f} MiB (txt/html/docx)")
+        print(f"{'workers':>7} {'run':>8} {'files':>6} {'extracted':>9} {'seconds':>8} {'files/s':>9} {'MiB/s':>7}")
+        for workers in args.workers:
+            index_dir = os.path.join(root, f"index-{workers}")
+            touched = rng.sample(range(args.documents), int(args.documents * args.touch_fraction))
+            for label in ("cold", "warm", "touched"):
+                if label == "touched":
+                    for i in touched:
+                        write_document(corpus_dir, i, rng)
+                n, _, seconds, stats = run(corpus_dir, index_dir, workers, redactor)
+                print(f"{workers:>7} {label:>8} {n:>6} {stats['extracted']:>9} {seconds:>8.2f} "
+                      f"{n / seconds:>9.0f} {size / 2**20 / seconds:>7.1f}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
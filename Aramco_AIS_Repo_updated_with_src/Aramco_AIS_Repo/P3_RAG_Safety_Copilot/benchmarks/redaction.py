@@ -0,0 +1,109 @@
+"""
+Correctness and throughput of index-time PII redaction.
+
+First the labelled cases in ``redaction_cases.jsonl`` are checked: each lists the (label, text)
+spans that must be redacted, and anything else found counts as a false positive.  Then
+``--megabytes`` of seeded procedure-like text with PII sprinkled in is redacted with the
+patterns only, the dictionary only and both, for several dictionary sizes, and the throughput
+is reported in MB/s.  Exits non-zero if any case fails.
+
+  python benchmarks/redaction.py --megabytes 20 --terms 100 10000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+from redact import Redactor  # noqa: E402
+
+CASES = os.path.join(os.path.dirname(__file__), "redaction_cases.jsonl")
+# Dictionary the labelled cases are written against
+CASE_TERMS = [
+    ("FACILITY", "Ras Tanura"), ("FACILITY", "Ras Tanura Refinery"), ("FACILITY", "Abqaiq"), ("PERSON", "Jane Example"),
+]
+WORDS = (
+    "isolate compressor valve pressure discharge suction seal gas purge lockout permit operator "
+    "verify trip interlock vibration bearing lube oil temperature alarm shutdown restart procedure"
+).split()
+
+
+def check_cases(path: str) -> int:
+    redactor = Redactor(CASE_TERMS)
+    failures = tp = fp = fn = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            case = json.loads(line)
+            text = case["text"]
+            expected = {tuple(pair) for pair in case["expected"]}
+            found = {(label, text[start:end]) for start, end, label in redactor.find(text)}
+            tp += len(found & expected)
+            fp += len(found - expected)
+            fn += len(expected - found)
+            if found != expected:
+                failures += 1
+                print(f"FAIL {text!r}\n  missed {sorted(expected - found)}\n  extra  {sorted(found - expected)}")
+    precision = tp / (tp + fp) if tp + fp else 1.0
+    recall = tp / (tp + fn) if tp + fn else 1.0
+    print(f"cases: precision {precision:.3f}, recall {recall:.3f}, {failures} failing")
+    return failures
+
+
+def make_text(megabytes: float, terms: list, rng: random.Random) -> str:
+    pii = [
+        lambda: f"{rng.choice('abcdefgh')}.{rng.choice(WORDS)}@example.com",
+        lambda: f"+966 13 {rng.randint(100, 999)} {rng.randint(1000, 9999)}",
+        lambda: f"10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+        lambda: f"badge no. {rng.randint(10000, 999999)}",
+        lambda: rng.choice(terms)[1] if terms else "operator",
+    ]
+    parts, size = [], 0
+    while size < megabytes * 1e6:
+        sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(10, 25)))
+        if rng.random() < 0.2:
+            sentence += " " + rng.choice(pii)()
+        sentence = sentence.capitalize() + ".\n"
+        parts.append(sentence)
+        size += len(sentence)
+    return "".join(parts)
+
+
+def dictionary(n: int, rng: random.Random) -> list:
+    syllables = ["ab", "qa", "iq", "ras", "ta", "nu", "ra", "ju", "bail", "kha", "ra", "ni", "sha", "yb", "ah"]
+    return [
+        ("FACILITY", " ".join("".join(rng.choice(syllables) for _ in range(3)).capitalize() for _ in range(2)))
+        for _ in range(n)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and benchmark PII redaction.")
+    parser.add_argument("--megabytes", type=float, default=20.0)
+    parser.add_argument("--terms", type=int, nargs="+", default=[100, 10000], help="Dictionary sizes.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    failures = check_cases(CASES)
+    rng = random.Random(args.seed)
+    print(f"{'matchers':>18} {'terms':>6} {'MB':>6} {'spans':>8} {'seconds':>8} {'MB/s':>7}")
+    for n_terms in args.terms:
+        terms = dictionary(n_terms, rng)
+        text = make_text(args.megabytes, terms, rng)
+        mb = len(text.encode("utf-8")) / 1e6
+        for label, redactor in (
+            ("patterns", Redactor()),
+            ("dictionary", Redactor(terms, patterns=())),
+            ("patterns+dictionary", Redactor(terms)),
+        ):
+            start = time.perf_counter()
+            _, spans = redactor.redact(text)
+            seconds = time.perf_counter() - start
+            print(f"{label:>18} {n_terms if label != 'patterns' else 0:>6} {mb:>6.1f} {len(spans):>8} "
+                  f"{seconds:>8.2f} {mb / seconds:>7.1f}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Answer cache for the safety co-pilot.
+
+Answers are keyed on the normalised question, ``top_k`` and the index snapshot version, so any
+rebuild, live update or compaction changes the version and old answers stop matching without an
+explicit purge.  ``AnswerCache`` keeps entries in-process in an LRU bounded by count and age;
+``RedisAnswerCache`` stores them in Redis so every uvicorn worker shares the same hits; a live
+update's version carries a digest of the updates applied, so workers that indexed different
+changes never read each other's answers.
+"""
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+_SPACE = re.compile(r"\s+")
+_VERSION = re.compile(r"v(\d+)(?:\+(\d+)(?:\.[0-9a-f]+)?)?")
+
+
+def normalize_question(question: str) -> str:
+    """Case-fold, collapse whitespace and drop trailing punctuation."""
+    return _SPACE.sub(" ", question.casefold()).strip().rstrip("?.! ")
+
+
+def version_order(version: str) -> Optional[Tuple[int, int]]:
+    """
+    Sort key of a snapshot version ``v<base>[+<seq>.<digest>]``: later bases, then later live
+    updates on the same base, are newer.  None if ``version`` does not have that form.
+    """
+    match = _VERSION.fullmatch(version or "")
+    return (int(match.group(1)), int(match.group(2) or 0)) if match else None
+
+
+def cache_key(question: str, top_k: int, version: str) -> str:
+    return f"{version}|{top_k}|{normalize_question(question)}"
+
+
+class AnswerCache:
+    """
+    In-process LRU of answers with a per-entry time to live.  Entries from an older index version
+    are dropped as soon as a lookup arrives for a newer one.  Requests still carrying an older
+    version (in flight across a swap) miss and their answers are not stored, so they cannot wipe
+    the entries built under the new version.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._version: Optional[str] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale_writes = 0
+
+    def _check_version(self, version: str) -> bool:
+        """Adopt ``version`` if it is newer than the current one; False if it is stale."""
+        if version == self._version:
+            return True
+        new, current = version_order(version), version_order(self._version)
+        if new is not None and current is not None and new < current:
+            return False
+        if self._entries:
+            self.invalidations += 1
+        self._entries.clear()
+        self._version = version
+        return True
+
+    def get(self, question: str, top_k: int, version: str) -> Optional[dict]:
+        key = cache_key(question, top_k, version)
+        with self._lock:
+            if not self._check_version(version):
+                self.misses += 1
+                return None
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, question: str, top_k: int, version: str, answer: dict):
+        key = cache_key(question, top_k, version)
+        with self._lock:
+            if not self._check_version(version):
+                self.stale_writes += 1
+                return
+            self._entries[key] = (time.monotonic(), answer)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "memory",
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "version": self._version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "stale_writes": self.stale_writes,
+                "hit_rate": self.hits / lookups if lookups else None,
+            }
+
+
+class RedisAnswerCache:
+    """
+    Answers shared by all workers through Redis.  Keys carry the index version and expire after
+    ``ttl_seconds``; Redis' own ``maxmemory-policy allkeys-lru`` bounds the size.  Hit and miss
+    counters are kept in Redis too, so ``stats`` reports the fleet-wide hit rate.
+    """
+
+    def __init__(self, url: str = "redis://localhost:6379/0", ttl_seconds: float = 3600.0, prefix: str = "rag:answer:"):
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("The shared answer cache requires redis (pip install redis).") from exc
+        self.client = redis.Redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    def get(self, question: str, top_k: int, version: str) -> Optional[dict]:
+        raw = self.client.get(self.prefix + cache_key(question, top_k, version))
+        self.client.incr(self.prefix + ("stats:hits" if raw is not None else "stats:misses"))
+        return json.loads(raw) if raw is not None else None
+
+    def put(self, question: str, top_k: int, version: str, answer: dict):
+        key = self.prefix + cache_key(question, top_k, version)
+        self.client.set(key, json.dumps(answer), ex=max(1, int(self.ttl_seconds)))
+
+    def stats(self) -> dict:
+        hits, misses = (int(v or 0) for v in self.client.mget(self.prefix + "stats:hits", self.prefix + "stats:misses"))
+        lookups = hits + misses
+        return {
+            "backend": "redis",
+            "entries": sum(1 for _ in self.client.scan_iter(self.prefix + "*|*", count=1000)),
+            "ttl_seconds": self.ttl_seconds,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else None,
+        }
+
+
+def make_cache(cfg: dict):
+    """Build the cache described by the ``cache`` block of the config, or None if disabled."""
+    if not cfg.get("enabled", True):
+        return None
+    ttl = cfg.get("ttl_seconds", 3600)
+    if cfg.get("backend", "memory") == "redis":
+        return RedisAnswerCache(cfg.get("redis_url", "redis://localhost:6379/0"), ttl)
+    return AnswerCache(cfg.get("max_entries", 1024), ttl)
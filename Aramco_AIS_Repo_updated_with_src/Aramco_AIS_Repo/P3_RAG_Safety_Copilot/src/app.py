@@ -1,61 +1,167 @@
-from fastapi import FastAPI
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+import asyncio
+import logging
 import os
-import glob
-import pathlib
-import re
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
-import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import yaml
+
+try:
+    from .answer_cache import make_cache
+    from .batching import MicroBatcher
+    from .index import build_index
+    from .live_index import LiveIndex, Snapshot
+    from .redact import Redactor
+except ImportError:  # run as a script from src/
+    from answer_cache import make_cache
+    from batching import MicroBatcher
+    from index import build_index
+    from live_index import LiveIndex, Snapshot
+    from redact import Redactor
 
 
 app = FastAPI(title="RAG Safety Co-Pilot")
+logger = logging.getLogger("rag_copilot")
+
+PROJECT_DIR = os.path.join(os.path.dirname(__file__), "..")
+CORPUS_DIR = os.path.join(PROJECT_DIR, "docs", "corpus")
+_config = None
+_cache = None
+_batcher = None
+index: Optional[LiveIndex] = None
+
+
+def load_config() -> dict:
+    global _config
+    if _config is None:
+        with open(os.environ.get("CONFIG_PATH", os.path.join(PROJECT_DIR, "configs", "config.yaml"))) as f:
+            _config = yaml.safe_load(f)
+    return _config
 
-# Build corpus at startup
-CORPUS_DIR = os.path.join(os.path.dirname(__file__), "..", "docs", "corpus")
-documents: List[str] = []
-doc_names: List[str] = []
-vectorizer = TfidfVectorizer(stop_words="english")
-doc_matrix = None
+
+def load_cache():
+    """
+    Create the answer cache from the ``cache`` block of the config (None when disabled).  Keys
+    include the snapshot version, so index updates invalidate it without any explicit purge.
+    """
+    global _cache
+    if _cache is None:
+        _cache = make_cache(load_config().get("cache", {}))
+    return _cache
+
+
+def load_batcher() -> Optional[MicroBatcher]:
+    """
+    Create the micro-batching dispatcher for ``/ask`` from the ``batching`` block of the config
+    (None when disabled).
+    """
+    global _batcher
+    batch_cfg = load_config().get("batching", {})
+    if _batcher is None and batch_cfg.get("enabled", True):
+        _batcher = MicroBatcher(
+            retrieve_batch, batch_cfg.get("max_batch_size", 32), batch_cfg.get("max_wait_ms", 5.0)
+        )
+    return _batcher
+
+
+def index_dir() -> str:
+    return os.path.join(PROJECT_DIR, load_config().get("index", {}).get("path", "index"))
 
 
 def load_corpus():
-    global documents, doc_names, doc_matrix
-    documents = []
-    doc_names = []
-    for path in glob.glob(os.path.join(CORPUS_DIR, "*")):
-        if os.path.isfile(path):
-            with open(path, "r", encoding="utf-8", errors="ignore") as f:
-                content = f.read()
-            documents.append(content)
-            doc_names.append(os.path.basename(path))
-    if documents:
-        doc_matrix = vectorizer.fit_transform(documents)
-    else:
-        doc_matrix = None
+    """
+    Memory-map the index written by ``build_index.py`` and wrap it for live updates, ranking with
+    ``retrieval.method``.  If none has been built yet, it was written in an older format, or it
+    lacks the embeddings the method needs or the configured PII redaction, build one from
+    ``docs/corpus`` first so the service still starts.
+    """
+    global index
+    cfg = load_config()
+    index_cfg = cfg.get("index", {})
+    retrieval_cfg = cfg.get("retrieval", {})
+    # PII is redacted once, at ingestion; /ask quotes the stored, already redacted sentences
+    redactor = Redactor.from_config(cfg.get("guardrails", {}), PROJECT_DIR)
+    workers = cfg.get("ingest", {}).get("workers")
+    args = (
+        CORPUS_DIR, index_dir(), index_cfg.get("passage_sentences", 3), index_cfg.get("compact_after", 1000),
+        retrieval_cfg.get("method", "tfidf"), cfg.get("embeddings", {}), retrieval_cfg.get("hybrid_alpha", 0.5),
+        workers, redactor,
+    )
+    try:
+        index = LiveIndex(*args)
+    except (FileNotFoundError, ValueError):
+        # also rebuilds an index lacking the embeddings the method needs or the configured redaction
+        embeddings = cfg.get("embeddings", {}) if retrieval_cfg.get("method", "tfidf") != "tfidf" else None
+        build_index(CORPUS_DIR, index_dir(), args[2], embeddings, workers, redactor)
+        index = LiveIndex(*args)
 
 
-def retrieve(query: str, top_k: int = 2) -> List[Tuple[str, str]]:
+def retrieve(query: str, top_k: int = 2, snapshot: Optional[Snapshot] = None) -> List[Tuple[List[str], str]]:
     """
-    Return top_k (content, name) pairs for the query.
+    Return top_k (sentences, name) pairs for the best-matching passages.  Search and text come
+    from one snapshot, so a concurrent update cannot mix two revisions of the corpus.
     """
-    if not documents or doc_matrix is None:
+    snap = snapshot or (index.snapshot if index is not None else None)
+    if snap is None or snap.n_passages == 0:
         return []
-    q_vec = vectorizer.transform([query])
-    sims = cosine_similarity(q_vec, doc_matrix).flatten()
-    indices = np.argsort(sims)[::-1][:top_k]
-    return [(documents[i], doc_names[i]) for i in indices]
+    return [(snap.sentences(p), snap.document(p)) for p, _ in snap.search(query, top_k)]
+
+
+def retrieve_batch(requests: List[Tuple[str, int]]) -> List[Tuple[str, List[Tuple[List[str], str]]]]:
+    """
+    ``retrieve`` for a batch of (query, top_k) requests, scored together against one snapshot.
+    Returns (snapshot version, results) for each request.
+    """
+    snap = index.snapshot
+    if snap.n_passages == 0:
+        return [(snap.version, []) for _ in requests]
+    hits = snap.search_batch([query for query, _ in requests], max(k for _, k in requests))
+    return [
+        (snap.version, [(snap.sentences(p), snap.document(p)) for p, _ in found[:k]])
+        for (_, k), found in zip(requests, hits)
+    ]
+
+
+async def watch_corpus(poll_seconds: float):
+    """Index documents added, changed or removed in the corpus directory by other tools."""
+    while True:
+        await asyncio.sleep(poll_seconds)
+        try:
+            changes = await run_in_threadpool(index.sync)
+        except Exception:
+            logger.exception("Corpus sync failed")
+            continue
+        if changes:
+            logger.info("Applied %d corpus change(s); index version %s", changes, index.snapshot.version)
 
 
 class Question(BaseModel):
     question: str
+    top_k: int = Field(2, ge=1, le=20)  # passages to quote
+
+
+class Questions(BaseModel):
+    questions: List[str]
+    top_k: int = Field(2, ge=1, le=20)
+
+
+class Document(BaseModel):
+    name: str  # file name in docs/corpus, e.g. "SOP-K101-isolation.txt"
+    text: str
 
 
 @app.on_event("startup")
-def startup_event():
-    load_corpus()
+async def startup_event():
+    await run_in_threadpool(load_corpus)
+    load_cache()
+    batcher = load_batcher()
+    if batcher is not None:
+        batcher.start()
+    poll_seconds = load_config().get("index", {}).get("watch_interval_s", 0)
+    if poll_seconds:
+        asyncio.get_running_loop().create_task(watch_corpus(poll_seconds))
 
 
 @app.get("/health")
@@ -63,31 +169,129 @@ def health():
     return {"status": "ok"}
 
 
-@app.post("/ask")
-def ask(question: Question):
+@app.post("/index")
+def index_document(document: Document):
     """
-    Retrieve relevant snippets and return a simple answer with citations and a confirmation request.
+    Add or revise one document.  It is written to the corpus directory and searchable as soon as
+    this returns; queries already running finish on the previous snapshot.
     """
-    query = question.question.strip()
-    if not query:
-        return {"answer": "Please provide a non-empty question."}
+    try:
+        index.write_document(document.name, document.text)
+    except ValueError as exc:
+        return {"error": str(exc)}
+    return index.stats()
 
-    results = retrieve(query, top_k=2)
-    if not results:
-        return {"answer": "No documents found. Please populate the docs/corpus directory."}
 
-    # Compose a simple answer: return the first two sentences from each retrieved document
+@app.delete("/index/{name}")
+def delete_document(name: str):
+    try:
+        index.remove_document(name)
+    except ValueError as exc:
+        return {"error": str(exc)}
+    return index.stats()
+
+
+@app.post("/index/compact")
+def compact_index():
+    """Rebuild the base index from the corpus in the background."""
+    index.compact_in_background()
+    return index.stats()
+
+
+@app.get("/index/stats")
+def index_stats():
+    return index.stats()
+
+
+def compose_answer(results: List[Tuple[List[str], str]]) -> dict:
+    """Quote each retrieved passage from its pre-split sentences, cite sources and ask for confirmation."""
+    if not results:
+        return {"answer": "No passages in the corpus match this question. Please rephrase it or consult the control room."}
     snippets = []
     citations = []
-    for text, name in results:
-        # naive sentence splitting
-        sentences = re.split(r"(?<=[.!?])\s+", text)
-        snippet = " ".join(sentences[:2]).strip()
-        snippets.append(snippet)
-        citations.append(name)
+    for sentences, name in results:
+        snippets.append(" ".join(sentences).strip())
+        if name not in citations:
+            citations.append(name)
 
     answer = " ".join(snippets)
     answer += " [Sources: " + ", ".join(citations) + "]"
     answer += " — Please confirm this information with the control room before taking any action."
+    return {"answer": answer}
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Answer-cache size and hit/miss counters."""
+    cache = load_cache()
+    return cache.stats() if cache is not None else {"enabled": False}
+
+
+@app.get("/batching/stats")
+def batching_stats():
+    batcher = load_batcher()
+    return batcher.stats() if batcher is not None else {"enabled": False}
+
 
-    return {"answer": answer}
\ No newline at end of file
+@app.post("/ask")
+async def ask(question: Question):
+    """
+    Retrieve relevant snippets and return a simple answer with citations and a confirmation request.
+    Answers are cached per normalised question, ``top_k`` and index version; cache misses from
+    concurrent clients are scored together by the micro-batching dispatcher.
+    """
+    query = question.question.strip()
+    if not query:
+        return {"answer": "Please provide a non-empty question."}
+
+    snapshot = index.snapshot if index is not None else None
+    if snapshot is None or snapshot.n_passages == 0:
+        return {"answer": "No documents found. Please populate the docs/corpus directory."}
+    cache = load_cache()
+    if cache is not None:
+        cached = cache.get(query, question.top_k, snapshot.version)
+        if cached is not None:
+            return cached
+    batcher = load_batcher()
+    if batcher is not None:
+        version, results = await batcher.submit((query, question.top_k))
+    else:
+        [(version, results)] = await run_in_threadpool(retrieve_batch, [(query, question.top_k)])
+    response = compose_answer(results)
+    if cache is not None:
+        cache.put(query, question.top_k, version, response)
+    return response
+
+
+@app.post("/ask_batch")
+def ask_batch(questions: Questions):
+    """
+    Answer several questions in one request, e.g. ``{"questions": ["...", "..."], "top_k": 2}``.
+    Uncached questions are scored together as one sparse matrix-matrix product.  Requests with
+    more than ``batching.max_questions`` questions are rejected with 422.
+    """
+    max_questions = load_config().get("batching", {}).get("max_questions", 256)
+    if len(questions.questions) > max_questions:
+        raise HTTPException(422, f"At most {max_questions} questions per request")
+    snapshot = index.snapshot if index is not None else None
+    if snapshot is None or snapshot.n_passages == 0:
+        return {"answers": [{"answer": "No documents found. Please populate the docs/corpus directory."}
+                            for _ in questions.questions]}
+    cache = load_cache()
+    answers: List[Optional[dict]] = []
+    pending = []
+    for i, question in enumerate(questions.questions):
+        query = question.strip()
+        cached = cache.get(query, questions.top_k, snapshot.version) if cache is not None and query else None
+        if not query:
+            cached = {"answer": "Please provide a non-empty question."}
+        answers.append(cached)
+        if cached is None:
+            pending.append((i, query))
+    if pending:
+        scored = retrieve_batch([(query, questions.top_k) for _, query in pending])
+        for (i, query), (version, results) in zip(pending, scored):
+            answers[i] = compose_answer(results)
+            if cache is not None:
+                cache.put(query, questions.top_k, version, answers[i])
+    return {"answers": answers}
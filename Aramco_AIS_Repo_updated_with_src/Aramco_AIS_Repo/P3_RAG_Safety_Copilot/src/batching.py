@@ -0,0 +1,86 @@
+"""
+Micro-batching dispatcher for concurrent retrieval requests.
+
+Requests arriving within ``max_wait_ms`` of each other, up to ``max_batch_size``, are collected
+on the event loop and scored together by one call of a batch function in a worker thread, then
+each caller's future is resolved with its own result.  Under load this turns many small
+vectorise-and-score calls into one sparse matrix-matrix product; a lone request waits at most
+``max_wait_ms``.
+"""
+import asyncio
+import time
+from typing import Any, Callable, List, Optional, Sequence
+
+
+class MicroBatcher:
+    """
+    ``await submit(item)`` returns ``batch_fn([..., item, ...])[i]`` for the item's position ``i``.
+    ``batch_fn`` runs in the default executor so the event loop keeps accepting requests.
+    """
+
+    def __init__(
+        self, batch_fn: Callable[[Sequence[Any]], List[Any]], max_batch_size: int = 32, max_wait_ms: float = 5.0
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.items = 0
+
+    def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def submit(self, item: Any) -> Any:
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            items = [item for item, _ in batch]
+            try:
+                results = await loop.run_in_executor(None, self.batch_fn, items)
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():  # the caller may have disconnected
+                    future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else None,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+        }
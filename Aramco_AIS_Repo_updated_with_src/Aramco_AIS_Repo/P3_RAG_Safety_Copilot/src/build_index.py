@@ -0,0 +1,61 @@
+"""
+Offline index build for the safety co-pilot.
+
+Run from the project directory whenever the corpus changes:
+  python src/build_index.py [--config configs/config.yaml] [--workers N]
+Only documents whose contents changed since the last build are extracted again.
+Running services pick up the new version on their next restart.
+"""
+import argparse
+import json
+import os
+import time
+
+import yaml
+
+try:
+    from .index import build_index
+    from .redact import Redactor
+except ImportError:  # run as a script from src/
+    from index import build_index
+    from redact import Redactor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the retrieval index from docs/corpus.")
+    parser.add_argument("--config", type=str, default="configs/config.yaml", help="Path to configuration YAML.")
+    parser.add_argument("--corpus", type=str, default=None, help="Corpus directory (overrides the config).")
+    parser.add_argument("--workers", type=int, default=None, help="Extraction processes (overrides the config).")
+    args = parser.parse_args()
+
+    with open(args.config, "r") as f:
+        cfg = yaml.safe_load(f)
+    index_cfg = cfg.get("index", {})
+    corpus_dir = args.corpus or index_cfg.get("corpus_dir", os.path.join("docs", "corpus"))
+    # dense embeddings are only built for the retrieval methods that use them
+    embeddings = cfg.get("embeddings", {}) if cfg.get("retrieval", {}).get("method", "tfidf") != "tfidf" else None
+    workers = args.workers or cfg.get("ingest", {}).get("workers")
+    start = time.perf_counter()
+    redactor = Redactor.from_config(cfg.get("guardrails", {}))
+    version_dir = build_index(
+        corpus_dir, index_cfg.get("path", "index"), index_cfg.get("passage_sentences", 3), embeddings, workers,
+        redactor,
+    )
+    elapsed = time.perf_counter() - start
+
+    with open(os.path.join(version_dir, "manifest.json")) as f:
+        manifest = json.load(f)
+    print(f"Built index {manifest['version']}: {manifest['n_docs']} documents, "
+          f"{manifest['n_passages']} passages, {manifest['n_terms']} terms, {manifest['nnz']} postings -> {version_dir}")
+    ingest = manifest["ingest"]
+    print(f"Ingest: {ingest['extracted']} extracted, {ingest['unchanged']} unchanged, {ingest['failed']} skipped "
+          f"in {elapsed:.1f} s")
+    if manifest["redaction"]:
+        print(f"Redacted {manifest['redaction']['count']} PII spans ({', '.join(manifest['redaction']['labels'])})")
+    if "dense" in manifest:
+        dense = manifest["dense"]
+        print(f"Embeddings: {dense['method']} dim {dense['dim']} ({dense['quantize']}), {dense['nlist']} IVF lists")
+
+
+if __name__ == "__main__":
+    main()
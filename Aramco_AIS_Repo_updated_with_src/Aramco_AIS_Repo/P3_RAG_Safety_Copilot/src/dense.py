@@ -0,0 +1,132 @@
+"""
+Local dense retrieval for the safety co-pilot.
+
+Passage embeddings are latent semantic analysis (truncated SVD) of the TF-IDF passage matrix,
+computed offline with no network access.  They are stored as int8 codes with one float32 scale
+per passage (or as plain float32 rows with a unit scale) and searched through an inverted-file
+(IVF) index: k-means centroids partition the passages, and a query scores only the passages in
+its ``nprobe`` closest lists.  Queries are embedded by projecting their TF-IDF vector onto the stored SVD components, so serving needs
+NumPy only.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+
+DENSE_ARRAYS = ("dense_components", "dense_codes", "dense_scale", "ivf_centroids", "ivf_indptr", "ivf_ids")
+
+
+def normalize_rows(x: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    return x / np.where(norms > 0, norms, 1.0)
+
+
+def quantize(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row int8 quantisation: ``vectors ~= codes * scale[:, None]``."""
+    scale = np.abs(vectors).max(axis=1) / 127.0
+    scale = np.where(scale > 0, scale, 1.0).astype(np.float32)
+    codes = np.clip(np.rint(vectors / scale[:, np.newaxis]), -127, 127).astype(np.int8)
+    return codes, scale
+
+
+def build_ivf(vectors: np.ndarray, nlist: int, seed: int = 0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Partition unit vectors into ``nlist`` k-means lists.  Returns (centroids, indptr, ids):
+    list ``c`` holds passages ``ids[indptr[c]:indptr[c + 1]]``.
+    """
+    from sklearn.cluster import MiniBatchKMeans
+
+    nlist = max(1, min(nlist, len(vectors)))
+    km = MiniBatchKMeans(n_clusters=nlist, random_state=seed, batch_size=4096, n_init=3).fit(vectors)
+    centroids = normalize_rows(km.cluster_centers_).astype(np.float32)
+    assignment = np.argmax(vectors @ centroids.T, axis=1)  # cosine assignment, as used at query time
+    ids = np.argsort(assignment, kind="stable").astype(np.int64)
+    indptr = np.zeros(nlist + 1, dtype=np.int64)
+    np.cumsum(np.bincount(assignment, minlength=nlist), out=indptr[1:])
+    return centroids, indptr, ids
+
+
+def build_dense(
+    matrix, dim: int = 256, nlist: Optional[int] = None, quantize_int8: bool = True, seed: int = 0
+) -> dict:
+    """
+    LSA embeddings and IVF lists for a (passages x terms) TF-IDF matrix, as arrays for the index
+    directory.  ``nlist`` defaults to sqrt(passages).  Returns an empty dict when the corpus is
+    too small to embed.
+    """
+    from sklearn.decomposition import TruncatedSVD
+
+    n_passages, n_terms = matrix.shape
+    dim = min(dim, n_terms - 1, n_passages)
+    if dim < 1:
+        return {}
+    svd = TruncatedSVD(n_components=dim, random_state=seed).fit(matrix)
+    vectors = normalize_rows(svd.transform(matrix)).astype(np.float32)
+    if quantize_int8:
+        codes, scale = quantize(vectors)
+    else:
+        codes, scale = vectors, np.ones(len(vectors), dtype=np.float32)
+    nlist = nlist or int(np.sqrt(n_passages))
+    centroids, indptr, ids = build_ivf(vectors, nlist, seed)
+    return {
+        # (terms x dim): a query's TF-IDF weights times its rows is its embedding
+        "dense_components": np.ascontiguousarray(svd.components_.T, dtype=np.float32),
+        "dense_codes": codes,
+        "dense_scale": scale,
+        "ivf_centroids": centroids,
+        "ivf_indptr": indptr,
+        "ivf_ids": ids,
+    }
+
+
+class DenseIndex:
+    """
+    Passage embeddings (int8 codes times a per-row scale) behind an IVF coarse quantiser.  Arrays
+    may be memory-mapped; a probe reads only the codes of the passages in the probed lists.
+    """
+
+    def __init__(self, arrays: dict, nprobe: int = 8):
+        self.components = arrays["dense_components"]
+        self.codes = arrays["dense_codes"]
+        self.scale = arrays["dense_scale"]
+        self.centroids = arrays["ivf_centroids"]
+        self.ivf_indptr = arrays["ivf_indptr"]
+        self.ivf_ids = arrays["ivf_ids"]
+        self.nprobe = nprobe
+
+    @property
+    def dim(self) -> int:
+        return self.codes.shape[1]
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    def embed(self, cols: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        """Unit embedding of a TF-IDF query vector given as (columns, weights)."""
+        q = weights.astype(np.float32) @ self.components[cols] if len(cols) else np.zeros(self.dim, np.float32)
+        norm = np.linalg.norm(q)
+        return q / norm if norm > 0 else q
+
+    def score(self, q: np.ndarray, ids: np.ndarray) -> np.ndarray:
+        """Cosine similarity of ``q`` with the given passages, decoded from their codes."""
+        return (self.codes[ids].astype(np.float32) @ q) * self.scale[ids]
+
+    def candidates(self, q: np.ndarray, nprobe: Optional[int] = None) -> np.ndarray:
+        """Passages in the ``nprobe`` lists whose centroids are closest to ``q``."""
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        sims = self.centroids @ q
+        lists = np.argpartition(-sims, nprobe - 1)[:nprobe] if nprobe < self.nlist else np.arange(self.nlist)
+        starts, ends = self.ivf_indptr[lists], self.ivf_indptr[lists + 1]
+        lengths = ends - starts
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        return self.ivf_ids[positions]
+
+    def search(self, q: np.ndarray, nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Approximate (passages, scores) over the probed lists."""
+        ids = self.candidates(q, nprobe)
+        return ids, self.score(q, ids)
+
+    def search_exact(self, q: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Brute-force (passages, scores) over every passage, the reference for recall."""
+        ids = np.arange(len(self.codes))
+        return ids, self.score(q, ids)
@@ -0,0 +1,441 @@
+"""
+Persisted TF-IDF retrieval index for the safety co-pilot.
+
+``build_index`` splits every document into sentences and groups them into short passages, fits the
+vectoriser over passages offline and writes a versioned directory of flat arrays: sorted
+vocabulary, IDF weights, the L2-normalised passage matrix stored term-major (one postings list
+per term), passage offsets, the pre-split sentence text (PII already redacted at ingestion) and
+the redaction placeholder spans.  ``RetrievalIndex.load`` memory-maps
+those arrays, so starting a worker costs a few file opens and every uvicorn worker on the host
+shares one copy of the index through the page cache.  Queries are vectorised with the same
+analyser as ``TfidfVectorizer(stop_words="english")`` without importing scikit-learn, and a
+query only touches the postings of its own terms.  When built with an ``embeddings`` config the
+version also holds int8 LSA passage embeddings and IVF lists (see ``dense.py``), exposed as
+``RetrievalIndex.dense``.
+
+Layout of ``<index_dir>``::
+
+    CURRENT              name of the live version directory, replaced atomically
+    v000001/manifest.json
+    v000001/*.npy
+    ingest/              extraction manifest and cache (see ``ingest.py``)
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from .dense import DENSE_ARRAYS, DenseIndex, build_dense
+    from .ingest import iter_documents
+    from .redact import Redactor
+except ImportError:  # run as a script from src/
+    from dense import DENSE_ARRAYS, DenseIndex, build_dense
+    from ingest import iter_documents
+    from redact import Redactor
+
+FORMAT_VERSION = 3
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+# TfidfVectorizer's default token pattern; the vocabulary and IDF weights are fitted with it
+TOKEN_PATTERN = r"(?u)\b\w\w+\b"
+# Sentence boundaries: end punctuation followed by space, or a line break
+SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\s*\n\s*")
+# A fragment that is only a list marker ("1.", "a)") belongs to the sentence after it
+LIST_MARKER = re.compile(r"(?:\d{1,3}|[A-Za-z])[.)]")
+ARRAYS = (
+    "terms", "idf", "postings_indptr", "postings_rows", "postings_data",
+    "passage_doc", "passage_span", "passage_sentences", "sentence_text", "sentence_offsets",
+    "redaction_doc", "redaction_span", "redaction_label",
+)
+
+
+def _next_version(index_dir: str) -> str:
+    existing = [int(name[1:]) for name in os.listdir(index_dir) if re.fullmatch(r"v\d{6}", name)]
+    return f"v{max(existing, default=0) + 1:06d}"
+
+
+def _reserve_version(index_dir: str) -> str:
+    """
+    Claim the next version by creating its (empty) directory.  ``mkdir`` is atomic, so processes
+    sharing ``index_dir`` never get the same version; a loser retries with the next number.
+    """
+    while True:
+        version = _next_version(index_dir)
+        try:
+            os.mkdir(os.path.join(index_dir, version))
+            return version
+        except FileExistsError:
+            continue
+
+
+def write_index(index_dir: str, arrays: dict, manifest: dict) -> str:
+    """
+    Write ``arrays`` and ``manifest`` as a new version under ``index_dir`` and point ``CURRENT``
+    at it.  The version is assembled in a temporary directory and renamed over its reserved empty
+    directory, so readers never see a partial index and concurrent builders (several server
+    processes sharing ``index_dir``) never write the same version.  Returns the version directory.
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".build-", dir=index_dir)
+    try:
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), array, allow_pickle=False)
+        version = _reserve_version(index_dir)
+        manifest = {**manifest, "format_version": FORMAT_VERSION, "version": version, "built_at": time.time()}
+        with open(os.path.join(tmp_dir, MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f, indent=2)
+        version_dir = os.path.join(index_dir, version)
+        os.rename(tmp_dir, version_dir)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    # a per-writer temporary name, so concurrent builders cannot interleave their writes
+    tmp_current = os.path.join(index_dir, f".{CURRENT_FILE}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp_current, "w") as f:
+        f.write(version)
+    os.replace(tmp_current, os.path.join(index_dir, CURRENT_FILE))
+    return version_dir
+
+
+def split_sentences(text: str) -> List[Tuple[int, int]]:
+    """Character spans of the sentences in ``text``, with list markers kept on their item."""
+    spans, start, pending = [], 0, None
+    breaks = [(m.start(), m.end()) for m in SENTENCE_BREAK.finditer(text)] + [(len(text), len(text))]
+    for end, next_start in breaks:
+        if end > start:
+            if LIST_MARKER.fullmatch(text[start:end]):
+                pending = start if pending is None else pending
+            else:
+                spans.append((start if pending is None else pending, end))
+                pending = None
+        start = next_start
+    if pending is not None:
+        spans.append((pending, len(text)))
+    return spans
+
+
+def chunk_passages(n_sentences: int, passage_sentences: int) -> List[Tuple[int, int]]:
+    """Consecutive, non-overlapping (first, last + 1) sentence ranges of a document."""
+    return [(i, min(i + passage_sentences, n_sentences)) for i in range(0, n_sentences, passage_sentences)]
+
+
+def split_passages(text: str, passage_sentences: int) -> List[Tuple[Tuple[int, int], List[str]]]:
+    """(character span, sentences) of each passage of a document."""
+    spans = split_sentences(text)
+    return [
+        ((spans[first][0], spans[last - 1][1]), [text[a:b] for a, b in spans[first:last]])
+        for first, last in chunk_passages(len(spans), passage_sentences)
+    ]
+
+
+def build_index(
+    corpus_dir: str,
+    index_dir: str,
+    passage_sentences: int = 3,
+    embeddings: Optional[dict] = None,
+    workers: Optional[int] = None,
+    redactor: Optional[Redactor] = None,
+) -> str:
+    """
+    Ingest the corpus (see ``ingest.py``; ``workers`` extraction processes), chunk it into
+    passages of ``passage_sentences`` sentences, fit TF-IDF over the passages and write a new
+    index version.  With a ``redactor`` PII is replaced before chunking, so neither the stored
+    sentences nor the vocabulary hold it, and the placeholder spans are stored per document.
+    With ``embeddings`` (the config block: ``dim``, ``nlist``) dense passage embeddings and IVF
+    lists are written alongside.  Returns the version directory.
+    """
+    from scipy.sparse import csc_matrix
+    from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS, TfidfVectorizer
+
+    names, content = [], hashlib.sha256()
+    ingest_stats: dict = {}
+    labels = redactor.labels if redactor is not None else []
+    redaction_doc, redaction_span, redaction_label = [], [], []
+    sentences, passages, passage_doc, passage_span, passage_sentence_ptr = [], [], [], [], [0]
+    documents = iter_documents(corpus_dir, index_dir, workers, ingest_stats, redactor)
+    for doc, (name, sha, text, redactions) in enumerate(documents):
+        names.append(name)
+        content.update(f"{name}\0{sha}\0".encode("utf-8"))
+        for start, end, label in redactions:
+            redaction_doc.append(doc)
+            redaction_span.append((start, end))
+            redaction_label.append(labels.index(label))
+        for span, passage in split_passages(text, passage_sentences):
+            sentences.extend(passage)
+            passages.append(" ".join(passage))
+            passage_doc.append(doc)
+            passage_span.append(span)
+            passage_sentence_ptr.append(len(sentences))
+
+    if passages:
+        vectorizer = TfidfVectorizer(stop_words="english", token_pattern=TOKEN_PATTERN, dtype=np.float32)
+        matrix = vectorizer.fit_transform(passages).tocsc()
+        matrix.sort_indices()
+        terms = vectorizer.get_feature_names_out().astype(str)  # sorted, so column j is terms[j]
+        idf = vectorizer.idf_.astype(np.float32)
+    else:
+        matrix = csc_matrix((0, 0), dtype=np.float32)
+        terms, idf = np.asarray([], dtype=str), np.asarray([], dtype=np.float32)
+
+    encoded = [sentence.encode("utf-8") for sentence in sentences]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    arrays = {
+        "terms": terms,
+        "idf": idf,
+        # CSC of the passage matrix: column j's rows and weights are the postings of terms[j]
+        "postings_indptr": matrix.indptr.astype(np.int64),
+        "postings_rows": matrix.indices.astype(np.int64),
+        "postings_data": matrix.data.astype(np.float32),
+        "passage_doc": np.asarray(passage_doc, dtype=np.int64),
+        "passage_span": np.asarray(passage_span, dtype=np.int64).reshape(-1, 2),
+        "passage_sentences": np.asarray(passage_sentence_ptr, dtype=np.int64),
+        "sentence_text": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        "sentence_offsets": offsets,
+        # placeholder spans in each redacted document's text, sorted by (document, start)
+        "redaction_doc": np.asarray(redaction_doc, dtype=np.int64),
+        "redaction_span": np.asarray(redaction_span, dtype=np.int64).reshape(-1, 2),
+        "redaction_label": np.asarray(redaction_label, dtype=np.int16),
+    }
+    manifest = {
+        "n_docs": len(names),
+        "n_passages": len(passages),
+        "n_terms": len(terms),
+        "nnz": int(matrix.nnz),
+        "passage_sentences": passage_sentences,
+        "documents": names,
+        "content_sha256": content.hexdigest(),
+        "ingest": ingest_stats,
+        "redaction": (
+            {"labels": labels, "fingerprint": redactor.fingerprint, "count": len(redaction_doc)}
+            if redactor is not None else None
+        ),
+        "analyzer": {"token_pattern": TOKEN_PATTERN, "lowercase": True, "stop_words": sorted(ENGLISH_STOP_WORDS)},
+    }
+    if embeddings is not None and passages:
+        quantize_int8 = embeddings.get("quantize", "int8") == "int8"
+        dense = build_dense(matrix.tocsr(), embeddings.get("dim", 256), embeddings.get("nlist"), quantize_int8)
+        if dense:
+            arrays.update(dense)
+            manifest["dense"] = {
+                "method": "lsa",
+                "dim": int(dense["dense_codes"].shape[1]),
+                "nlist": len(dense["ivf_centroids"]),
+                "quantize": "int8" if quantize_int8 else "float32",
+            }
+    return write_index(index_dir, arrays, manifest)
+
+
+def _posting_positions(indptr, cols: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Flat positions of the postings of every term in ``cols`` (no Python loop over terms)."""
+    starts, ends = indptr[cols], indptr[cols + 1]
+    lengths = ends - starts
+    return np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum()), lengths
+
+
+def gather_postings(indptr, rows, data, cols: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Accumulate ``weights[k] * data`` over the postings of each term ``cols[k]`` of a term-major
+    matrix, returning (rows, scores) for every row with at least one matched posting.
+    """
+    if len(cols) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    positions, lengths = _posting_positions(indptr, cols)
+    contrib = data[positions] * np.repeat(weights, lengths)
+    matched, inverse = np.unique(rows[positions], return_inverse=True)
+    return matched, np.bincount(inverse, weights=contrib, minlength=len(matched)).astype(np.float32)
+
+
+def gather_postings_batch(
+    indptr, rows, data, cols: np.ndarray, weights: np.ndarray, owners: np.ndarray, n_rows: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Sparse matrix-matrix form of ``gather_postings`` for a batch of queries: ``owners[k]`` names
+    the query that term ``cols[k]`` belongs to and ``n_rows`` bounds the row ids.  Returns
+    (owners, rows, scores) for every (query, row) pair with at least one matched posting.
+    """
+    if len(cols) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    positions, lengths = _posting_positions(indptr, cols)
+    contrib = data[positions] * np.repeat(weights, lengths)
+    n_rows = max(int(n_rows), 1)
+    keys = np.repeat(np.asarray(owners, dtype=np.int64), lengths) * n_rows + rows[positions]
+    matched, inverse = np.unique(keys, return_inverse=True)
+    scores = np.bincount(inverse, weights=contrib, minlength=len(matched)).astype(np.float32)
+    return matched // n_rows, matched % n_rows, scores
+
+
+def top_k_pairs(ids: np.ndarray, scores: np.ndarray, k: int) -> List[Tuple[int, float]]:
+    """Best ``k`` (id, score) pairs, best first and ties in id order, via ``argpartition``."""
+    if len(ids) > k:
+        keep = np.argpartition(-scores, k - 1)[:k]
+        ids, scores = ids[keep], scores[keep]
+    order = np.lexsort((ids, -scores))
+    return [(int(ids[i]), float(scores[i])) for i in order]
+
+
+def top_k_per_owner(
+    owners: np.ndarray, ids: np.ndarray, scores: np.ndarray, n_owners: int, k: int
+) -> List[List[Tuple[int, float]]]:
+    """``top_k_pairs`` for each query of a batch, from the flat output of ``gather_postings_batch``."""
+    order = np.lexsort((ids, -scores, owners))
+    owners, ids, scores = owners[order], ids[order], scores[order]
+    group_start = np.searchsorted(owners, np.arange(n_owners))
+    rank = np.arange(len(owners)) - group_start[owners]
+    keep = rank < k
+    results: List[List[Tuple[int, float]]] = [[] for _ in range(n_owners)]
+    for owner, i, score in zip(owners[keep].tolist(), ids[keep].tolist(), scores[keep].tolist()):
+        results[owner].append((i, score))
+    return results
+
+
+class RetrievalIndex:
+    """
+    Read-only view over one index version.  Arrays are memory-mapped with ``mmap_mode="r"``.
+    """
+
+    def __init__(self, path: str, arrays: dict, manifest: dict):
+        if manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported index format {manifest.get('format_version')!r} at {path}")
+        self.path = path
+        self.manifest = manifest
+        self.version: str = manifest["version"]
+        self.names: Sequence[str] = manifest["documents"]
+        self.terms = arrays["terms"]
+        self.idf = arrays["idf"]
+        self.postings_indptr = arrays["postings_indptr"]
+        self.postings_rows = arrays["postings_rows"]
+        self.postings_data = arrays["postings_data"]
+        self.passage_doc = arrays["passage_doc"]
+        self.passage_span = arrays["passage_span"]
+        self.passage_sentences = arrays["passage_sentences"]
+        self.sentence_text = arrays["sentence_text"]
+        self.sentence_offsets = arrays["sentence_offsets"]
+        self.redaction_doc = arrays["redaction_doc"]
+        self.redaction_span = arrays["redaction_span"]
+        self.redaction_label = arrays["redaction_label"]
+        self.dense: Optional[DenseIndex] = DenseIndex(arrays) if "dense" in manifest else None
+        analyzer = manifest["analyzer"]
+        self._token = re.compile(analyzer["token_pattern"])
+        self._lowercase = analyzer["lowercase"]
+        self._stop_words = frozenset(analyzer["stop_words"])
+
+    @classmethod
+    def load(cls, index_dir: str, mmap_mode: Optional[str] = "r") -> "RetrievalIndex":
+        """Open the version named by ``CURRENT``.  Raises FileNotFoundError if none was built."""
+        with open(os.path.join(index_dir, CURRENT_FILE)) as f:
+            path = os.path.join(index_dir, f.read().strip())
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        names = ARRAYS + (DENSE_ARRAYS if "dense" in manifest else ())
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode) for name in names}
+        return cls(path, arrays, manifest)
+
+    @property
+    def n_docs(self) -> int:
+        return len(self.names)
+
+    @property
+    def n_passages(self) -> int:
+        return len(self.passage_doc)
+
+    def sentences(self, passage: int) -> List[str]:
+        """The pre-split sentences of a passage."""
+        first, last = self.passage_sentences[passage], self.passage_sentences[passage + 1]
+        bounds = self.sentence_offsets[first:last + 1]
+        blob = self.sentence_text[bounds[0]:bounds[-1]].tobytes()
+        rel = bounds - bounds[0]
+        return [blob[a:b].decode("utf-8") for a, b in zip(rel[:-1], rel[1:])]
+
+    def document(self, passage: int) -> str:
+        return self.names[int(self.passage_doc[passage])]
+
+    def redactions(self, passage: int) -> List[Tuple[int, int, str]]:
+        """
+        Redaction placeholders inside a passage, as (start, end, label) offsets in its document's
+        redacted text.  The redacted values themselves are never stored.
+        """
+        doc = self.passage_doc[passage]
+        first, last = np.searchsorted(self.redaction_doc, [doc, doc + 1])
+        start, end = self.passage_span[passage]
+        labels = (self.manifest.get("redaction") or {}).get("labels", [])
+        return [
+            (int(a), int(b), labels[int(label)])
+            for (a, b), label in zip(self.redaction_span[first:last], self.redaction_label[first:last])
+            if a < end and b > start
+        ]
+
+    def analyze(self, text: str) -> List[str]:
+        if self._lowercase:
+            text = text.lower()
+        return [tok for tok in self._token.findall(text) if tok not in self._stop_words]
+
+    def lookup(self, words: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Columns of ``words`` in the sorted vocabulary by binary search, as (columns, found) where
+        ``found`` masks the words that are in the vocabulary.
+        """
+        if len(self.terms) == 0:
+            return np.zeros(len(words), dtype=np.int64), np.zeros(len(words), dtype=bool)
+        cols = np.searchsorted(self.terms, words)
+        found = cols < len(self.terms)
+        found[found] = self.terms[cols[found]] == words[found]
+        return np.where(found, cols, 0), found
+
+    @property
+    def document_frequency(self) -> np.ndarray:
+        """Passages containing each term, read off the postings lengths."""
+        return np.diff(self.postings_indptr)
+
+    def vectorize(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        L2-normalised TF-IDF weights of the query's in-vocabulary terms, as (columns, weights).
+        """
+        tokens = self.analyze(query)
+        if not tokens:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        words, counts = np.unique(np.asarray(tokens, dtype=str), return_counts=True)
+        cols, found = self.lookup(words)
+        cols = cols[found]
+        weights = counts[found] * self.idf[cols]
+        norm = np.sqrt(np.dot(weights, weights))
+        return cols, (weights / norm if norm > 0 else weights).astype(np.float32)
+
+    def vectorize_batch(self, queries: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """``vectorize`` for several queries at once, as (owners, columns, weights)."""
+        parts = [self.vectorize(q) for q in queries]
+        owners = np.repeat(np.arange(len(parts)), [len(cols) for cols, _ in parts])
+        if not len(owners):
+            return owners, np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        return owners, np.concatenate([c for c, _ in parts]), np.concatenate([w for _, w in parts])
+
+    def scores_batch(self, queries: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(owners, passages, scores) for a batch of queries in one sparse matrix-matrix product."""
+        owners, cols, weights = self.vectorize_batch(queries)
+        return gather_postings_batch(
+            self.postings_indptr, self.postings_rows, self.postings_data, cols, weights, owners, self.n_passages
+        )
+
+    def scores(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Cosine similarity of the query with every passage that shares a term with it, as
+        (passages, scores).  Only the postings of the query's terms are read, so the cost
+        scales with the matched postings rather than with the corpus size.
+        """
+        cols, weights = self.vectorize(query)
+        return gather_postings(self.postings_indptr, self.postings_rows, self.postings_data, cols, weights)
+
+    def search(self, query: str, top_k: int = 2) -> List[Tuple[int, float]]:
+        """Return up to ``top_k`` (passage, score) pairs, best first."""
+        return top_k_pairs(*self.scores(query), top_k)
+
+    def search_batch(self, queries: Sequence[str], top_k: int = 2) -> List[List[Tuple[int, float]]]:
+        return top_k_per_owner(*self.scores_batch(queries), len(queries), top_k)
@@ -0,0 +1,353 @@
+"""
+Streaming, multi-format corpus ingestion for the safety co-pilot.
+
+``iter_documents`` is a pipeline of stages feeding ``build_index``, which chunks the documents
+as they stream out:
+
+1. **Discover** corpus files in name order and look each up in the ingest manifest.  Files
+   whose size and mtime are unchanged are served from the cache without being read.
+2. **Extract, normalise and redact** the rest in a process pool.  Each worker hashes the raw
+   bytes and, if the SHA-256 matches the manifest, returns without extracting; otherwise it
+   runs the extractor for the file's suffix (plain text, HTML, DOCX, PDF), normalises the
+   result (Unicode NFKC, control characters, de-hyphenated line wraps, collapsed spaces) and
+   applies the PII ``Redactor`` (see ``redact.py``), if one is configured.
+3. **Stream** documents back in name order through a generator, so chunking overlaps with
+   extraction and the whole corpus is never held as raw bytes.
+
+Processed text and its redaction spans are cached under ``<index_dir>/ingest/text`` next to
+``manifest.json``, so a rebuild only re-extracts documents whose contents changed (or all of
+them when the redaction dictionary changes).  Files that cannot be extracted are logged and
+skipped rather than indexed as garbage.
+
+Layout of ``<index_dir>/ingest``::
+
+    manifest.json        {redactor, files: {name: {sha256, size, mtime_ns, format, chars, redactions}}}
+    text/<sha256>.json   {text, redactions}, one file per distinct content
+"""
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import unicodedata
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from typing import Dict, Iterator, List, Optional, Tuple
+from xml.etree import ElementTree
+
+try:
+    from .redact import Redactor
+except ImportError:  # run as a script from src/
+    from redact import Redactor
+
+logger = logging.getLogger("ingest")
+
+INGEST_DIR = "ingest"
+MANIFEST_FILE = "manifest.json"
+HTML_SUFFIXES = (".html", ".htm")
+# Below this many files to extract, a process pool costs more to start than it saves
+POOL_MIN_FILES = 32
+
+_CONTROL = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]")
+_HYPHEN_WRAP = re.compile(r"(\w)-\n(\w)")
+_SPACES = re.compile(r"[ \t]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def decode_text(data: bytes) -> str:
+    """UTF-8 (with or without BOM), falling back to Windows-1252 for legacy exports."""
+    try:
+        return data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return data.decode("cp1252", errors="replace")
+
+
+class _TextExtractor(HTMLParser):
+    BLOCKS = {"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "table", "section"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("script", "style"):
+            self._skip += 1
+        elif tag in self.BLOCKS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style"):
+            self._skip = max(0, self._skip - 1)
+        elif tag in self.BLOCKS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.parts.append(data)
+
+
+def extract_html(data: bytes) -> str:
+    parser = _TextExtractor()
+    parser.feed(decode_text(data))
+    parser.close()
+    return "".join(parser.parts)  # character references already converted by the parser
+
+
+def extract_docx(data: bytes) -> str:
+    """Paragraph text of a Word document, read straight from its XML (no extra dependency)."""
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        root = ElementTree.fromstring(archive.read("word/document.xml"))
+    paragraphs = []
+    for paragraph in root.iter(f"{_W}p"):
+        runs = []
+        for node in paragraph.iter():
+            if node.tag == f"{_W}t" and node.text:
+                runs.append(node.text)
+            elif node.tag == f"{_W}tab":
+                runs.append("\t")
+            elif node.tag in (f"{_W}br", f"{_W}cr"):
+                runs.append("\n")
+        paragraphs.append("".join(runs))
+    return "\n".join(paragraphs)
+
+
+def extract_pdf(data: bytes) -> str:
+    try:
+        from pypdf import PdfReader
+    except ImportError as exc:
+        raise RuntimeError("PDF ingestion requires pypdf (pip install pypdf).") from exc
+    reader = PdfReader(io.BytesIO(data))
+    return "\n".join(page.extract_text() or "" for page in reader.pages)
+
+
+def extract_plain(data: bytes) -> str:
+    if b"\x00" in data[:4096]:
+        raise ValueError("binary content in a text file")
+    return decode_text(data)
+
+
+def file_format(name: str) -> str:
+    suffix = os.path.splitext(name)[1].lower()
+    if suffix in HTML_SUFFIXES:
+        return "html"
+    if suffix == ".docx":
+        return "docx"
+    if suffix == ".pdf":
+        return "pdf"
+    return "text"  # .txt, .md, .csv, ... and anything else that decodes as text
+
+
+def normalize_text(text: str) -> str:
+    """
+    Canonical text for chunking: NFKC, Unix newlines, no control characters, words re-joined
+    across hyphenated line wraps, runs of spaces collapsed and at most one blank line.
+    """
+    text = unicodedata.normalize("NFKC", text).replace("\r\n", "\n").replace("\r", "\n")
+    text = _CONTROL.sub("", text)
+    text = _HYPHEN_WRAP.sub(r"\1\2", text)
+    text = "\n".join(_SPACES.sub(" ", line).strip() for line in text.split("\n"))
+    return _BLANK_LINES.sub("\n\n", text).strip()
+
+
+EXTRACTORS = {"text": extract_plain, "html": extract_html, "docx": extract_docx, "pdf": extract_pdf}
+
+
+Document = Tuple[str, List[list]]  # (text, [[start, end, label], ...] redaction placeholders)
+
+# Redactor of a pool worker, installed once per process by _init_worker
+_worker_redactor: Optional[Redactor] = None
+
+
+def _init_worker(redactor: Optional[Redactor]):
+    global _worker_redactor
+    _worker_redactor = redactor
+
+
+def process_file(
+    path: str, known_sha: Optional[str], redactor: Optional[Redactor]
+) -> Tuple[str, Optional[str], Optional[Document], Optional[str]]:
+    """
+    Hash, extract, normalise and redact one file.  Returns (path, sha256, document, error);
+    ``document`` is None when the content matches ``known_sha`` and the cached one can be reused.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        sha = hashlib.sha256(data).hexdigest()
+        if sha == known_sha:
+            return path, sha, None, None
+        text = normalize_text(EXTRACTORS[file_format(path)](data))
+        if redactor is None:
+            return path, sha, (text, []), None
+        text, spans = redactor.redact(text)
+        return path, sha, (text, [list(span) for span in spans]), None
+    except Exception as exc:  # one unreadable file must not abort the build
+        return path, None, None, f"{type(exc).__name__}: {exc}"
+
+
+def extract_file(job: Tuple[str, Optional[str]]):
+    """Pool task for one (path, known sha256) job, using the worker's redactor."""
+    return process_file(*job, _worker_redactor)
+
+
+class IngestCache:
+    """
+    The ingest manifest and document cache of one index directory.  Entries made with a
+    different redactor (or none) are discarded on load, so a dictionary change re-redacts.
+    """
+
+    def __init__(self, index_dir: str, redactor_fingerprint: Optional[str] = None):
+        self.root = os.path.join(index_dir, INGEST_DIR)
+        self.text_dir = os.path.join(self.root, "text")
+        self.manifest_path = os.path.join(self.root, MANIFEST_FILE)
+        self.redactor_fingerprint = redactor_fingerprint
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            manifest = {}
+        same_redactor = manifest.get("redactor") == redactor_fingerprint
+        self.entries: Dict[str, dict] = manifest.get("files", {}) if same_redactor else {}
+
+    def text_path(self, sha: str) -> str:
+        return os.path.join(self.text_dir, f"{sha}.json")
+
+    def read(self, sha: str) -> Optional[Document]:
+        try:
+            with open(self.text_path(sha), "r", encoding="utf-8") as f:
+                cached = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return cached["text"], cached["redactions"]
+
+    def write(self, sha: str, document: Document):
+        os.makedirs(self.text_dir, exist_ok=True)
+        path = self.text_path(sha)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"text": document[0], "redactions": document[1]}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def save(self, entries: Dict[str, dict]):
+        """Replace the manifest and drop cached documents no entry refers to any more."""
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"redactor": self.redactor_fingerprint, "files": entries}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+        self.entries = entries
+        live = {f"{entry['sha256']}.json" for entry in entries.values()}
+        if os.path.isdir(self.text_dir):
+            for entry in os.scandir(self.text_dir):
+                if entry.name not in live and not entry.name.endswith(".tmp"):
+                    os.remove(entry.path)
+
+
+def is_corpus_file(entry: os.DirEntry) -> bool:
+    """Whether a corpus directory entry is a document: not hidden and not an in-progress write."""
+    return entry.is_file() and not entry.name.startswith(".") and not entry.name.endswith(".tmp")
+
+
+def discover(corpus_dir: str) -> List[str]:
+    """Corpus files in name order, without hidden files and in-progress writes."""
+    if not os.path.isdir(corpus_dir):
+        return []
+    return sorted(entry.path for entry in os.scandir(corpus_dir) if is_corpus_file(entry))
+
+
+def extract_stage(
+    paths: List[str],
+    cache: IngestCache,
+    entries: Dict[str, dict],
+    stats: dict,
+    workers: Optional[int],
+    redactor: Optional[Redactor],
+) -> Iterator[Tuple[str, Document]]:
+    """
+    Yield (name, document) in ``paths`` order.  Unchanged files (same size and mtime) come from
+    the cache directly; the rest are hashed and, if changed, extracted in a process pool.
+    """
+    files = []  # (path, stat, known sha256, unchanged by size and mtime)
+    for path in paths:
+        st = os.stat(path)
+        known = cache.entries.get(os.path.basename(path))
+        same = bool(known) and known["size"] == st.st_size and known["mtime_ns"] == st.st_mtime_ns
+        files.append((path, st, known["sha256"] if known else None, same))
+
+    pending = [(path, sha) for path, _, sha, same in files if not same]
+    workers = workers or os.cpu_count() or 1
+    pool = None
+    if workers > 1 and len(pending) >= POOL_MIN_FILES:
+        # the redactor's compiled matchers are sent once per worker, not once per file
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(redactor,))
+    try:
+        if pool is not None:
+            results = pool.map(extract_file, pending, chunksize=max(1, len(pending) // (workers * 8)))
+        else:
+            results = (process_file(path, sha, redactor) for path, sha in pending)
+        for path, st, sha, same in files:
+            name = os.path.basename(path)
+            document, error = None, None
+            if not same:
+                _, sha, document, error = next(results)
+            if error is None and document is None:
+                document = cache.read(sha)
+                if document is None:  # cache file lost: extract again here
+                    _, sha, document, error = process_file(path, None, redactor)
+                    if error is None:
+                        cache.write(sha, document)
+                        stats["extracted"] += 1
+                else:
+                    stats["unchanged"] += 1
+            elif error is None:
+                cache.write(sha, document)
+                stats["extracted"] += 1
+            if error is not None:
+                logger.warning("Skipping %s: %s", name, error)
+                stats["failed"] += 1
+                continue
+            entries[name] = {
+                "sha256": sha, "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                "format": file_format(name), "chars": len(document[0]), "redactions": len(document[1]),
+            }
+            yield name, document
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+def iter_documents(
+    corpus_dir: str,
+    index_dir: str,
+    workers: Optional[int] = None,
+    stats: Optional[dict] = None,
+    redactor: Optional[Redactor] = None,
+) -> Iterator[Tuple[str, str, str, List[list]]]:
+    """
+    Stream (name, sha256, text, redactions) for every extractable corpus file, in name order.
+    ``text`` is normalised and, with a ``redactor``, redacted; ``redactions`` lists the
+    [start, end, label] placeholder spans in it.  The ingest manifest is updated once the stream
+    is exhausted; ``stats`` (if given) receives counts of extracted, unchanged and failed files.
+    """
+    cache = IngestCache(index_dir, redactor.fingerprint if redactor is not None else None)
+    stats = stats if stats is not None else {}
+    stats.update(extracted=0, unchanged=0, failed=0)
+    entries: Dict[str, dict] = {}
+    for name, (text, redactions) in extract_stage(discover(corpus_dir), cache, entries, stats, workers, redactor):
+        yield name, entries[name]["sha256"], text, redactions
+    cache.save(entries)
+
+
+def read_document(path: str, redactor: Optional[Redactor] = None) -> str:
+    """
+    Extract, normalise and redact one file in-process, for live updates.  Raises ValueError if
+    it cannot be extracted.
+    """
+    _, _, document, error = process_file(path, None, redactor)
+    if error is not None:
+        raise ValueError(f"Cannot extract {os.path.basename(path)}: {error}")
+    return document[0]
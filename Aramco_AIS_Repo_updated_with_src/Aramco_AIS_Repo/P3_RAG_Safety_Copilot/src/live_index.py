@@ -0,0 +1,503 @@
+"""
+Live document updates over the persisted retrieval index.
+
+The memory-mapped base index is never modified.  Added or revised documents go into a small
+in-memory delta segment, deleted or superseded ones are tombstoned, and terms the base has never
+seen get new columns in an append-only vocabulary extension.  Each update builds a new immutable
+``Snapshot`` and swaps it in with one reference assignment, so a query that has picked up a
+snapshot sees a consistent corpus however many updates land while it runs.
+
+Base passages keep the weights they were built with.  Delta passages are weighted with IDF over
+the base plus live delta passages, recomputed lazily the first time a snapshot is queried.  Once
+the delta grows past ``compact_after`` passages (or a tenth of the base documents, and at least
+``compact_after // 10`` of them, are tombstoned) a background compaction rebuilds the base from the corpus directory, replays the updates that
+arrived meanwhile and swaps the result in.
+
+``method`` selects how a snapshot ranks passages: ``tfidf`` (sparse cosine), ``embeddings``
+(dense LSA cosine over the probed IVF lists of the base plus every live delta passage) or
+``hybrid`` (``hybrid_alpha * dense + (1 - hybrid_alpha) * tfidf`` over the union of both
+candidate sets).  Delta passages are embedded through the base SVD components on first use.
+"""
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from .index import (RetrievalIndex, build_index, gather_postings, gather_postings_batch, split_passages,
+                        top_k_pairs, top_k_per_owner)
+    from .ingest import file_format, is_corpus_file, read_document
+    from .redact import Redactor
+except ImportError:  # run as a script from src/
+    from index import (RetrievalIndex, build_index, gather_postings, gather_postings_batch, split_passages,
+                       top_k_pairs, top_k_per_owner)
+    from ingest import file_format, is_corpus_file, read_document
+    from redact import Redactor
+
+logger = logging.getLogger("live_index")
+METHODS = ("tfidf", "embeddings", "hybrid")
+_DOC_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9 _.()-]*$")
+
+
+def validate_name(name: str) -> str:
+    if not _DOC_NAME.match(name) or ".." in name:
+        raise ValueError(f"Invalid document name {name!r}")
+    return name
+
+
+@dataclass(frozen=True)
+class DeltaPassage:
+    name: str
+    sentences: Tuple[str, ...]
+    cols: np.ndarray  # unique columns in the extended vocabulary
+    counts: np.ndarray  # raw term counts for ``cols``
+
+
+class Snapshot:
+    """
+    Immutable view of the live corpus: a base index version, passages added since it was built
+    and tombstones.  Passage ids below ``base.n_passages`` are base passages; the rest index
+    ``delta``.
+
+    ``version`` is ``v<base>+<seq>.<digest>`` once updates are applied: ``seq`` orders snapshots
+    within one process, and ``digest`` chains the applied updates, so workers sharing a cache only
+    share a version when they applied the same updates to the same base.
+    """
+
+    def __init__(
+        self,
+        base: RetrievalIndex,
+        extra_terms: Dict[str, int],
+        delta: Tuple[DeltaPassage, ...],
+        delta_live: np.ndarray,
+        deleted_base: np.ndarray,
+        seq: int,
+        method: str = "tfidf",
+        hybrid_alpha: float = 0.5,
+        digest: str = "",
+    ):
+        self.base = base
+        self.extra_terms = extra_terms
+        self.delta = delta
+        self.delta_live = delta_live
+        self.deleted_base = deleted_base
+        self.seq = seq
+        self.method = method
+        self.hybrid_alpha = hybrid_alpha
+        self.digest = digest
+        self.version = base.version if seq == 0 else f"{base.version}+{seq}.{digest}"
+        self._dead_base_passages = None
+        self._delta_postings = None
+        self._delta_embeddings = None
+
+    @classmethod
+    def initial(cls, base: RetrievalIndex, method: str = "tfidf", hybrid_alpha: float = 0.5) -> "Snapshot":
+        return cls(
+            base, {}, (), np.zeros(0, dtype=bool), np.zeros(base.n_docs, dtype=bool), 0, method, hybrid_alpha
+        )
+
+    @property
+    def n_passages(self) -> int:
+        """Live passages: base passages not tombstoned plus live delta passages."""
+        return int(self.base.n_passages - self.dead_base_passages.sum() + self.delta_live.sum())
+
+    @property
+    def dead_base_passages(self) -> np.ndarray:
+        if self._dead_base_passages is None:
+            self._dead_base_passages = self.deleted_base[self.base.passage_doc]
+        return self._dead_base_passages
+
+    def sentences(self, passage: int) -> List[str]:
+        if passage < self.base.n_passages:
+            return self.base.sentences(passage)
+        return list(self.delta[passage - self.base.n_passages].sentences)
+
+    def document(self, passage: int) -> str:
+        if passage < self.base.n_passages:
+            return self.base.document(passage)
+        return self.delta[passage - self.base.n_passages].name
+
+    def lookup(self, words: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Columns of ``words`` in the base vocabulary or its extension, as (columns, found)."""
+        cols, found = self.base.lookup(words)
+        for i in np.flatnonzero(~found):
+            col = self.extra_terms.get(str(words[i]))
+            if col is not None:
+                cols[i], found[i] = col, True
+        return cols, found
+
+    def _delta_index(self):
+        """
+        (idf, indptr, rows, data) of the live delta passages stored term-major, with IDF over base
+        and live delta passages.  Built on first use and kept for the life of the snapshot.
+        """
+        if self._delta_postings is None:
+            n_base_terms = len(self.base.terms)
+            n_terms = n_base_terms + len(self.extra_terms)
+            live = np.flatnonzero(self.delta_live)
+            cols = np.concatenate([self.delta[i].cols for i in live]).astype(np.int64)
+            counts = np.concatenate([self.delta[i].counts for i in live]).astype(np.float64)
+            rows = np.repeat(live, [len(self.delta[i].cols) for i in live])
+            df = np.zeros(n_terms)
+            df[:n_base_terms] = self.base.document_frequency
+            df += np.bincount(cols, minlength=n_terms)
+            n = self.base.n_passages + len(live)
+            # TfidfVectorizer's smoothed IDF
+            idf = np.log((1.0 + n) / (1.0 + df)) + 1.0
+            weights = counts * idf[cols]
+            norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=len(self.delta)))
+            weights /= norms[rows]
+            order = np.lexsort((rows, cols))
+            indptr = np.zeros(n_terms + 1, dtype=np.int64)
+            np.cumsum(np.bincount(cols, minlength=n_terms), out=indptr[1:])
+            self._delta_postings = (
+                idf, indptr, rows[order] + self.base.n_passages, weights[order].astype(np.float32)
+            )
+        return self._delta_postings
+
+    def _delta_query(self, query: str, idf: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Query (columns, weights) in the extended vocabulary, weighted with the delta IDF."""
+        tokens = self.base.analyze(query)
+        if not tokens:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        words, counts = np.unique(np.asarray(tokens, dtype=str), return_counts=True)
+        cols, found = self.lookup(words)
+        cols = cols[found]
+        weights = counts[found] * idf[cols]
+        norm = np.sqrt(np.dot(weights, weights))
+        return cols, (weights / norm if norm > 0 else weights).astype(np.float32)
+
+    def _tfidf_scores(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(passages, scores) over live base and delta passages that share a term with the query."""
+        ids, sims = self.base.scores(query)
+        if self.deleted_base.any():
+            keep = ~self.dead_base_passages[ids]
+            ids, sims = ids[keep], sims[keep]
+        if not self.delta_live.any():
+            return ids, sims
+        idf, indptr, rows, data = self._delta_index()
+        d_ids, d_sims = gather_postings(indptr, rows, data, *self._delta_query(query, idf))
+        return np.concatenate([ids, d_ids]), np.concatenate([sims, d_sims])
+
+    def _delta_vectors(self) -> np.ndarray:
+        """
+        Unit embeddings of every delta passage (zero rows for dead ones), from their TF-IDF over
+        the base vocabulary and IDF, as the base passages were embedded.
+        """
+        if self._delta_embeddings is None:
+            dense, n_base_terms = self.base.dense, len(self.base.terms)
+            vectors = np.zeros((len(self.delta), dense.dim), dtype=np.float32)
+            for i in np.flatnonzero(self.delta_live):
+                passage = self.delta[i]
+                in_base = passage.cols < n_base_terms
+                cols = passage.cols[in_base]
+                weights = passage.counts[in_base] * self.base.idf[cols]
+                vectors[i] = dense.embed(cols, weights)
+            self._delta_embeddings = vectors
+        return self._delta_embeddings
+
+    def _dense_scores(self, q: np.ndarray, ids: np.ndarray) -> np.ndarray:
+        """Dense cosine of ``q`` with the given base and delta passages."""
+        n_base = self.base.n_passages
+        sims = np.empty(len(ids), dtype=np.float32)
+        in_base = ids < n_base
+        sims[in_base] = self.base.dense.score(q, ids[in_base])
+        if not in_base.all():
+            sims[~in_base] = self._delta_vectors()[ids[~in_base] - n_base] @ q
+        return sims
+
+    def _dense_candidates(self, q: np.ndarray) -> np.ndarray:
+        """Live base passages in the probed IVF lists plus every live delta passage."""
+        ids = self.base.dense.candidates(q)
+        if self.deleted_base.any():
+            ids = ids[~self.dead_base_passages[ids]]
+        if self.delta_live.any():
+            ids = np.concatenate([ids, np.flatnonzero(self.delta_live) + self.base.n_passages])
+        return ids
+
+    def scores(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(passages, scores) for the query under this snapshot's retrieval ``method``."""
+        if self.method == "tfidf":
+            return self._tfidf_scores(query)
+        q = self.base.dense.embed(*self.base.vectorize(query))
+        if self.method == "embeddings":
+            ids = self._dense_candidates(q)
+            return ids, self._dense_scores(q, ids)
+        # hybrid: a passage missing from the TF-IDF candidates shares no term with the query, so
+        # its sparse score is exactly zero; dense scores are computed for the whole union
+        t_ids, t_sims = self._tfidf_scores(query)
+        ids = np.union1d(t_ids, self._dense_candidates(q))
+        sparse = np.zeros(len(ids), dtype=np.float32)
+        sparse[np.searchsorted(ids, t_ids)] = t_sims
+        fused = self.hybrid_alpha * self._dense_scores(q, ids) + (1.0 - self.hybrid_alpha) * sparse
+        return ids, fused.astype(np.float32)
+
+    def search(self, query: str, top_k: int = 2) -> List[Tuple[int, float]]:
+        return top_k_pairs(*self.scores(query), top_k)
+
+    def search_batch(self, queries: List[str], top_k: int = 2) -> List[List[Tuple[int, float]]]:
+        """
+        ``search`` for a batch of queries.  TF-IDF batches are scored as one sparse matrix-matrix
+        product per segment; dense and hybrid queries probe their own IVF lists one by one.
+        """
+        if self.method != "tfidf":
+            return [self.search(query, top_k) for query in queries]
+        owners, ids, sims = self.base.scores_batch(queries)
+        if self.deleted_base.any():
+            keep = ~self.dead_base_passages[ids]
+            owners, ids, sims = owners[keep], ids[keep], sims[keep]
+        if self.delta_live.any():
+            idf, indptr, rows, data = self._delta_index()
+            parts = [self._delta_query(q, idf) for q in queries]
+            d_owners = np.repeat(np.arange(len(parts)), [len(cols) for cols, _ in parts])
+            if len(d_owners):
+                d = gather_postings_batch(
+                    indptr, rows, data, np.concatenate([c for c, _ in parts]),
+                    np.concatenate([w for _, w in parts]), d_owners, self.base.n_passages + len(self.delta),
+                )
+                owners, ids, sims = (np.concatenate(pair) for pair in zip((owners, ids, sims), d))
+        return top_k_per_owner(owners, ids, sims, len(queries), top_k)
+
+
+class LiveIndex:
+    """
+    Owner of the current ``Snapshot``.  Readers take ``self.snapshot`` once per query and never
+    lock; writers serialise on a lock and publish a new snapshot when done.
+    """
+
+    def __init__(
+        self,
+        corpus_dir: str,
+        index_dir: str,
+        passage_sentences: int = 3,
+        compact_after: int = 1000,
+        method: str = "tfidf",
+        embeddings: Optional[dict] = None,
+        hybrid_alpha: float = 0.5,
+        ingest_workers: Optional[int] = None,
+        redactor: Optional[Redactor] = None,
+    ):
+        if method not in METHODS:
+            raise ValueError(f"Unknown retrieval method {method!r}; expected one of {METHODS}")
+        self.corpus_dir = corpus_dir
+        self.index_dir = index_dir
+        self.passage_sentences = passage_sentences
+        self.compact_after = compact_after
+        self.method = method
+        # dense arrays are only built when a mode needs them
+        self.embeddings = (embeddings or {}) if method != "tfidf" else None
+        self.hybrid_alpha = hybrid_alpha
+        self.ingest_workers = ingest_workers
+        self.redactor = redactor
+        self._lock = threading.Lock()
+        # serialises corpus-directory writers (write/remove/sync) and their ``_known`` bookkeeping;
+        # taken before ``_lock``, never inside it
+        self._corpus_lock = threading.Lock()
+        self._ops: List[Tuple[int, str, Optional[str]]] = []  # updates since the last compaction began
+        self._compacting = False
+        self.compactions = 0
+        self.last_compaction_seconds: Optional[float] = None
+        self._set_base(RetrievalIndex.load(index_dir))
+        built_at = self.snapshot.base.manifest.get("built_at", 0.0)
+        # Files changed after the build are re-read by the first sync()
+        self._known: Dict[str, Optional[Tuple[int, int]]] = {}
+        for name in self.snapshot.base.names:
+            sig = self._signature(name)
+            self._known[name] = sig if sig is not None and sig[0] <= built_at * 1e9 else None
+
+    def _set_base(self, base: RetrievalIndex):
+        """
+        Serve ``base``.  Raises ValueError if it was not redacted with the configured dictionary,
+        or if the retrieval method needs embeddings it lacks.
+        """
+        redaction = base.manifest.get("redaction")
+        built_with = redaction["fingerprint"] if redaction else None
+        if built_with != (self.redactor.fingerprint if self.redactor is not None else None):
+            raise ValueError(f"Index {base.version} was not redacted with the configured PII dictionary")
+        if self.method != "tfidf":
+            if base.dense is None and base.n_passages:
+                raise ValueError(f"Index {base.version} has no embeddings for retrieval method {self.method!r}")
+            if base.dense is not None:
+                base.dense.nprobe = self.embeddings.get("nprobe", base.dense.nprobe)
+        method = self.method if base.dense is not None else "tfidf"  # an empty corpus has nothing to embed
+        self._base_ids = {name: i for i, name in enumerate(base.names)}
+        self.snapshot = Snapshot.initial(base, method, self.hybrid_alpha)
+
+    def _signature(self, name: str):
+        try:
+            st = os.stat(os.path.join(self.corpus_dir, name))
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _updated(self, snap: Snapshot, name: str, text: Optional[str], seq: int) -> Snapshot:
+        """A new snapshot with ``name`` removed and, if ``text`` is given, re-added."""
+        update = hashlib.sha256(snap.digest.encode())
+        update.update(f"\0{name}\0".encode())
+        update.update(b"\1" if text is None else text.encode())  # a deletion differs from an empty text
+        deleted_base = snap.deleted_base
+        if name in self._base_ids and not deleted_base[self._base_ids[name]]:
+            deleted_base = deleted_base.copy()
+            deleted_base[self._base_ids[name]] = True
+        delta_live = snap.delta_live.copy()
+        for i in np.flatnonzero(delta_live):
+            if snap.delta[i].name == name:
+                delta_live[i] = False
+
+        extra_terms, added = snap.extra_terms, []
+        for _, sentences in split_passages(text or "", self.passage_sentences):
+            tokens = snap.base.analyze(" ".join(sentences))
+            words, counts = np.unique(np.asarray(tokens, dtype=str), return_counts=True)
+            cols, found = snap.lookup(words)
+            if not found.all():
+                if extra_terms is snap.extra_terms:
+                    extra_terms = dict(extra_terms)  # copy on write; older snapshots keep theirs
+                for i in np.flatnonzero(~found):
+                    word = str(words[i])
+                    cols[i] = extra_terms.setdefault(word, len(snap.base.terms) + len(extra_terms))
+            added.append(DeltaPassage(name, tuple(sentences), cols, counts))
+        return Snapshot(
+            snap.base, extra_terms, snap.delta + tuple(added),
+            np.concatenate([delta_live, np.ones(len(added), dtype=bool)]), deleted_base, seq,
+            snap.method, snap.hybrid_alpha, update.hexdigest()[:16],
+        )
+
+    def _apply(self, name: str, text: Optional[str]):
+        with self._lock:
+            seq = self.snapshot.seq + 1
+            self.snapshot = self._updated(self.snapshot, name, text, seq)
+            self._ops.append((seq, name, text))
+            snap = self.snapshot
+        # a handful of tombstones in a small base costs nothing to mask, so require an absolute
+        # minimum as well as a fraction of the base before rebuilding for deletions
+        dead = int(snap.deleted_base.sum())
+        min_dead = max(len(snap.deleted_base) / 10, self.compact_after // 10, 1)
+        if len(snap.delta) >= self.compact_after or dead >= min_dead:
+            self.compact_in_background()
+
+    def upsert(self, name: str, text: str):
+        """Add a document or replace every passage of its previous revision."""
+        self._apply(validate_name(name), text)
+
+    def delete(self, name: str):
+        self._apply(validate_name(name), None)
+
+    def write_document(self, name: str, text: str):
+        """Save a document to the corpus directory and index it; the corpus stays the source of truth."""
+        if file_format(validate_name(name)) in ("docx", "pdf"):
+            raise ValueError(f"{name!r} must be copied into the corpus directory; /index takes plain text")
+        path = os.path.join(self.corpus_dir, name)
+        tmp_path = f"{path}.tmp"
+        with self._corpus_lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+            self._known[name] = self._signature(name)
+            self.upsert(name, read_document(path, self.redactor))  # the same extraction a rebuild applies
+
+    def remove_document(self, name: str):
+        path = os.path.join(self.corpus_dir, validate_name(name))
+        with self._corpus_lock:
+            if os.path.exists(path):
+                os.remove(path)
+            self._known.pop(name, None)
+            self.delete(name)
+
+    def sync(self) -> int:
+        """
+        Apply changes made directly in the corpus directory since the last call, detected by
+        (mtime, size).  Returns the number of documents updated or deleted.
+        """
+        with self._corpus_lock:
+            return self._sync()
+
+    def _sync(self) -> int:
+        # the same files a rebuild ingests (ingest.discover); names that validate_name would refuse
+        # over HTTP are still documents here, so they go through _apply rather than upsert/delete
+        current = {}
+        for entry in os.scandir(self.corpus_dir):
+            if is_corpus_file(entry):
+                st = entry.stat()
+                current[entry.name] = (st.st_mtime_ns, st.st_size)
+        changes = 0
+        for name, sig in current.items():
+            if self._known.get(name) != sig:
+                try:
+                    text = read_document(os.path.join(self.corpus_dir, name), self.redactor)
+                except ValueError as exc:
+                    logger.warning("Skipping %s", exc)
+                    continue
+                self._apply(name, text)
+                changes += 1
+        for name in set(self._known) - set(current):
+            self._apply(name, None)
+            changes += 1
+        self._known = current
+        return changes
+
+    def compact(self) -> bool:
+        """
+        Rebuild the base index from the corpus directory and swap it in.  Updates applied while
+        the build runs are replayed onto the new base.  Returns False if a compaction is already
+        running.
+        """
+        with self._lock:
+            if self._compacting:
+                return False
+            self._compacting = True
+            start_seq = self.snapshot.seq
+        start = time.perf_counter()
+        try:
+            build_index(
+                self.corpus_dir, self.index_dir, self.passage_sentences, self.embeddings, self.ingest_workers,
+                self.redactor,
+            )
+            base = RetrievalIndex.load(self.index_dir)
+            with self._lock:
+                pending = [(name, text) for seq, name, text in self._ops if seq > start_seq]
+                self._set_base(base)
+                snap, self._ops = self.snapshot, []
+                for seq, (name, text) in enumerate(pending, start=1):
+                    snap = self._updated(snap, name, text, seq)
+                    self._ops.append((seq, name, text))
+                self.snapshot = snap
+            self.compactions += 1
+            self.last_compaction_seconds = time.perf_counter() - start
+            logger.info("Compacted index to %s in %.2f s", base.version, self.last_compaction_seconds)
+        finally:
+            with self._lock:
+                self._compacting = False
+        return True
+
+    def compact_in_background(self):
+        thread = threading.Thread(target=self._compact_logged, name="index-compaction", daemon=True)
+        thread.start()
+
+    def _compact_logged(self):
+        try:
+            self.compact()
+        except Exception:
+            logger.exception("Index compaction failed")
+
+    def stats(self) -> dict:
+        snap = self.snapshot
+        return {
+            "version": snap.version,
+            "base_version": snap.base.version,
+            "method": snap.method,
+            "redactions": (snap.base.manifest.get("redaction") or {}).get("count", 0),
+            "live_passages": snap.n_passages,
+            "delta_passages": int(snap.delta_live.sum()),
+            "dead_delta_passages": int(len(snap.delta) - snap.delta_live.sum()),
+            "tombstoned_documents": int(snap.deleted_base.sum()),
+            "extra_terms": len(snap.extra_terms),
+            "compacting": self._compacting,
+            "compactions": self.compactions,
+            "last_compaction_seconds": self.last_compaction_seconds,
+        }
@@ -0,0 +1,59 @@
+"""
+Streaming seasonal baseline throughput and memory on multi-year 1-minute historian data.
+
+Streams ``--years`` of synthetic energy intensity (daily and weekly cycles, annual drift,
+process upsets) through ``StreamingSTL`` in day-sized chunks, as a historian tail would deliver
+it, and reports updates/sec, the decomposer's state size, how much the process's peak resident
+memory grew while streaming (flat across lengths when memory is bounded), and the memory a batch
+decomposition of the full history would need just to hold the series.  The recovered daily
+profile is compared with the true one.
+
+Run from the project directory:
+  python benchmarks/baseline.py --years 1 3
+"""
+import argparse
+import os
+import sys
+import resource
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+from baseline import StreamingSTL  # noqa: E402
+from common.synthetic import energy_series, iter_chunks  # noqa: E402
+
+MINUTES_PER_YEAR = 365 * 1440
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the streaming seasonal baseline.")
+    parser.add_argument("--years", type=float, nargs="+", default=[1.0, 3.0])
+    parser.add_argument("--period", type=int, default=1440)
+    parser.add_argument("--chunk", type=int, default=1440, help="Samples per historian read.")
+    parser.add_argument("--upset-rate", type=float, default=1 / 5000, help="Upsets per sample.")
+    args = parser.parse_args()
+    energy_series(1)  # warm up imports and allocator before measuring
+    true_profile = 0.08 * np.sin(2 * np.pi * np.arange(args.period) / 1440)
+
+    print(f"{'years':>5} {'samples':>10} {'updates/s':>10} {'state KiB':>9} {'RSS +MiB':>8} "
+          f"{'batch MiB':>9} {'profile err':>11}")
+    for years in args.years:
+        n = int(years * MINUTES_PER_YEAR)
+        stl = StreamingSTL(args.period, level_window=7 * 1440)
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        seconds = 0.0
+        for chunk in iter_chunks("energy", n, args.chunk, anomaly_rate=args.upset_rate, dtype=np.float64):
+            values = chunk["energy_intensity"].to_numpy().tolist()
+            start = time.perf_counter()
+            stl.update_many(values)
+            seconds += time.perf_counter() - start
+        grown = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) * 1024  # ru_maxrss is KiB on Linux
+        error = np.abs(stl.seasonal_profile() - true_profile).max()
+        print(f"{years:>5.1f} {n:>10} {n / seconds:>10.0f} {stl.nbytes / 1024:>9.1f} {grown / 2**20:>8.1f} "
+              f"{n * 8 / 2**20:>9.1f} {error:>11.4f}")
+
+
+if __name__ == "__main__":
+    main()
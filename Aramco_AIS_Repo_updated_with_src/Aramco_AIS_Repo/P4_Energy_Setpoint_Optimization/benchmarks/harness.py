@@ -0,0 +1,58 @@
+"""
+Wall-clock scaling of parallel simulator evaluation with worker count.
+
+A ``SyntheticSimulator`` sleeps ``--delay`` seconds (times 1 + ``--jitter`` * u) per evaluation
+to stand in for a plant simulator run.  The safe Bayesian optimiser spends the same budget with
+each worker count, either in synchronous rounds of ``q = workers`` (every round waits for its
+slowest evaluation) or asynchronously (a new setpoint is proposed as soon as any evaluation
+finishes).  Reports wall time, speedup over one worker, worker utilisation and the regret of the
+recommended setpoint.
+
+Run from the project directory:
+  python benchmarks/harness.py --workers 1 2 4 8 --budget 32 --delay 0.5
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+from train import SyntheticSimulator, optimise_setpoint, simulate_energy_batch  # noqa: E402
+
+MIN_ENERGY = 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parallel simulator evaluation.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--budget", type=int, default=32, help="Evaluations after the baseline.")
+    parser.add_argument("--delay", type=float, default=0.5, help="Nominal seconds per evaluation.")
+    parser.add_argument("--jitter", type=float, default=1.0, help="Relative spread of evaluation time.")
+    parser.add_argument("--dim", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    simulator = SyntheticSimulator(delay=args.delay, jitter=args.jitter, seed=args.seed)
+
+    print(f"{'workers':>7} {'mode':>6} {'seconds':>8} {'speedup':>8} {'utilisation':>11} {'regret':>8}")
+    serial = None
+    for workers in args.workers:
+        for asynchronous in (False, True):
+            if workers == 1 and asynchronous:
+                continue
+            result = optimise_setpoint(
+                max_iter=args.budget, initial=[0.5] * args.dim, threshold=1.5, q=workers, seed=args.seed,
+                simulator=simulator, workers=workers, asynchronous=asynchronous,
+            )
+            stats = result["simulator"]
+            seconds = stats["wall_seconds"]
+            serial = serial or seconds
+            best = np.atleast_1d(result["best_setpoint"]).reshape(1, -1)
+            regret = float(simulate_energy_batch(best, noise_std=0.0)[0]) - MIN_ENERGY
+            mode = "async" if asynchronous else "rounds"
+            print(f"{workers:>7} {mode:>6} {seconds:>8.2f} {serial / seconds:>7.1f}x "
+                  f"{stats['busy_seconds'] / (seconds * workers):>11.0%} {regret:>8.4f}")
+
+
+if __name__ == "__main__":
+    main()
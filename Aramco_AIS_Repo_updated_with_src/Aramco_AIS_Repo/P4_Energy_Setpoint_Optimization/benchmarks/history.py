@@ -0,0 +1,68 @@
+"""
+Simulator evaluations saved by the persistent evaluation store across repeated runs.
+
+Runs the safe Bayesian optimiser ``--runs`` times in the same operating context, ``--days``
+apart, with the same budget.  "cold" starts every run from the safe point alone; "warm" shares
+one ``EvaluationStore`` (temporary SQLite file), so later runs warm-start the surrogate from
+earlier evaluations and reuse stored energies for near-duplicate proposals.  Reports, per run,
+how many simulator evaluations were made and saved and the regret of the recommended setpoint.
+
+Run from the project directory:
+  python benchmarks/history.py --runs 5 --dim 2 --budget 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+from history import EvaluationStore  # noqa: E402
+from train import optimise_setpoint, simulate_energy_batch  # noqa: E402
+
+MIN_ENERGY = 1.0
+
+
+def regret(result: dict) -> float:
+    best = np.atleast_1d(result["best_setpoint"]).reshape(1, -1)
+    return float(simulate_energy_batch(best, noise_std=0.0)[0]) - MIN_ENERGY
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark warm-started optimisation runs.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--dim", type=int, default=2)
+    parser.add_argument("--budget", type=int, default=20, help="Proposals per run after the baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.005, help="Dedup tolerance in setpoint units.")
+    parser.add_argument("--half-life", type=float, default=30.0, help="Days.")
+    parser.add_argument("--days", type=float, default=7.0, help="Days between runs.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    initial = [0.5] * args.dim
+
+    with tempfile.TemporaryDirectory(prefix="history-bench-") as root:
+        path = os.path.join(root, "evaluations.sqlite")
+        start = time.time()
+        print(f"{'run':>3} {'cold evals':>10} {'cold regret':>11} {'warm evals':>10} {'saved':>6} "
+              f"{'history':>7} {'warm regret':>11}")
+        totals = np.zeros(2)
+        for run in range(args.runs):
+            seed = args.seed + run
+            cold = optimise_setpoint(args.budget, initial, threshold=1.5, seed=seed)
+            # each run is --days later, so earlier entries age and are down-weighted
+            now = start + run * args.days * 86400
+            with EvaluationStore(path, {"unit": "bench"}, "synthetic-v1", args.tolerance,
+                                 half_life_days=args.half_life, now=now) as store:
+                warm = optimise_setpoint(args.budget, initial, threshold=1.5, seed=seed, store=store)
+            cold_evals = cold["evaluations"] + 1
+            totals += (cold_evals, warm["simulator_evaluations"])
+            print(f"{run:>3} {cold_evals:>10} {regret(cold):>11.4f} {warm['simulator_evaluations']:>10} "
+                  f"{warm['history']['evaluations_saved']:>6} {warm['history']['loaded']:>7} {regret(warm):>11.4f}")
+        print(f"\nsimulator evaluations: cold {totals[0]:.0f}, warm {totals[1]:.0f} "
+              f"({1 - totals[1] / totals[0]:.0%} saved)")
+
+
+if __name__ == "__main__":
+    main()
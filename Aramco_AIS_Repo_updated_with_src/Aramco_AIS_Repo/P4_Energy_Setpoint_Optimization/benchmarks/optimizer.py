@@ -0,0 +1,93 @@
+"""
+Safe Bayesian optimisation versus random search on the synthetic energy model.
+
+For each setpoint dimension and seed both methods get the same evaluation budget from the same
+safe starting point.  Reports, averaged over seeds, how many evaluations each needed before one
+landed within ``--tolerance`` of the true minimum energy (budget + 1 if never), the regret of the
+recommended setpoint, evaluations above the safety threshold and wall time.  Then times the
+energy model on ``--points`` candidates scored one by one in a Python loop and in one batch call.
+
+Run from the project directory:
+  python benchmarks/optimizer.py --dims 1 3 --seeds 20 --budget 40
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+from optimizer import random_search, safe_bayesian_optimise  # noqa: E402
+from train import simulate_energy_batch, simulate_energy_function  # noqa: E402
+
+OPTIMUM, MIN_ENERGY = 0.6, 1.0
+
+
+def timed(fn):
+    start = time.perf_counter()
+    value = fn()
+    return time.perf_counter() - start, value
+
+
+def true_energy(X: np.ndarray) -> np.ndarray:
+    return simulate_energy_batch(X, noise_std=0.0)
+
+
+def run(method: str, dim: int, budget: int, seed: int, args) -> dict:
+    rng = np.random.default_rng(seed)
+    evaluated = []
+
+    def energy(X):
+        evaluated.append(np.atleast_2d(X))
+        return simulate_energy_batch(X, args.noise, rng)
+
+    initial = [0.5] * dim
+    if method == "random":
+        seconds, result = timed(lambda: random_search(energy, initial, None, budget, rng))
+    else:
+        seconds, result = timed(lambda: safe_bayesian_optimise(
+            energy, initial, None, args.threshold, budget, q=args.q, beta=args.beta, noise_std=args.noise, rng=rng))
+    truth = true_energy(np.vstack(evaluated))
+    hits = np.flatnonzero(truth[1:] <= MIN_ENERGY + args.tolerance)
+    return {
+        "to_optimum": int(hits[0]) + 1 if len(hits) else budget + 1,
+        "regret": float(true_energy(np.atleast_1d(result["best_setpoint"]).reshape(1, -1))[0] - MIN_ENERGY),
+        "unsafe": int((truth[1:] > args.threshold).sum()),
+        "seconds": seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark safe BO against random search.")
+    parser.add_argument("--dims", type=int, nargs="+", default=[1, 3])
+    parser.add_argument("--seeds", type=int, default=20)
+    parser.add_argument("--budget", type=int, default=40, help="Evaluations after the baseline.")
+    parser.add_argument("--q", type=int, default=4)
+    parser.add_argument("--beta", type=float, default=3.0)
+    parser.add_argument("--threshold", type=float, default=1.5)
+    parser.add_argument("--noise", type=float, default=0.02)
+    parser.add_argument("--tolerance", type=float, default=0.02,
+                        help="Energy above the minimum that counts as reached.")
+    parser.add_argument("--points", type=int, default=100_000, help="Candidates for the batch-evaluation timing.")
+    args = parser.parse_args()
+
+    print(f"{'dim':>3} {'method':>8} {'evals to opt':>12} {'reached':>8} {'regret':>8} {'unsafe':>7} {'seconds':>8}")
+    for dim in args.dims:
+        for method in ("random", "safe_bo"):
+            runs = [run(method, dim, args.budget, seed, args) for seed in range(args.seeds)]
+            reached = sum(r["to_optimum"] <= args.budget for r in runs)
+            print(f"{dim:>3} {method:>8} {np.mean([r['to_optimum'] for r in runs]):>12.1f} "
+                  f"{reached:>4}/{args.seeds:<3} {np.mean([r['regret'] for r in runs]):>8.4f} "
+                  f"{sum(r['unsafe'] for r in runs):>7} {np.mean([r['seconds'] for r in runs]):>8.3f}")
+
+    X = np.random.default_rng(0).uniform(size=args.points)
+    rng = np.random.default_rng(0)
+    t_loop, _ = timed(lambda: [simulate_energy_function(x, rng=rng) for x in X])
+    t_batch, _ = timed(lambda: simulate_energy_batch(X, rng=rng))
+    print(f"\nenergy model on {args.points} setpoints: loop {t_loop:.3f}s, batch {t_batch:.4f}s "
+          f"({t_loop / t_batch:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
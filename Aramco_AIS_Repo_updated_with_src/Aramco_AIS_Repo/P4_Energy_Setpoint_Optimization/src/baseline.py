@@ -0,0 +1,152 @@
+"""
+Streaming seasonal baseline for historian energy intensity.
+
+``StreamingSTL`` follows the shape of STL (trend by a moving average, seasonal by smoothing each
+cycle-subseries, robustness weights against outliers) but consumes one sample at a time with
+fixed memory, so the baseline can follow years of 1-minute historian data without re-decomposing
+the whole history:
+
+- a ring buffer of the last ``period`` samples with a running sum gives the centred one-period
+  moving average, which removes the seasonal cycle and is the trend at the buffer's midpoint;
+- one smoothed value per phase of the cycle (the cycle-subseries) is updated from the detrended
+  midpoint sample, and read back with the mean across phases removed so the seasonal component
+  sums to zero over a cycle;
+- residuals beyond ``robust_k`` running mean absolute residuals are down-weighted (Huber-style),
+  the streaming counterpart of STL's robustness iterations, so upsets do not imprint on the
+  seasonal profile;
+- the trend, and so the level, is the moving average of the samples Huber-clipped to within
+  ``robust_k`` mean absolute residuals of the current forecast (a second ring buffer), so upsets
+  do not lift the level either.  Residuals are still reported against the raw samples.
+
+Components are emitted with a delay of ``period // 2`` samples, the half-window the centred
+average needs.  Each update is O(1); once per cycle the running sums are recomputed exactly from
+the buffers (O(period)) so floating-point drift cannot accumulate.  Memory is three float arrays
+of ``period`` entries regardless of how long the stream runs.
+"""
+import math
+from array import array
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+
+class StreamingSTL:
+    """
+    Incremental trend/seasonal/residual decomposition with a single seasonal ``period``.
+
+    ``seasonal_smoothing`` is the weight of the newest cycle in each phase's seasonal estimate
+    (the first cycles are averaged equally).  ``level_window`` is the time constant, in samples,
+    of the exponentially smoothed trend returned by ``baseline``; a week of minutes averages out
+    weekly patterns the daily cycle leaves in the trend.
+    """
+
+    def __init__(
+        self,
+        period: int,
+        seasonal_smoothing: float = 0.1,
+        level_window: Optional[int] = None,
+        robust: bool = True,
+        robust_k: float = 4.0,
+    ):
+        if period < 2:
+            raise ValueError("period must be at least 2 samples")
+        self.period = period
+        self.lag = period // 2
+        self.seasonal_smoothing = seasonal_smoothing
+        self.level_window = level_window or period
+        self.robust = robust
+        self.robust_k = robust_k
+        self._ring = array("d", bytes(8 * period))  # last `period` samples, indexed by t % period
+        self._clipped = array("d", bytes(8 * period))  # the same samples Huber-clipped, for the trend
+        self._seasonal = array("d", bytes(8 * period))  # raw subseries estimates, indexed by phase
+        self._sum = 0.0
+        self._seasonal_sum = 0.0
+        self._scale = 0.0  # running mean absolute residual
+        self._level = math.nan
+        self.n = 0  # samples consumed
+        self.trend = math.nan  # trend at the latest emitted sample
+        self.decomposed = 0  # samples emitted with components
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the state buffers; independent of the number of samples consumed."""
+        return sum(buf.itemsize * len(buf) for buf in (self._ring, self._clipped, self._seasonal))
+
+    def update(self, x: float) -> Optional[Tuple[int, float, float, float]]:
+        """
+        Consume one sample.  Returns (index, trend, seasonal, residual) for the sample
+        ``lag`` steps back, or None while the first cycle fills.
+        """
+        out = self.update_many((x,), components=True)
+        if not len(out):
+            return None
+        index, trend, seasonal, resid = out[-1].tolist()
+        return int(index), trend, seasonal, resid
+
+    def update_many(self, values: Iterable[float], components: bool = False) -> np.ndarray:
+        """
+        Consume samples in order.  With ``components=True`` returns an (m, 4) array of
+        (index, trend, seasonal, residual) rows for the samples that became decomposable;
+        otherwise only the state is updated, which is the fast path for back-filling history.
+        """
+        P, lag, k = self.period, self.lag, self.robust_k
+        ring, clipped, seasonal = self._ring, self._clipped, self._seasonal
+        alpha, robust = self.seasonal_smoothing, self.robust
+        level_rate = 1.0 / self.level_window
+        total, seasonal_total, scale, level = self._sum, self._seasonal_sum, self._scale, self._level
+        n, emitted, trend = self.n, self.decomposed, self.trend
+        first = P - 1 - lag  # index of the first decomposable sample
+        rows = [] if components else None
+        for x in values:
+            i = n % P
+            ring[i] = x
+            if robust and emitted > P:
+                # clip to the forecast for this phase: latest trend plus its seasonal component
+                bound = k * scale
+                forecast = trend + seasonal[i] - seasonal_total / P
+                x = min(max(x, forecast - bound), forecast + bound)
+            total += x - clipped[i]
+            clipped[i] = x
+            n += 1
+            if i == P - 1:  # once per cycle: resync the running sums exactly
+                total = math.fsum(clipped)
+                seasonal_total = math.fsum(seasonal)
+            if n < P:
+                continue
+            c = n - 1 - lag  # midpoint of the window; ring index == phase
+            p = c % P
+            trend = total / P
+            detrended = ring[p] - trend
+            s_prev = seasonal[p]
+            s_now = s_prev - seasonal_total / P
+            resid = detrended - s_now
+            # the first cycles per phase are averaged equally, then exponentially
+            a = max(alpha, 1.0 / ((c - first) // P + 1))
+            size = abs(resid)
+            if robust and emitted > P and size > k * scale:
+                a *= k * scale / size
+                size = k * scale  # an upset must not inflate the scale it is judged by
+            delta = a * (detrended - s_prev)
+            seasonal[p] = s_prev + delta
+            seasonal_total += delta
+            scale += (size - scale) / min(emitted + 1, P)
+            level = trend if emitted == 0 else level + (trend - level) * max(level_rate, 1.0 / (emitted + 1))
+            emitted += 1
+            if rows is not None:
+                rows.append((c, trend, s_now, resid))
+        self._sum, self._seasonal_sum, self._scale, self._level = total, seasonal_total, scale, level
+        self.n, self.decomposed, self.trend = n, emitted, trend
+        return np.array(rows, dtype=float).reshape(-1, 4) if rows is not None else np.empty((0, 4))
+
+    def seasonal_profile(self) -> np.ndarray:
+        """Current seasonal component per phase (t % period), zero-mean over the cycle."""
+        profile = np.frombuffer(self._seasonal, dtype=float).copy()
+        return profile - profile.mean()
+
+    def baseline(self) -> float:
+        """Deseasonalised energy level: the (upset-clipped) trend smoothed over ``level_window`` samples."""
+        return self._level
+
+    def expected(self, t: int) -> float:
+        """Baseline forecast for sample index ``t``: level plus that phase's seasonal component."""
+        return self._level + float(self.seasonal_profile()[t % self.period])
@@ -0,0 +1,245 @@
+"""
+Concurrent evaluation harness for expensive setpoint simulators.
+
+In production a single energy evaluation is a process-simulator or digital-twin run that takes
+seconds to minutes.  ``EvaluationHarness`` runs up to ``workers`` of them at once, each in its
+own process so that one which overruns ``timeout`` can be killed outright (a pool worker stuck
+in a simulator call could not be reclaimed).  A failed or timed-out evaluation is retried up to
+``retries`` times before it is reported as failed; process start-up is negligible next to the
+evaluations this is meant for.
+
+A backend is any picklable callable taking one setpoint vector, shape (d,), and returning the
+energy as a float; ``load_backend`` resolves ``"package.module:callable"`` specs so a plant
+simulator client can be plugged in from the config.
+
+Two ways to drive it:
+
+- ``evaluate`` scores a batch and returns when every point is done, which plugs straight into
+  the synchronous optimisers as their energy model;
+- ``optimise_async`` keeps every worker busy: whenever an evaluation finishes, the result is
+  told to the optimiser and it proposes the next setpoint with the ones still in flight
+  treated as pending, so no worker waits for the slowest member of a batch.
+"""
+import importlib
+import multiprocessing
+import time
+from collections import deque
+from multiprocessing.connection import wait
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+Backend = Callable[[np.ndarray], float]
+
+
+class Evaluation(NamedTuple):
+    job: int
+    setpoint: np.ndarray
+    energy: Optional[float]  # None if every attempt failed
+    attempts: int
+    seconds: float  # wall time of the last attempt
+    error: Optional[str] = None
+
+
+def load_backend(spec: str) -> Backend:
+    """Resolve ``"package.module:callable"`` to the simulator callable it names."""
+    module, _, attr = spec.partition(":")
+    if not module or not attr:
+        raise ValueError(f"Simulator backend must look like 'module:callable', got {spec!r}")
+    backend = getattr(importlib.import_module(module), attr)
+    if not callable(backend):
+        raise TypeError(f"Simulator backend {spec!r} is not callable")
+    return backend
+
+
+def _run(backend: Backend, setpoint: np.ndarray, conn):
+    """Child-process entry point: send back ("ok", energy) or ("error", message)."""
+    try:
+        conn.send(("ok", float(backend(setpoint))))
+    except BaseException as exc:  # report anything, including KeyboardInterrupt in the child
+        conn.send(("error", f"{type(exc).__name__}: {exc}"))
+    finally:
+        conn.close()
+
+
+class _Attempt(NamedTuple):
+    job: int
+    setpoint: np.ndarray
+    attempt: int
+    process: multiprocessing.Process
+    started: float
+
+
+class EvaluationHarness:
+    """
+    Run simulator evaluations in parallel with per-evaluation timeouts and retries.  Use as a
+    context manager (or call ``close``) so that no evaluation process outlives the run.
+    """
+
+    def __init__(
+        self,
+        backend: Backend,
+        workers: int = 1,
+        timeout: Optional[float] = None,
+        retries: int = 0,
+        start_method: Optional[str] = None,
+    ):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.backend = backend
+        self.workers = workers
+        self.timeout = timeout
+        self.retries = retries
+        self._ctx = multiprocessing.get_context(start_method)
+        self._queued: deque = deque()  # (job, setpoint, attempt) waiting for a free worker
+        self._running: Dict[object, _Attempt] = {}  # parent end of the result pipe -> attempt
+        self._next_job = 0
+        self.stats = {"evaluations": 0, "failures": 0, "retries": 0, "timeouts": 0, "busy_seconds": 0.0}
+
+    def __enter__(self) -> "EvaluationHarness":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Kill anything still running and forget queued work."""
+        for conn, attempt in self._running.items():
+            attempt.process.kill()
+            attempt.process.join()
+            conn.close()
+        self._running.clear()
+        self._queued.clear()
+
+    @property
+    def in_flight(self) -> np.ndarray:
+        """Setpoints submitted but not yet finished (queued or running), shape (n, d)."""
+        points = [a.setpoint for a in self._running.values()] + [s for _, s, _ in self._queued]
+        return np.array(points) if points else np.empty((0, 0))
+
+    def __len__(self) -> int:
+        return len(self._running) + len(self._queued)
+
+    def submit(self, setpoint) -> int:
+        """Queue one setpoint vector for evaluation and return its job id."""
+        job = self._next_job
+        self._next_job += 1
+        self._queued.append((job, np.atleast_1d(np.asarray(setpoint, dtype=float)), 1))
+        self._start()
+        return job
+
+    def _start(self):
+        while self._queued and len(self._running) < self.workers:
+            job, setpoint, attempt = self._queued.popleft()
+            parent, child = self._ctx.Pipe(duplex=False)
+            process = self._ctx.Process(target=_run, args=(self.backend, setpoint, child), daemon=True)
+            process.start()
+            child.close()  # only the child writes; EOF on the parent end means it died
+            self._running[parent] = _Attempt(job, setpoint, attempt, process, time.perf_counter())
+
+    def _finish(self, conn, outcome) -> Optional[Evaluation]:
+        """Reap one attempt; returns its Evaluation unless it is being retried."""
+        attempt = self._running.pop(conn)
+        conn.close()
+        attempt.process.join()
+        seconds = time.perf_counter() - attempt.started
+        self.stats["busy_seconds"] += seconds
+        status, value = outcome
+        if status == "ok":
+            self.stats["evaluations"] += 1
+            return Evaluation(attempt.job, attempt.setpoint, value, attempt.attempt, seconds)
+        if attempt.attempt <= self.retries:
+            self.stats["retries"] += 1
+            self._queued.append((attempt.job, attempt.setpoint, attempt.attempt + 1))
+            return None
+        self.stats["failures"] += 1
+        return Evaluation(attempt.job, attempt.setpoint, None, attempt.attempt, seconds, value)
+
+    def poll(self, timeout: Optional[float] = None) -> List[Evaluation]:
+        """
+        Wait until at least one evaluation finishes for good (or ``timeout`` seconds pass) and
+        return everything that did.  Overrunning attempts are killed and retried or failed.
+        """
+        done: List[Evaluation] = []
+        give_up = None if timeout is None else time.perf_counter() + timeout
+        while not done and self._running:
+            now = time.perf_counter()
+            deadlines = [a.started + self.timeout for a in self._running.values()] if self.timeout else []
+            if give_up is not None:
+                deadlines.append(give_up)
+            ready = wait(list(self._running), timeout=max(min(deadlines) - now, 0.0) if deadlines else None)
+            for conn in ready:
+                try:
+                    outcome = conn.recv()
+                except EOFError:  # died without reporting, e.g. killed or crashed in native code
+                    process = self._running[conn].process
+                    process.join()
+                    outcome = ("error", f"simulator process exited with code {process.exitcode}")
+                evaluation = self._finish(conn, outcome)
+                if evaluation is not None:
+                    done.append(evaluation)
+            if self.timeout:
+                now = time.perf_counter()
+                for conn, attempt in list(self._running.items()):
+                    if conn not in ready and now - attempt.started >= self.timeout:
+                        attempt.process.kill()
+                        self.stats["timeouts"] += 1
+                        evaluation = self._finish(conn, ("error", f"timed out after {self.timeout:g}s"))
+                        if evaluation is not None:
+                            done.append(evaluation)
+            self._start()
+            if give_up is not None and time.perf_counter() >= give_up:
+                break
+        return done
+
+    def evaluate(self, setpoints) -> np.ndarray:
+        """
+        Evaluate a batch of setpoints, shape (n, d), in parallel and return energies in the same
+        order; NaN marks an evaluation that failed on every attempt.
+        """
+        setpoints = np.asarray(setpoints, dtype=float)
+        setpoints = setpoints.reshape(len(setpoints), -1)
+        jobs = {self.submit(x): i for i, x in enumerate(setpoints)}
+        energies = np.full(len(setpoints), np.nan)
+        remaining = len(jobs)
+        while remaining:
+            for evaluation in self.poll():
+                if evaluation.job in jobs:
+                    remaining -= 1
+                    if evaluation.energy is not None:
+                        energies[jobs[evaluation.job]] = evaluation.energy
+        return energies
+
+
+def optimise_async(harness: EvaluationHarness, optimizer, max_iter: int, store=None) -> int:
+    """
+    Drive an ask/tell optimiser with ``max_iter`` evaluations, keeping ``harness.workers`` of
+    them in flight: each finished evaluation is told immediately and replaced by a new proposal
+    conditioned on the ones still running.  With a ``history.EvaluationStore``, proposals come
+    from ``store.ask``: near-duplicates of earlier runs' evaluations use up budget without being
+    simulated, and new results are appended to the store.  The optimiser must already hold its safe starting point.
+    Returns the number of evaluations that failed on every attempt.
+    """
+    submitted = failed = 0
+    while submitted < max_iter or len(harness):
+        free = min(harness.workers - len(harness), max_iter - submitted)
+        if free > 0:
+            pending = harness.in_flight
+            pending = pending if len(pending) else None
+            if store is not None:
+                proposals = store.ask(optimizer, free, pending=pending)
+            else:
+                proposals = optimizer.ask(free, pending=pending)
+            submitted += free
+            for x in proposals:
+                harness.submit(x)
+            if not len(harness):
+                continue
+        for evaluation in harness.poll():
+            if evaluation.energy is None:
+                failed += 1
+                continue
+            optimizer.tell(evaluation.setpoint[None, :], [evaluation.energy])
+            if store is not None:
+                store.append(evaluation.setpoint[None, :], [evaluation.energy])
+    return failed
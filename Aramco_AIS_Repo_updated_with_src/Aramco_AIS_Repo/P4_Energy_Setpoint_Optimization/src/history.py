@@ -0,0 +1,214 @@
+"""
+Persistent store of simulator evaluations shared across optimisation runs.
+
+Plant evaluations are expensive, so every one is appended to a SQLite file together with the
+operating context it was made in (feed, ambient, equipment state; any JSON-able dict) and the
+simulator version that produced it.  A run opens the store for one (context, version) pair and:
+
+- warm-starts the surrogate from the matching history, so it does not relearn the energy
+  surface from the safe point every time;
+- answers a proposed setpoint that lies within ``tolerance`` of one stored by an earlier run
+  (per dimension, in setpoint units) from the store instead of evaluating it.  A stored entry is
+  told to the surrogate at most once (as an aged prior row, never as a fresh observation), the
+  proposal is skipped, the entry is avoided from then on, and it counts as a saved evaluation rather than
+  a spent one.
+  Setpoints the run itself evaluated are kept out of its proposals rather than answered from
+  the store, and re-measurements the optimiser asks for explicitly are always evaluated;
+- treats old entries as less reliable: the observation noise variance of an entry doubles with
+  every ``half_life_days`` of age when it warm-starts the surrogate, only entries younger than one
+  half-life are reused in place of an evaluation, and entries older than ``max_age_days`` are
+  deleted when the store is opened.
+
+Rows are only ever inserted (or evicted by age), never updated, so concurrent runs can append
+to the same file; WAL mode lets them read while another writes.
+"""
+import json
+import os
+import sqlite3
+import time
+import uuid
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+DAY = 86400.0
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS evaluations (
+    id INTEGER PRIMARY KEY,
+    context TEXT NOT NULL,
+    simulator_version TEXT NOT NULL,
+    setpoint TEXT NOT NULL,
+    energy REAL NOT NULL,
+    recorded_at REAL NOT NULL,
+    run_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS evaluations_key ON evaluations (context, simulator_version, recorded_at);
+"""
+
+
+def context_key(context: Optional[dict]) -> str:
+    """Canonical JSON for an operating context, so equal dicts always match."""
+    return json.dumps(context or {}, sort_keys=True, separators=(",", ":"))
+
+
+class EvaluationStore:
+    """
+    Evaluations for one operating context and simulator version, loaded into memory when opened
+    and appended to both memory and disk as the run goes.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        context: Optional[dict] = None,
+        simulator_version: str = "",
+        tolerance=0.0,
+        half_life_days: Optional[float] = None,
+        max_age_days: Optional[float] = None,
+        now: Optional[float] = None,
+    ):
+        self.path = path
+        self.context = context_key(context)
+        self.simulator_version = str(simulator_version)
+        self.tolerance = np.asarray(tolerance, dtype=float)
+        self.half_life_days = half_life_days
+        self.run_id = uuid.uuid4().hex[:12]
+        self.stats = {"loaded": 0, "evicted": 0, "reused": 0, "duplicates": 0, "stored": 0}
+        # one timestamp per run: ages are measured from it and new rows are recorded at it
+        self.now = now = time.time() if now is None else now
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        if max_age_days is not None:
+            with self._db:
+                cursor = self._db.execute("DELETE FROM evaluations WHERE recorded_at < ?", (now - max_age_days * DAY,))
+            self.stats["evicted"] = cursor.rowcount
+        rows = self._db.execute(
+            "SELECT setpoint, energy, recorded_at FROM evaluations"
+            " WHERE context = ? AND simulator_version = ? ORDER BY id",
+            (self.context, self.simulator_version),
+        ).fetchall()
+        self.X = np.array([json.loads(r[0]) for r in rows], dtype=float) if rows else np.empty((0, 0))
+        self.y = np.array([r[1] for r in rows], dtype=float)
+        self.recorded_at = np.array([r[2] for r in rows], dtype=float)
+        self.stats["loaded"] = len(rows)
+        self._history = len(rows)  # rows loaded from earlier runs; warm start uses only these
+        self._told = np.zeros(len(rows), dtype=bool)  # rows the optimiser already holds
+        self._avoid: List[np.ndarray] = []  # stored entries that answered a proposal this run
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self) -> "EvaluationStore":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def age_days(self) -> np.ndarray:
+        return (self.now - self.recorded_at) / DAY
+
+    def noise_scale(self, age_days: np.ndarray) -> np.ndarray:
+        """Factor on the observation noise variance for entries of the given age."""
+        if not self.half_life_days:
+            return np.ones_like(age_days)
+        return 2.0 ** (np.maximum(age_days, 0.0) / self.half_life_days)
+
+    def warm_start(self, dim: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """History from earlier runs as (X, y, noise_scale), for ``SafeBayesianOptimizer.tell``."""
+        n = self._history if self.X.shape[1:] == (dim,) else 0
+        self._told[:n] = True
+        return self.X[:n], self.y[:n], self.noise_scale(self.age_days()[:n])
+
+    def match(self, X: np.ndarray) -> np.ndarray:
+        """
+        Row of the most recent fresh entry within ``tolerance`` of each row of ``X`` (all
+        dimensions), -1 where there is none.
+        """
+        X = np.asarray(X, dtype=float)
+        found = np.full(len(X), -1)
+        if not len(self.y) or self.X.shape[1] != X.shape[1]:
+            return found
+        fresh = np.ones(len(self.y), dtype=bool)
+        if self.half_life_days:
+            fresh = self.age_days() <= self.half_life_days
+        close = (np.abs(X[:, None, :] - self.X[None, :, :]) <= self.tolerance + 1e-12).all(axis=2) & fresh
+        hit = close.any(axis=1)
+        # most recent match: last True along each row
+        latest = len(self.y) - 1 - np.argmax(close[:, ::-1], axis=1)
+        found[hit] = latest[hit]
+        return found
+
+    def lookup(self, X: np.ndarray) -> np.ndarray:
+        """Stored energy of each row's ``match``, NaN where there is none."""
+        rows = self.match(X)
+        return np.where(rows >= 0, self.y[np.maximum(rows, 0)] if len(self.y) else np.nan, np.nan)
+
+    def append(self, X: np.ndarray, y: np.ndarray):
+        """Record evaluated setpoints; NaN energies (failed evaluations) are skipped."""
+        X, y = np.asarray(X, dtype=float).reshape(len(y), -1), np.asarray(y, dtype=float)
+        ok = ~np.isnan(y)
+        if not ok.any():
+            return
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO evaluations (context, simulator_version, setpoint, energy, recorded_at, run_id)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (self.context, self.simulator_version, json.dumps(x.tolist()), float(e), self.now, self.run_id)
+                    for x, e in zip(X[ok], y[ok])
+                ],
+            )
+        if len(self.y) and self.X.shape[1] != X.shape[1]:
+            # a run in a new setpoint space: keep only its own rows in memory
+            self.X, self.y, self.recorded_at, self._history = X[:0], y[:0], self.recorded_at[:0], 0
+            self._told = self._told[:0]
+        self.X = np.vstack([self.X.reshape(len(self.y), X.shape[1]), X[ok]])
+        self.y = np.concatenate([self.y, y[ok]])
+        self.recorded_at = np.concatenate([self.recorded_at, np.full(int(ok.sum()), self.now)])
+        # appended rows are this run's evaluations, which the caller tells the optimiser
+        self._told = np.concatenate([self._told, np.ones(int(ok.sum()), dtype=bool)])
+        self.stats["stored"] += int(ok.sum())
+
+    def recording(self, energy: Callable[[np.ndarray], np.ndarray]) -> Callable[[np.ndarray], np.ndarray]:
+        """Wrap a batch energy model so every evaluation is appended to the store."""
+
+        def evaluate(X) -> np.ndarray:
+            X = np.asarray(X, dtype=float)
+            X = X.reshape(len(X), -1)
+            y = np.asarray(energy(X), dtype=float)
+            self.append(X, y)
+            return y
+
+        return evaluate
+
+    def ask(self, optimizer, q: int, pending: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        ``optimizer.ask`` without the proposals a fresh stored entry from an earlier run already
+        answers.  Those count as saved evaluations and their entries are avoided by later
+        proposals, so one entry saves at most one evaluation per run; entries the optimiser does
+        not hold yet are told to it as prior rows with their age's noise scale, never as fresh
+        observations.  Setpoints this run has evaluated are avoided too, so the optimiser spends
+        its budget elsewhere instead of having them answered from the store; a proposal that still
+        lands on one counts as a duplicate and is evaluated.  Returns the proposals that still need
+        evaluating, possibly none.  When the optimiser asks to re-measure its best setpoint, its
+        proposals are returned as they are.
+        """
+        avoid = self._avoid + ([self.X[self._history:]] if len(self.y) > self._history else [])
+        avoid = np.vstack(avoid) if avoid else None
+        proposals = optimizer.ask(q, pending=pending, avoid=avoid, radius=self.tolerance)
+        if optimizer.remeasuring:
+            return proposals
+        rows = self.match(proposals)
+        self.stats["duplicates"] += int((rows >= self._history).sum())
+        hit = (rows >= 0) & (rows < self._history)
+        if hit.any():
+            self.stats["reused"] += int(hit.sum())
+            self._avoid.append(self.X[rows[hit]])
+            untold = np.unique(rows[hit][~self._told[rows[hit]]])
+            if len(untold):
+                self._told[untold] = True
+                optimizer.tell(self.X[untold], self.y[untold], self.noise_scale(self.age_days()[untold]), prior=True)
+        return proposals[~hit]
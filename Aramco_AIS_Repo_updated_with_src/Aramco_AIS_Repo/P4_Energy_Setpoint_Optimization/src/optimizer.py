@@ -0,0 +1,322 @@
+"""
+Setpoint optimisation engine.
+
+Every optimiser here works on whole arrays of candidate setpoints, shape (n, d) in the units of
+``bounds``, and on an energy model that scores such an array in one vectorised call.  Two
+strategies share that interface:
+
+- ``random_search`` draws the whole budget at once and keeps the lowest observed energy, the
+  original baseline;
+- ``SafeBayesianOptimizer`` fits a Gaussian-process surrogate to the evaluations so far and
+  proposes ``q`` setpoints per round, SafeOpt-style: a candidate is admissible only if the
+  upper confidence bound of its energy stays below the safety threshold, and among admissible
+  candidates that could still be the minimum the most uncertain is evaluated next.  Batches are
+  filled with the kriging believer: each pick is added to the surrogate at its predicted mean,
+  which shrinks the uncertainty around it so the next pick goes elsewhere.
+
+The surrogate is a small NumPy GP (RBF kernel, length scale chosen by marginal likelihood on a
+grid), which is ample for the few hundred evaluations a plant study affords and keeps the engine
+free of heavy dependencies.
+"""
+from typing import Callable, Optional, Sequence, Tuple
+
+import numpy as np
+
+EnergyModel = Callable[[np.ndarray], np.ndarray]
+# Candidate RBF length scales (unit-cube inputs).  Longer ones extrapolate trends confidently
+# past the data, which is exactly what a safe optimiser must not do.
+LENGTH_SCALES = (0.05, 0.1, 0.2, 0.3)
+
+
+def as_bounds(bounds, dim: int) -> np.ndarray:
+    """(d, 2) array of [low, high] per dimension; one pair is broadcast to every dimension."""
+    bounds = np.asarray(bounds if bounds is not None else [[0.0, 1.0]], dtype=float).reshape(-1, 2)
+    if len(bounds) == 1 and dim > 1:
+        bounds = np.repeat(bounds, dim, axis=0)
+    if len(bounds) != dim or np.any(bounds[:, 1] <= bounds[:, 0]):
+        raise ValueError(f"Expected {dim} increasing [low, high] bounds, got {bounds.tolist()}")
+    return bounds
+
+
+def as_points(x, dim: Optional[int] = None) -> np.ndarray:
+    """Setpoints as a float (n, d) array; a scalar or a 1-D array of scalars is n points in 1-D."""
+    x = np.asarray(x, dtype=float)
+    if x.ndim == 0:
+        return x.reshape(1, 1)
+    if x.ndim == 1:
+        return x.reshape(-1, 1) if dim in (None, 1) else x.reshape(1, -1)
+    return x
+
+
+def rbf_kernel(a: np.ndarray, b: np.ndarray, length_scale: float) -> np.ndarray:
+    sq = (a * a).sum(1)[:, None] + (b * b).sum(1)[None, :] - 2.0 * a @ b.T
+    return np.exp(-0.5 * np.maximum(sq, 0.0) / length_scale ** 2)
+
+
+class GaussianProcess:
+    """
+    Zero-mean GP on inputs scaled to the unit cube and standardised outputs.  ``fit`` picks the
+    RBF length scale with the highest log marginal likelihood from ``LENGTH_SCALES``.
+
+    ``signal_std`` is a floor on the prior spread of the response.  Safe optimisation needs it:
+    the first few evaluations all sit near the safe point and vary by little more than noise,
+    and scaling the prior by their spread alone would declare the whole envelope safe.
+    """
+
+    def __init__(self, noise_std: float = 0.02, length_scale: Optional[float] = None, signal_std: float = 0.0):
+        self.noise_std = noise_std
+        self.length_scale = length_scale
+        self.signal_std = signal_std
+
+    def fit(self, X: np.ndarray, y: np.ndarray, noise_scale: Optional[np.ndarray] = None) -> "GaussianProcess":
+        """``noise_scale`` multiplies the noise variance per observation, e.g. for stale history."""
+        self._noise_scale = np.ones(len(y)) if noise_scale is None else np.asarray(noise_scale, dtype=float)
+        self.y_mean = float(y.mean())
+        self.y_std = max(float(y.std()), self.signal_std) if len(y) > 1 else max(self.signal_std, 1e-3)
+        # measurement noise in standardised units, floored for numerical stability
+        self._noise = max((self.noise_std / self.y_std) ** 2, 1e-6)
+        scales = LENGTH_SCALES if self.length_scale is None else (self.length_scale,)
+        return self._factor(X, (y - self.y_mean) / self.y_std, scales)
+
+    def _factor(self, X: np.ndarray, z: np.ndarray, scales: Sequence[float]) -> "GaussianProcess":
+        best = None
+        for scale in scales:
+            K = rbf_kernel(X, X, scale) + np.diag(self._noise * self._noise_scale)
+            try:
+                L = np.linalg.cholesky(K)
+            except np.linalg.LinAlgError:
+                continue
+            alpha = np.linalg.solve(L.T, np.linalg.solve(L, z))
+            log_likelihood = -0.5 * z @ alpha - np.log(np.diag(L)).sum()
+            if best is None or log_likelihood > best[0]:
+                best = (log_likelihood, scale, L, alpha)
+        if best is None:
+            raise np.linalg.LinAlgError("GP kernel matrix is not positive definite for any length scale")
+        _, self.fitted_length_scale, self._L, self._alpha = best
+        self.X, self._z = X, z
+        return self
+
+    def predict(self, C: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Posterior mean and standard deviation of the energy at candidates ``C``."""
+        Ks = rbf_kernel(C, self.X, self.fitted_length_scale)
+        mean = Ks @ self._alpha
+        v = np.linalg.solve(self._L, Ks.T)
+        var = np.maximum(1.0 - (v * v).sum(0), 1e-12)
+        return self.y_mean + self.y_std * mean, self.y_std * np.sqrt(var)
+
+    def condition(self, x: np.ndarray, y: np.ndarray) -> "GaussianProcess":
+        """
+        A copy conditioned on extra (possibly fantasised) observations.  Hyperparameters and
+        output scaling are kept, so fantasies only shrink the uncertainty around ``x``.
+        """
+        gp = GaussianProcess(self.noise_std, self.fitted_length_scale, self.signal_std)
+        gp.y_mean, gp.y_std, gp._noise = self.y_mean, self.y_std, self._noise
+        gp._noise_scale = np.concatenate([self._noise_scale, np.ones(len(x))])
+        z = np.concatenate([self._z, (np.asarray(y, dtype=float) - self.y_mean) / self.y_std])
+        return gp._factor(np.vstack([self.X, x]), z, (self.fitted_length_scale,))
+
+
+def random_search(
+    energy: EnergyModel, initial: Sequence[float], bounds, max_iter: int, rng: np.random.Generator
+) -> dict:
+    """Evaluate ``max_iter`` uniform candidates in one batch and keep the lowest observed energy."""
+    x0 = as_points(initial, len(np.atleast_1d(initial)))
+    bounds = as_bounds(bounds, x0.shape[1])
+    X = np.vstack([x0, rng.uniform(bounds[:, 0], bounds[:, 1], size=(max_iter, x0.shape[1]))])
+    y = energy(X)
+    if np.isnan(y[0]):
+        raise RuntimeError("Evaluating the initial safe setpoint failed")
+    ok = ~np.isnan(y)
+    return summarise(X[ok], y[ok], int(np.argmin(y[ok])), failed_evaluations=int((~ok).sum()))
+
+
+def summarise(X: np.ndarray, y: np.ndarray, best: int, evaluations: Optional[int] = None, **extra) -> dict:
+    """
+    The result dict written to ``models/best_setpoint.json``; row 0 is the baseline and
+    ``evaluations`` defaults to every other row.
+    """
+    point = lambda x: float(x[0]) if len(x) == 1 else [float(v) for v in x]  # noqa: E731
+    return {
+        "baseline_setpoint": point(X[0]),
+        "baseline_energy": float(y[0]),
+        "best_setpoint": point(X[best]),
+        "best_energy": float(y[best]),
+        "evaluations": int(len(y) - 1 if evaluations is None else evaluations),  # successful, after the baseline
+        **extra,
+    }
+
+
+class SafeBayesianOptimizer:
+    """
+    Ask/tell safe Bayesian optimiser for minimising energy.  ``threshold`` is the highest energy
+    (or other monitored response) a proposed setpoint may plausibly reach: candidates with
+    ``mean + beta * std > threshold`` are never proposed.  Start it with ``tell`` on the known
+    safe operating point.  ``signal_std`` is the prior spread of the energy across the envelope;
+    by default the margin between the first observation and the threshold.
+    """
+
+    def __init__(
+        self,
+        bounds,
+        threshold: float,
+        beta: float = 3.0,
+        noise_std: float = 0.02,
+        signal_std: Optional[float] = None,
+        n_candidates: int = 2048,
+        rng: Optional[np.random.Generator] = None,
+    ):
+        self.bounds = np.asarray(bounds, dtype=float)
+        self.dim = len(self.bounds)
+        self.threshold = threshold
+        self.beta = beta
+        self.noise_std = noise_std
+        self.signal_std = signal_std
+        self.n_candidates = n_candidates
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.X = np.empty((0, self.dim))
+        self.y = np.empty(0)
+        self.noise_scale = np.empty(0)
+        self.prior = np.empty(0, dtype=bool)  # rows told from earlier runs rather than evaluated now
+        self.gp: Optional[GaussianProcess] = None
+        self.remeasuring = False  # the last ask() fell back to re-measuring the best setpoint
+
+    def _scale(self, X: np.ndarray) -> np.ndarray:
+        return (X - self.bounds[:, 0]) / (self.bounds[:, 1] - self.bounds[:, 0])
+
+    def _unscale(self, U: np.ndarray) -> np.ndarray:
+        return self.bounds[:, 0] + U * (self.bounds[:, 1] - self.bounds[:, 0])
+
+    def tell(self, X, y, noise_scale: Optional[np.ndarray] = None, prior: bool = False):
+        """
+        Add evaluated setpoints ``X`` (n, d) and their energies ``y`` and refit the surrogate.
+        NaN energies (failed evaluations) are dropped.  ``prior=True`` marks evaluations from
+        earlier runs (warm start), with ``noise_scale`` inflating their noise variance; they
+        inform the surrogate but are not counted as this run's evaluations.
+        """
+        X, y = as_points(X, self.dim), np.asarray(y, dtype=float).ravel()
+        scale = np.ones(len(y)) if noise_scale is None else np.asarray(noise_scale, dtype=float)
+        ok = ~np.isnan(y)
+        if not self.y.size and not ok[:1].all():
+            raise RuntimeError("Evaluating the initial safe setpoint failed")
+        self.X = np.vstack([self.X, X[ok]])
+        self.y = np.concatenate([self.y, y[ok]])
+        self.noise_scale = np.concatenate([self.noise_scale, scale[ok]])
+        self.prior = np.concatenate([self.prior, np.full(int(ok.sum()), prior)])
+        if self.signal_std is None:
+            self.signal_std = max(self.threshold - float(self.y[0]), self.noise_std)
+        self.gp = GaussianProcess(self.noise_std, signal_std=self.signal_std)
+        self.gp.fit(self._scale(self.X), self.y, self.noise_scale)
+
+    def candidates(self) -> np.ndarray:
+        """Candidate set in unit coordinates: a grid in 1-D, otherwise uniform plus local samples."""
+        if self.dim == 1:
+            return np.linspace(0.0, 1.0, self.n_candidates).reshape(-1, 1)
+        n_local = self.n_candidates // 4
+        # local samples around the safe observations help the safe set grow in high dimensions
+        observed_safe = self.y <= self.threshold
+        safe = self._scale(self.X[observed_safe] if observed_safe.any() else self.X)
+        centres = safe[self.rng.integers(len(safe), size=n_local)]
+        local = np.clip(centres + self.rng.normal(0.0, 0.05, size=centres.shape), 0.0, 1.0)
+        return np.vstack([self.rng.uniform(size=(self.n_candidates - n_local, self.dim)), local])
+
+    def ask(
+        self, q: int = 1, pending: Optional[np.ndarray] = None, avoid: Optional[np.ndarray] = None, radius=0.0
+    ) -> np.ndarray:
+        """
+        Propose ``q`` setpoints (q, d) to evaluate next.  ``pending`` are setpoints already
+        being evaluated; they are fantasised like earlier batch members so proposals avoid them.
+        Candidates within ``radius`` (per dimension, setpoint units) of any ``avoid`` setpoint
+        are not proposed.  If nothing is provably safe, the best evaluated setpoint is proposed
+        for re-measurement and ``remeasuring`` is set.
+        """
+        if self.gp is None:
+            raise RuntimeError("Call tell() with the initial safe point before ask().")
+        C = self.candidates()
+        if avoid is not None and len(avoid):
+            span = self.bounds[:, 1] - self.bounds[:, 0]
+            A = self._scale(as_points(avoid, self.dim))
+            near = (np.abs(C[:, None, :] - A[None, :, :]) <= np.asarray(radius) / span + 1e-12).all(axis=2)
+            C = C[~near.any(axis=1)]
+        mean, std = self.gp.predict(C)
+        upper, lower = mean + self.beta * std, mean - self.beta * std
+        # safety is judged on real observations only; fantasies below just steer the batch
+        safe = upper <= self.threshold
+        self.remeasuring = not safe.any()
+        if self.remeasuring:
+            # nothing is provably safe: re-measure the best evaluated setpoint
+            return np.repeat(self.X[np.argmin(self.y)][None, :], q, axis=0)
+        # potential minimisers: safe candidates whose optimistic energy beats the best pessimistic one
+        minimisers = np.flatnonzero(safe & (lower <= upper[safe].min()))
+        gp, picks = self.gp, []
+        if pending is not None and len(pending):
+            U = self._scale(as_points(pending, self.dim))
+            gp = gp.condition(U, gp.predict(U)[0])
+        for _ in range(min(q, len(minimisers))):
+            _, std = gp.predict(C[minimisers])
+            j = int(np.argmax(std))
+            picks.append(C[minimisers[j]])
+            # kriging believer: pretend the pick returned its predicted mean
+            gp = gp.condition(C[minimisers[j]][None, :], mean[minimisers[j]:minimisers[j] + 1])
+            minimisers = np.delete(minimisers, j)
+        while len(picks) < q:
+            picks.append(picks[-1])
+        return self._unscale(np.asarray(picks))
+
+    def best(self) -> int:
+        """Index of the evaluated setpoint with the lowest posterior mean (robust to noise)."""
+        mean, _ = self.gp.predict(self._scale(self.X))
+        return int(np.argmin(mean))
+
+    def result(self, **extra) -> dict:
+        """
+        Summary of the run so far; row 0 must be the initial safe setpoint.  ``best_energy`` is
+        the single noisy observation there, ``best_energy_estimate`` the posterior mean.
+        """
+        own = ~self.prior
+        own[0] = False
+        best = self.best()
+        estimate = float(self.gp.predict(self._scale(self.X[best:best + 1]))[0][0])
+        return summarise(
+            self.X, self.y, best, evaluations=int(own.sum()),
+            unsafe_evaluations=int((self.y[own] > self.threshold).sum()), best_energy_estimate=estimate, **extra
+        )
+
+
+def safe_bayesian_optimise(
+    energy: EnergyModel,
+    initial: Sequence[float],
+    bounds,
+    threshold: float,
+    max_iter: int,
+    q: int = 4,
+    beta: float = 3.0,
+    noise_std: float = 0.02,
+    rng: Optional[np.random.Generator] = None,
+    warm_start: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None,
+    initial_energy: Optional[np.ndarray] = None,
+    propose: Optional[Callable[["SafeBayesianOptimizer", int], np.ndarray]] = None,
+) -> dict:
+    """
+    Run ``SafeBayesianOptimizer`` for ``max_iter`` evaluations in rounds of ``q``, starting from
+    the safe ``initial`` setpoint.  Each round's batch is evaluated in one ``energy`` call, which
+    may return NaN for failed evaluations; those still count against the budget.  ``warm_start``
+    is (X, y, noise_scale) from earlier runs, told to the surrogate after the baseline.
+    ``initial_energy`` is the baseline's energy if the caller has already evaluated it.
+    ``propose(opt, n)`` replaces ``opt.ask(n)``, e.g. ``EvaluationStore.ask``; it may return
+    fewer than ``n`` setpoints, and the ones it answered itself still count against the budget
+    but are neither evaluated nor counted as evaluations.
+    """
+    x0 = as_points(initial, len(np.atleast_1d(initial)))
+    opt = SafeBayesianOptimizer(as_bounds(bounds, x0.shape[1]), threshold, beta, noise_std, rng=rng)
+    opt.tell(x0, energy(x0) if initial_energy is None else np.asarray(initial_energy, dtype=float))
+    if warm_start is not None and len(warm_start[1]):
+        opt.tell(*warm_start, prior=True)
+    spent = evaluated = 0
+    while spent < max_iter:
+        n = min(q, max_iter - spent)
+        batch = opt.ask(n) if propose is None else propose(opt, n)
+        if len(batch):
+            opt.tell(batch, energy(batch))
+        spent += n
+        evaluated += len(batch)
+    return opt.result(rounds=int(np.ceil(max_iter / q)), failed_evaluations=evaluated - int((~opt.prior[1:]).sum()))
@@ -0,0 +1,99 @@
+"""
+Streaming changepoint detection against the batch PELT path on simulated flare flow.
+
+For each series length (``--days`` of 1-minute samples from ``simulate_flare_data``, with
+``--events-per-day`` injected flaring events) reports, per detector:
+
+- samples/sec: for the online detector, samples pushed one at a time; for batch PELT (RBF cost),
+  the whole series divided by the fit time.  PELT is skipped above ``--max-batch`` samples, where
+  its O(n^2) Gram matrix stops fitting in memory;
+- events detected, counting a changepoint inside the event window;
+- location delay: changepoint index minus event start, averaged over detected events;
+- alarm delay: samples from event start until the alarm can be raised.  The online detector
+  raises it when the changepoint is emitted; batch PELT only once the series ends and the fit
+  returns, so its delay grows with the batch length;
+- false alarms: changepoints more than ``max_delay`` samples from any event window;
+- the online detector's worst emission latency (emitted - located), bounded by ``max_delay``,
+  and its state size, which does not grow with the series.
+
+Run from the project directory:
+  python benchmarks/online_changepoint.py --days 2 7 30
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+from online import OnlineChangepointDetector  # noqa: E402
+from train import changepoint_detector, simulate_flare_data  # noqa: E402
+
+
+def score(located, alarms, events, margin):
+    """(detected, mean location delay, mean alarm delay, false alarms) for one detector."""
+    located, alarms = np.asarray(located), np.asarray(alarms)
+    loc_delays, alarm_delays = [], []
+    near = np.zeros(len(located), dtype=bool)
+    for ev in events:
+        end = ev.start + ev.duration
+        near |= (located >= ev.start - margin) & (located < end + margin)
+        inside = np.flatnonzero((located >= ev.start) & (located < end))
+        if len(inside):
+            loc_delays.append(located[inside[0]] - ev.start)
+            alarm_delays.append(alarms[inside[0]] - ev.start)
+    mean = lambda d: float(np.mean(d)) if d else float("nan")  # noqa: E731
+    return len(loc_delays), mean(loc_delays), mean(alarm_delays), int((~near).sum())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark online vs batch changepoint detection.")
+    parser.add_argument("--days", type=float, nargs="+", default=[2.0, 7.0, 30.0])
+    parser.add_argument("--events-per-day", type=float, default=2.0)
+    parser.add_argument("--penalty", type=float, default=3.0, help="PELT penalty.")
+    parser.add_argument("--max-batch", type=int, default=6000, help="Longest series given to batch PELT.")
+    parser.add_argument("--hazard", type=float, default=1e-3)
+    parser.add_argument("--max-delay", type=int, default=30)
+    parser.add_argument("--max-runs", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=13)
+    args = parser.parse_args()
+
+    print(f"{'days':>5} {'samples':>8} {'method':>6} {'samples/s':>10} {'detected':>8} {'loc delay':>9} "
+          f"{'alarm delay':>11} {'false':>5} {'max lat':>7} {'state KiB':>9}")
+    for days in args.days:
+        n = int(days * 1440)
+        n_events = max(1, int(round(days * args.events_per_day)))
+        series, _, events = simulate_flare_data(n_samples=n, n_anomalies=n_events, seed=args.seed)
+        detector = OnlineChangepointDetector(
+            hazard=args.hazard, max_delay=args.max_delay, max_runs=args.max_runs
+        )
+        values = series.to_numpy().tolist()
+        start = time.perf_counter()
+        cps = detector.process(values)
+        seconds = time.perf_counter() - start
+        detected, loc, alarm, false = score(
+            [c.index for c in cps], [c.emitted_at for c in cps], events, args.max_delay
+        )
+        latency = max((c.emitted_at - c.index for c in cps), default=0)
+        print(f"{days:>5.0f} {n:>8} {'online':>6} {n / seconds:>10.0f} "
+              f"{f'{detected}/{len(events)}':>8} {loc:>9.1f} {alarm:>11.1f} {false:>5} "
+              f"{latency:>7} {detector.nbytes / 1024:>9.1f}")
+
+        if n > args.max_batch:
+            gram = n * n * 8 / 2**30
+            print(f"{days:>5.0f} {n:>8} {'pelt':>6}  skipped: the RBF Gram matrix alone needs {gram:.1f} GiB")
+            continue
+        start = time.perf_counter()
+        bkps = changepoint_detector(series, penalty=args.penalty)
+        seconds = time.perf_counter() - start
+        # a batch result exists only after the last sample has arrived and the fit has run
+        ready = n - 1 + int(np.ceil(seconds / 60.0))
+        detected, loc, alarm, false = score(bkps, [ready] * len(bkps), events, args.max_delay)
+        print(f"{days:>5.0f} {n:>8} {'pelt':>6} {n / seconds:>10.0f} "
+              f"{f'{detected}/{len(events)}':>8} {loc:>9.1f} {alarm:>11.1f} {false:>5} "
+              f"{'-':>7} {n * n * 8 / 2**10:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Runtime and memory of the PELT changepoint paths from 1e3 to 1e6 samples of flare flow.
+
+For each ``--sizes`` entry, simulates that many 1-minute samples with ``simulate_flare_data``
+(two events per day) and runs, each in a fresh process:
+
+- rbf: the original ``ruptures`` path with ``CostRbf``; skipped above ``--max-rbf`` samples,
+  where the n x n Gram matrix alone would need the memory shown;
+- l2 / normal: PELT with cumulative-sum Gaussian costs from ``pelt.py``; up to ``--max-rbf``
+  samples, l2 is also run through ``ruptures.Pelt(model="l2")`` on the same scaled signal and
+  the benchmark stops if the breakpoints differ;
+- segmented: l2 PELT on ``--segment-size`` segments in ``--workers`` processes, stitched, with
+  the number of breakpoints that differ from the unsegmented l2 result.
+
+Reports wall time, how much the process's peak resident memory grew during detection (worker
+processes of the segmented path are not included) and the number of breakpoints found.
+
+Run from the project directory:
+  python benchmarks/pelt_scaling.py --sizes 1000 10000 100000 1000000
+"""
+import argparse
+import multiprocessing as mp
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+from pelt import default_penalty, noise_scale  # noqa: E402
+from train import changepoint_detector, segmented_changepoint_detector, simulate_flare_data  # noqa: E402
+
+
+def ruptures_l2(series, penalty, min_size=2, jump=5):
+    """Breakpoints from ``ruptures``' own l2 PELT on the signal scaled the way ``pelt.detect`` scales it."""
+    from ruptures import Pelt
+
+    signal = series.values / noise_scale(series.values)
+    penalty = default_penalty(len(signal)) if penalty is None else penalty
+    return Pelt(model="l2", min_size=min_size, jump=jump).fit(signal).predict(pen=penalty)[:-1]
+
+
+def run(conn, n, path, args):
+    series, _, _ = simulate_flare_data(n_samples=n, n_anomalies=max(1, n // 720), seed=args.seed)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if path == "rbf":
+        bkps = changepoint_detector(series, penalty=args.rbf_penalty, cost="rbf")
+    elif path == "segmented":
+        bkps = segmented_changepoint_detector(
+            series, penalty=args.penalty, cost="l2", segment_size=args.segment_size, workers=args.workers
+        )
+    else:
+        bkps = changepoint_detector(series, penalty=args.penalty, cost=path)
+    seconds = time.perf_counter() - start
+    grown = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) * 1024  # ru_maxrss is KiB on Linux
+    reference = ruptures_l2(series, args.penalty) if path == "l2" and n <= args.max_rbf else None
+    conn.send((seconds, grown, bkps, reference))
+
+
+def measure(n, path, args):
+    parent, child = mp.Pipe(duplex=False)
+    proc = mp.Process(target=run, args=(child, n, path, args))
+    proc.start()
+    result = parent.recv()
+    proc.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PELT cost functions and segmented PELT.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--penalty", type=float, default=None,
+                        help="Penalty for l2/normal (noise-variance units); default 2*ln(n).")
+    parser.add_argument("--rbf-penalty", type=float, default=3.0)
+    parser.add_argument("--max-rbf", type=int, default=10000)
+    parser.add_argument("--segment-size", type=int, default=50000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=13)
+    args = parser.parse_args()
+
+    print(f"{'samples':>8} {'path':>9} {'seconds':>8} {'RSS +MiB':>8} {'bkps':>6} {'vs l2':>6}")
+    for n in args.sizes:
+        reference = None
+        for path in ("rbf", "l2", "normal", "segmented"):
+            if path == "rbf" and n > args.max_rbf:
+                print(f"{n:>8} {path:>9}  skipped: the Gram matrix alone needs {n * n * 8 / 2**30:.1f} GiB")
+                continue
+            seconds, grown, bkps, parity = measure(n, path, args)
+            if parity is not None and parity != bkps:
+                raise SystemExit(f"l2 breakpoints differ from ruptures at n={n}: {bkps} vs {parity}")
+            if path == "l2":
+                reference = set(bkps)
+            diff = len(reference ^ set(bkps)) if path == "segmented" and reference is not None else "-"
+            print(f"{n:>8} {path:>9} {seconds:>8.2f} {grown / 2**20:>8.1f} {len(bkps):>6} {diff:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+PELT with linear-memory segment costs, and a segmented mode for long flare histories.
+
+``ruptures`` with ``CostRbf`` builds the full n x n Gram matrix, which is infeasible beyond a few
+days of 1-minute data.  The Gaussian costs here are evaluated from cumulative sums of x and x^2,
+so the cost of any segment is O(1) and the whole search keeps a handful of length-n arrays:
+
+- ``l2``: change in mean with a common noise level; residual sum of squares of the segment.
+- ``normal``: change in mean and/or variance; segment length times the log of its variance.
+
+The signal is divided by a robust noise scale (median absolute first difference) before the
+search, so penalties are in noise-variance units for either cost, and a penalty of None means the
+BIC-like ``default_penalty(n) = 2 * ln(n)``.  RBF penalties are in different units and must be
+given.  ``min_size`` and ``jump`` have the same meaning as in ``ruptures``.
+
+On the scaled signal, ``l2`` gives the same breakpoints as ``ruptures.Pelt(model="l2")``
+(``benchmarks/pelt_scaling.py`` checks this).  ``normal`` agrees with ``model="normal"`` only
+while no candidate segment's variance comes near ``var_floor``: ``ruptures`` adds 1e-6 to the
+variance instead, so near-constant stretches can be split differently.
+
+``segmented_pelt`` splits a long series at safe boundaries (the points near each nominal split
+where the local means on either side agree best, so no split lands on a step), solves each
+segment in a process pool, and stitches the results by re-solving the stretch between the last
+changepoint before and the first after each boundary, so a change near a split is not lost.
+"""
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+
+COSTS = ("l2", "normal", "rbf")
+
+
+def default_penalty(n: int) -> float:
+    """BIC-like penalty for the Gaussian costs on ``n`` samples, in noise-variance units."""
+    return 2.0 * math.log(max(n, 2))
+
+
+def noise_scale(signal: np.ndarray) -> float:
+    """Robust noise standard deviation from first differences (insensitive to steps and trends)."""
+    diffs = np.abs(np.diff(signal))
+    scale = float(np.median(diffs)) / (0.6745 * math.sqrt(2.0)) if len(diffs) else 0.0
+    return scale if scale > 0 else float(np.std(signal)) or 1.0
+
+
+class NormalMeanCost:
+    """Residual sum of squares from prefix sums; ``cost(starts, end)`` is vectorised over starts."""
+
+    def __init__(self, signal: np.ndarray):
+        x = np.asarray(signal, dtype=float)
+        self.s1 = np.concatenate(([0.0], np.cumsum(x)))
+        self.s2 = np.concatenate(([0.0], np.cumsum(x * x)))
+
+    def rss(self, starts: np.ndarray, end: int) -> np.ndarray:
+        s1 = self.s1[end] - self.s1[starts]
+        return self.s2[end] - self.s2[starts] - s1 * s1 / (end - starts)
+
+    cost = rss
+
+
+class NormalMeanVarCost(NormalMeanCost):
+    """Segment length times log variance; ``var_floor`` keeps flat-lined stretches finite."""
+
+    def __init__(self, signal: np.ndarray, var_floor: float = 1e-3):
+        super().__init__(signal)
+        self.var_floor = var_floor
+
+    def cost(self, starts: np.ndarray, end: int) -> np.ndarray:
+        n = end - starts
+        return n * np.log(np.maximum(self.rss(starts, end) / n, self.var_floor))
+
+
+def _pelt(signal: np.ndarray, cost: str, penalty: float, min_size: int, jump: int) -> List[int]:
+    """Exact PELT on an already scaled signal; breakpoints exclude ``len(signal)``."""
+    n = len(signal)
+    if n < 2 * min_size:
+        return []
+    model = NormalMeanVarCost(signal) if cost == "normal" else NormalMeanCost(signal)
+    # admissible breakpoints: multiples of jump that leave min_size samples on the left, plus n
+    grid = np.arange(jump * math.ceil(min_size / jump), n, jump)
+    grid = np.append(grid[grid <= n - min_size], n)
+    F = np.full(n + 1, np.inf)  # optimal penalised cost of signal[:t]
+    F[0] = -penalty
+    last = np.zeros(n + 1, dtype=np.int64)  # previous breakpoint on that optimal path
+    candidates = np.zeros(1, dtype=np.int64)
+    F_cand = F[:1].copy()
+    admitted = 0  # grid entries already added as candidates
+    for t in grid.tolist():
+        # a breakpoint s becomes a candidate once t - s >= min_size
+        while admitted < len(grid) - 1 and grid[admitted] <= t - min_size:
+            s = int(grid[admitted])
+            candidates = np.append(candidates, s)
+            F_cand = np.append(F_cand, F[s])
+            admitted += 1
+        fit = F_cand + model.cost(candidates, t)
+        best = int(np.argmin(fit))
+        F[t] = fit[best] + penalty
+        last[t] = candidates[best]
+        # prune candidates that can never be optimal again (K = 0 for these costs)
+        keep = fit <= F[t]
+        candidates, F_cand = candidates[keep], F_cand[keep]
+    bkps, t = [], n
+    while t > 0:
+        t = int(last[t])
+        if t > 0:
+            bkps.append(t)
+    return sorted(bkps)
+
+
+def detect(
+    signal,
+    cost: str = "l2",
+    penalty: Optional[float] = None,
+    min_size: int = 2,
+    jump: int = 5,
+    scale: Optional[float] = None,
+) -> List[int]:
+    """
+    Changepoints of ``signal`` (breakpoint indices, excluding its length).  ``cost="rbf"`` runs
+    the original ``ruptures`` path, whose penalty is in RBF-cost units; ``scale`` overrides the
+    noise scale the Gaussian costs are normalised by.
+    """
+    signal = np.asarray(signal, dtype=float)
+    if penalty is None:
+        if cost == "rbf":
+            raise ValueError("the rbf cost has no default penalty; pass one in RBF-cost units")
+        penalty = default_penalty(len(signal))
+    if cost == "rbf":
+        from ruptures import Pelt
+        from ruptures.costs import CostRbf
+
+        return Pelt(custom_cost=CostRbf(), min_size=min_size, jump=jump).fit(signal).predict(pen=penalty)[:-1]
+    if cost not in COSTS:
+        raise ValueError(f"unknown changepoint cost {cost!r}; expected one of {COSTS}")
+    scale = scale or noise_scale(signal)
+    return _pelt(signal / scale, cost, penalty, min_size, jump)
+
+
+def safe_boundaries(signal: np.ndarray, segment_size: int, search: int, window: int, jump: int = 1) -> List[int]:
+    """
+    Split points roughly every ``segment_size`` samples, each moved within ``search`` samples to
+    where the means of the ``window`` samples either side differ least.  Splits are multiples of
+    ``jump`` so every segment's breakpoint grid lines up with the whole series'.
+    """
+    n = len(signal)
+    s1 = np.concatenate(([0.0], np.cumsum(signal)))
+    bounds = []
+    for nominal in range(segment_size, n - segment_size // 2, segment_size):
+        lo, hi = max(nominal - search, window), min(nominal + search, n - window)
+        if lo >= hi:
+            continue
+        b = np.arange(jump * math.ceil(lo / jump), hi + 1, jump)
+        if not len(b):
+            continue
+        diff = np.abs((s1[b] - s1[b - window]) - (s1[b + window] - s1[b])) / window
+        bounds.append(int(b[np.argmin(diff)]))
+    return bounds
+
+
+def _solve_segment(args) -> List[int]:
+    signal, offset, cost, penalty, min_size, jump, scale = args
+    return [offset + b for b in detect(signal, cost, penalty, min_size, jump, scale)]
+
+
+def segmented_pelt(
+    signal,
+    cost: str = "l2",
+    penalty: Optional[float] = None,
+    min_size: int = 2,
+    jump: int = 5,
+    segment_size: int = 50_000,
+    workers: Optional[int] = None,
+    search: Optional[int] = None,
+    window: int = 60,
+) -> List[int]:
+    """
+    PELT on segments of about ``segment_size`` samples in ``workers`` processes, stitched at the
+    boundaries.  The noise scale, and a default penalty, are computed once on the whole series so
+    every segment is solved with the same penalty.
+    """
+    signal = np.asarray(signal, dtype=float)
+    n = len(signal)
+    scale = None if cost == "rbf" else noise_scale(signal)
+    if penalty is None and cost != "rbf":
+        penalty = default_penalty(n)
+    bounds = safe_boundaries(signal, segment_size, search or segment_size // 10, window, jump)
+    edges = [0] + bounds + [n]
+    tasks = [(signal[a:b], a, cost, penalty, min_size, jump, scale) for a, b in zip(edges[:-1], edges[1:])]
+    if len(tasks) == 1 or workers == 1:
+        parts = [_solve_segment(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_solve_segment, tasks))
+    bkps = sorted(b for part in parts for b in part)
+    # stitch: re-solve between the changepoints that bracket each boundary
+    for boundary, (a, b) in zip(bounds, zip(edges[:-2], edges[2:])):
+        lo = max([a] + [p for p in bkps if p < boundary])
+        hi = min([b] + [p for p in bkps if p > boundary])
+        local = [lo + p for p in detect(signal[lo:hi], cost, penalty, min_size, jump, scale)]
+        bkps = sorted([p for p in bkps if not lo < p < hi] + local)
+    return bkps
@@ -0,0 +1,240 @@
+"""
+Vectorised synthetic telemetry shared by the portfolio projects.
+
+Generators here produce seeded, multi-asset series of arbitrary length without Python loops over
+samples.  Event parameters are drawn one event at a time, in the order the projects' original
+per-event loops used, so a given seed reproduces their datasets exactly; applying the events to
+the series is vectorised.  ``iter_chunks`` yields the same kind of data lazily in fixed-size chunks, so
+load tests and benchmarks can stream 1e8+ samples without holding them in memory.  Each
+(asset, chunk) pair draws from its own seeded stream, which keeps chunked runs reproducible.
+"""
+from typing import Callable, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+COMPRESSOR_COLUMNS = ["flow", "Ps", "Pd", "vib", "current", "temp"]
+MINUTES_PER_DAY = 1440
+
+
+def _rng(seed: int, *keys: int) -> np.random.Generator:
+    return np.random.default_rng([seed, *keys])
+
+
+def event_windows(
+    rng: np.random.Generator,
+    n_samples: int,
+    n_events: int,
+    length_range: Tuple[int, int],
+    margin: int = 0,
+    payload: Optional[Callable[[np.random.Generator, int], object]] = None,
+) -> Tuple[np.ndarray, np.ndarray, list]:
+    """
+    Draw ``n_events`` (start, length) pairs with starts in ``[margin, n_samples - margin)`` and
+    lengths in ``[length_range[0], length_range[1])``.  ``payload(rng, length)``, if given, is
+    drawn right after each event's window (e.g. its amplitude); the payloads are returned as a
+    list.  Draws are per event (O(n_events) scalar calls) to keep the seeded stream stable.
+    """
+    low, high = margin, max(n_samples - margin, margin + 1)
+    starts = np.empty(n_events, dtype=np.int64)
+    lengths = np.empty(n_events, dtype=np.int64)
+    payloads = []
+    for i in range(n_events):
+        starts[i] = rng.integers(low, high)
+        lengths[i] = rng.integers(length_range[0], length_range[1])
+        if payload is not None:
+            payloads.append(payload(rng, int(lengths[i])))
+    return starts, lengths, payloads
+
+
+def window_mask(n_samples: int, starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """
+    Boolean mask of samples covered by any ``[start, start + length)`` window (difference array).
+    """
+    edges = np.zeros(n_samples + 1, dtype=np.int64)
+    np.add.at(edges, np.minimum(starts, n_samples), 1)
+    np.add.at(edges, np.minimum(starts + lengths, n_samples), -1)
+    return np.cumsum(edges[:-1]) > 0
+
+
+def add_steps(values: np.ndarray, starts: np.ndarray, lengths: np.ndarray, amplitudes: np.ndarray):
+    """
+    Add a constant ``amplitude`` over each window in place; overlapping windows accumulate.
+    """
+    n = len(values)
+    edges = np.zeros(n + 1)
+    np.add.at(edges, np.minimum(starts, n), amplitudes)
+    np.add.at(edges, np.minimum(starts + lengths, n), -amplitudes)
+    values += np.cumsum(edges[:-1])
+
+
+def add_bursts(values: np.ndarray, starts: np.ndarray, lengths: np.ndarray, increments: np.ndarray):
+    """
+    Add per-sample ``increments`` (the windows' increments concatenated in event order) to every
+    sample of each window in place; overlapping windows accumulate.
+    """
+    n = len(values)
+    total = int(lengths.sum())
+    if total == 0:
+        return
+    offsets = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    positions = np.repeat(starts, lengths) + offsets
+    keep = positions < n
+    values += np.bincount(positions[keep], weights=increments[keep], minlength=n)
+
+
+def compressor_series(
+    n_samples: int,
+    n_anomalies: int = 30,
+    seed: int = 42,
+    t0: int = 0,
+    rng: Optional[np.random.Generator] = None,
+    dtype=np.float64,
+) -> Tuple[pd.DataFrame, np.ndarray]:
+    """
+    Correlated compressor telemetry (flow, Ps, Pd, vib, current, temp) with vibration-spike
+    anomalies.  ``t0`` offsets the daily seasonality so consecutive chunks line up.
+    """
+    rng = rng if rng is not None else np.random.default_rng(seed)
+    t = np.arange(t0, t0 + n_samples)
+    flow = 100 + 10 * np.sin(2 * np.pi * t / MINUTES_PER_DAY) + rng.normal(0, 1, n_samples)
+    ps = 2.5 - 0.002 * (flow - 100) + rng.normal(0, 0.05, n_samples)
+    pd_ = 6.0 + 0.010 * (flow - 100) + rng.normal(0, 0.08, n_samples)
+    vib = 1.5 + 0.005 * (flow - 100) + rng.normal(0, 0.05, n_samples)
+    current = 200 + 0.8 * (flow - 100) + rng.normal(0, 1, n_samples)
+    temp = 45 + 0.03 * (current - 200)
+
+    # vibration spikes: each event perturbs samples [idx, idx + width] and labels [idx, idx + width)
+    margin = min(60, n_samples // 4)
+    starts, widths, bursts = event_windows(
+        rng, n_samples, n_anomalies, (10, 30), margin, payload=lambda r, w: r.normal(0.5, 0.1, w + 1)
+    )
+    if bursts:
+        add_bursts(vib, starts, widths + 1, np.concatenate(bursts))
+    labels = window_mask(n_samples, starts, widths).astype(int)
+
+    df = pd.DataFrame(
+        {"flow": flow, "Ps": ps, "Pd": pd_, "vib": vib, "current": current, "temp": temp},
+        copy=False,
+    )
+    if dtype != np.float64:
+        df = df.astype(dtype)
+    return df, labels
+
+
+def flare_series(
+    n_samples: int,
+    n_anomalies: int = 4,
+    anomaly_duration_range: Tuple[int, int] = (30, 90),
+    seed: int = 7,
+    t0: int = 0,
+    rng: Optional[np.random.Generator] = None,
+    dtype=np.float64,
+) -> Tuple[pd.Series, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Flare flow with a daily sinusoidal baseline and step anomalies representing flaring events.
+    Returns the series, binary labels and the event starts and durations.
+    """
+    rng = rng if rng is not None else np.random.default_rng(seed)
+    t = np.arange(t0, t0 + n_samples)
+    flow = 5.0 + 1.0 * np.sin(2 * np.pi * t / MINUTES_PER_DAY) + rng.normal(0, 0.2, n_samples)
+    margin = min(120, n_samples // 4)
+    starts, durations, amplitudes = event_windows(
+        rng, n_samples, n_anomalies, anomaly_duration_range, margin, payload=lambda r, _: r.uniform(1.5, 2.5)
+    )
+    add_steps(flow, starts, durations, np.array(amplitudes, dtype=float))
+    labels = window_mask(n_samples, starts, durations).astype(int)
+    return pd.Series(flow.astype(dtype, copy=False), name="flare_flow"), labels, starts, durations
+
+
+def energy_series(
+    n_samples: int,
+    level: float = 1.0,
+    n_upsets: int = 0,
+    seed: int = 11,
+    t0: int = 0,
+    rng: Optional[np.random.Generator] = None,
+    dtype=np.float64,
+    annual_drift: float = 0.03,
+) -> Tuple[pd.Series, np.ndarray]:
+    """
+    Minute-resolution energy intensity around ``level``: daily and weekly cycles, a slow annual
+    drift of relative amplitude ``annual_drift``, measurement noise and ``n_upsets`` short upward
+    steps (process upsets).  Returns the series and binary labels marking the upsets.  ``t0``
+    offsets every cycle for chunking.
+    """
+    rng = rng if rng is not None else np.random.default_rng(seed)
+    t = np.arange(t0, t0 + n_samples)
+    day, week, year = MINUTES_PER_DAY, 7 * MINUTES_PER_DAY, 365 * MINUTES_PER_DAY
+    energy = level * (
+        1.0
+        + annual_drift * np.sin(2 * np.pi * t / year)
+        + 0.08 * np.sin(2 * np.pi * t / day)
+        + 0.03 * np.cos(2 * np.pi * t / week)
+    ) + rng.normal(0, 0.02 * level, n_samples)
+    starts, durations, amplitudes = event_windows(
+        rng, n_samples, n_upsets, (15, 120), payload=lambda r, _: r.uniform(0.2, 0.5)
+    )
+    add_steps(energy, starts, durations, np.array(amplitudes, dtype=float) * level)
+    labels = window_mask(n_samples, starts, durations).astype(int)
+    return pd.Series(energy.astype(dtype, copy=False), name="energy_intensity"), labels
+
+
+def _series(kind: str, n: int, rate: float, rng: np.random.Generator, t0: int, dtype) -> pd.DataFrame:
+    if kind == "compressor":
+        df, labels = compressor_series(n, n_anomalies=rng.poisson(rate * n), t0=t0, rng=rng, dtype=dtype)
+    elif kind == "flare":
+        series, labels, _, _ = flare_series(n, n_anomalies=rng.poisson(rate * n), t0=t0, rng=rng, dtype=dtype)
+        df = series.to_frame()
+    elif kind == "energy":
+        series, labels = energy_series(n, n_upsets=rng.poisson(rate * n), t0=t0, rng=rng, dtype=dtype)
+        df = series.to_frame()
+    else:
+        raise ValueError(f"Unknown series kind {kind!r}; expected 'compressor', 'flare' or 'energy'")
+    df["label"] = labels
+    return df
+
+
+def fleet(
+    kind: str = "compressor",
+    n_assets: int = 10,
+    n_samples: int = 1440,
+    anomaly_rate: float = 1 / 500,
+    seed: int = 0,
+    dtype=np.float64,
+) -> pd.DataFrame:
+    """
+    Long-format data for ``n_assets`` assets: columns ``asset_id``, ``t``, the signals and
+    ``label``.  Anomaly counts are Poisson with mean ``anomaly_rate * n_samples`` per asset.
+    """
+    frames = []
+    for asset in range(n_assets):
+        df = _series(kind, n_samples, anomaly_rate, _rng(seed, asset), 0, dtype)
+        df.insert(0, "t", np.arange(n_samples))
+        df.insert(0, "asset_id", f"A{asset:04d}")
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
+
+
+def iter_chunks(
+    kind: str = "compressor",
+    n_samples: int = 10_000_000,
+    chunk_size: int = 100_000,
+    n_assets: int = 1,
+    anomaly_rate: float = 1 / 500,
+    seed: int = 0,
+    dtype=np.float32,
+) -> Iterator[pd.DataFrame]:
+    """
+    Lazily yield ``n_samples`` per asset in chunks of ``chunk_size`` rows, asset by asset, with
+    columns ``asset_id``, ``t``, the signals and ``label``.  Seasonality is continuous across
+    chunks; anomalies that would cross a chunk boundary are truncated at it.
+    """
+    for asset in range(n_assets):
+        asset_id = f"A{asset:04d}"
+        for chunk, t0 in enumerate(range(0, n_samples, chunk_size)):
+            n = min(chunk_size, n_samples - t0)
+            df = _series(kind, n, anomaly_rate, _rng(seed, asset, chunk), t0, dtype)
+            df.insert(0, "t", np.arange(t0, t0 + n))
+            df.insert(0, "asset_id", asset_id)
+            yield df